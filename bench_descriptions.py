@@ -0,0 +1,74 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+from description_parser import DescriptionExtractor
+
+DEFAULT_INPUTS = ["google_jobs.csv", "jobs_all.csv"] + glob.glob("data_*.csv")
+
+
+def load_corpus(paths, column):
+    texts = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or column not in header:
+                continue
+            index = header.index(column)
+            for row in reader:
+                if len(row) > index and row[index]:
+                    texts.append(row[index])
+    return texts
+
+
+def timed(label, texts, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    chars = sum(len(t) for t in texts)
+    rate = len(texts) / elapsed if elapsed else 0.0
+    mb_rate = chars / elapsed / 1e6 if elapsed else 0.0
+    print(f"[bench] {label:<24} {elapsed:8.3f}s {rate:12.0f} docs/s {mb_rate:8.2f} MB/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark description field extraction on saved descriptions.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="CSV files to read descriptions from.")
+    parser.add_argument("--column", default="Description Full", help="Column holding the description text.")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the corpus N times to get stable timings.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for the pooled batch run.",
+    )
+    args = parser.parse_args()
+
+    texts = load_corpus(args.inputs, args.column) * max(args.repeat, 1)
+    if not texts:
+        sys.exit(f"No '{args.column}' values found in: {', '.join(args.inputs) or '(no inputs)'}")
+    print(f"[bench] corpus docs={len(texts)} chars={sum(len(t) for t in texts)}")
+
+    started = time.perf_counter()
+    extractor = DescriptionExtractor()
+    print(f"[bench] {'compile':<24} {time.perf_counter() - started:8.3f}s")
+
+    timed("extract (per call)", texts, lambda: [extractor.extract(t) for t in texts])
+    timed("extract_many serial", texts, lambda: extractor.extract_many(texts, processes=1))
+    if args.processes > 1:
+        timed(
+            f"extract_many pool={args.processes}",
+            texts,
+            lambda: extractor.extract_many(texts, processes=args.processes),
+        )
+
+
+if __name__ == "__main__":
+    main()
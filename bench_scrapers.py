@@ -0,0 +1,243 @@
+import argparse
+import csv
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from fixtures import DEFAULT_FIXTURE_DIR, FixtureSet, start_server
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_MAX_REGRESSION = 0.2
+CARDS_RE = re.compile(r"^\[(?:google|boards)\] .*\bcards=(\d+)", re.M)
+# Higher is better for the first two, lower for the rest.
+HIGHER_BETTER = ["cards_per_s", "jobs_per_s"]
+LOWER_BETTER = ["p50_ms", "p95_ms", "peak_rss_mb"]
+
+
+class BenchWriter:
+    # csv.writer stand-in that counts the rows written.
+    def __init__(self, writer):
+        self.writer = writer
+        self.rows = 0
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(args):
+    # One scraper run in this (fresh) process, so peak RSS is its own.
+    from browser_daemon import new_tab, open_page
+    import google_s
+    import job_boards
+    import profiling
+
+    manifest = FixtureSet(args.fixture_path).manifest
+    common = ["--query", manifest["query"], "--location", manifest["location"], "--origin", args.origin]
+    common += ["--browser-address", args.browser_address]
+    if args.lean:
+        common.append("--lean")
+    browser = {}
+    # Latency comes from the scrapers' own spans: a Google "job" runs from
+    # reading the card to emitting its row, a board "page" from the request
+    # to its parsed rows.
+    profiling.enable()
+    span_name = "job" if args.child == "google" else "page"
+
+    def get_browser():
+        if "page" not in browser:
+            browser["page"] = open_page(args.browser_address, args.lean)
+        return browser["page"]
+
+    with open(os.devnull, mode="w", newline="", encoding="utf-8") as f:
+        if args.child == "google":
+            scraper_args = google_s.parse_args([*common, "--max-jobs", str(manifest["max_jobs"]), "--seen-index", ""])
+            get_browser()
+            started = time.perf_counter()
+            writer = BenchWriter(csv.writer(f))
+            google_s.run_google(scraper_args, browser["page"], writer)
+        else:
+            scraper_args = job_boards.parse_args(
+                [*common, "--max-pages", str(manifest["max_pages"]), "--engine", args.engine]
+            )
+            started = time.perf_counter()
+            writer = BenchWriter(csv.writer(f))
+            job_boards.run_boards(scraper_args, writer, get_browser, lambda: new_tab(get_browser()))
+        wall = time.perf_counter() - started
+    if "page" in browser:
+        browser["page"].close()
+    with open(args.result, "w", encoding="utf-8") as f:
+        result = {"wall": wall, "rows": writer.rows, "latencies": profiling.span_seconds(span_name)}
+        json.dump({**result, "peak_rss_mb": peak_rss_mb()}, f)
+
+
+def percentile(values, fraction):
+    # Nearest rank.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def median(values):
+    return percentile(values, 0.5)
+
+
+def bench_scraper(args, scraper, fixture_path, origin):
+    runs = []
+    for run in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            result_path = os.path.join(tmp, "result.json")
+            command = [
+                sys.executable, os.path.abspath(__file__), args.name, "--dir", args.dir,
+                "--child", scraper, "--origin", origin, "--result", result_path,
+                "--engine", args.engine, "--browser-address", args.browser_address,
+            ]
+            if args.lean:
+                command.append("--lean")
+            # Each run starts in an empty directory so caches and seen indexes
+            # from earlier runs can't help it.
+            output = subprocess.run(command, cwd=tmp, capture_output=True, text=True)
+            if args.verbose or output.returncode != 0:
+                print(output.stdout + output.stderr, flush=True)
+            if output.returncode != 0:
+                raise SystemExit(f"[bench] {scraper} run {run + 1} failed (exit {output.returncode})")
+            with open(result_path, encoding="utf-8") as f:
+                result = json.load(f)
+        result["cards"] = sum(int(n) for n in CARDS_RE.findall(output.stdout))
+        runs.append(result)
+        print(
+            f"[bench] {scraper} run={run + 1} rows={result['rows']} cards={result['cards']} wall={result['wall']:.2f}s",
+            flush=True,
+        )
+
+    latencies = [value for result in runs for value in result["latencies"]]
+    rss = [result["peak_rss_mb"] for result in runs if result["peak_rss_mb"] is not None]
+    return {
+        "rows": runs[-1]["rows"],
+        "cards_per_s": median([r["cards"] / r["wall"] if r["wall"] else 0.0 for r in runs]),
+        "jobs_per_s": median([r["rows"] / r["wall"] if r["wall"] else 0.0 for r in runs]),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_rss_mb": max(rss) if rss else None,
+    }
+
+
+def format_metrics(metrics):
+    rss = "-" if metrics["peak_rss_mb"] is None else f"{metrics['peak_rss_mb']:.0f}MB"
+    return (
+        f"rows={metrics['rows']} cards/s={metrics['cards_per_s']:.2f} jobs/s={metrics['jobs_per_s']:.2f} "
+        f"p50={metrics['p50_ms']:.0f}ms p95={metrics['p95_ms']:.0f}ms peak_rss={rss}"
+    )
+
+
+def regressions(metrics, baseline, limit):
+    # Metrics that moved the wrong way by more than limit (a fraction).
+    found = []
+    for name in HIGHER_BETTER + LOWER_BETTER:
+        before, after = baseline.get(name), metrics.get(name)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if (name in HIGHER_BETTER and change < -limit) or (name in LOWER_BETTER and change > limit):
+            found.append(f"{name} {before:.2f} -> {after:.2f} ({change:+.0%})")
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a recorded fixture set.")
+    parser.add_argument("name", nargs="?", default="default", help="Fixture set name (see fixtures.py list).")
+    parser.add_argument("--dir", default=DEFAULT_FIXTURE_DIR, help="Directory holding fixture sets.")
+    parser.add_argument("--scrapers", default="", help="Comma-separated scrapers to run (default: all recorded).")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scraper; rates are the median run.")
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser", help="Engine for the boards.")
+    parser.add_argument("--lean", action="store_true", help="Run the browser in lean mode.")
+    parser.add_argument("--browser-address", default="", help="Browser daemon to use (empty = launch per run).")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds the replay server holds each response.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help="Fail when a metric is this much worse than the baseline (0.2 = 20%%).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' own output.")
+    # Internal: a single measured run, started by the parent process.
+    parser.add_argument("--child", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--origin", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--result", default="", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fixture_path = os.path.abspath(os.path.join(args.dir, args.name))
+    args.dir = os.path.abspath(args.dir)
+    args.fixture_path = fixture_path
+    if args.child:
+        run_child(args)
+        return
+
+    manifest = FixtureSet(fixture_path).manifest
+    recorded = manifest.get("scrapers", [])
+    scrapers = [s.strip() for s in args.scrapers.split(",") if s.strip()] or recorded
+    server, origin = start_server(fixture_path, delay=args.delay)
+    print(f"[bench] fixture={args.name} origin={origin} runs={args.runs} engine={args.engine}", flush=True)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+    failures = []
+    results = {}
+    try:
+        for scraper in scrapers:
+            metrics = bench_scraper(args, scraper, fixture_path, origin)
+            key = f"{args.name}/{scraper}/{args.engine}{'/lean' if args.lean else ''}"
+            results[key] = metrics
+            print(f"[bench] {key} {format_metrics(metrics)}", flush=True)
+            expected = manifest.get("expected", {}).get(scraper)
+            if expected is not None and metrics["rows"] != expected:
+                failures.append(f"{key} rows {metrics['rows']} != recorded {expected}")
+            if key in baselines and not args.save_baseline:
+                failures.extend(f"{key} {line}" for line in regressions(metrics, baselines[key], args.max_regression))
+    finally:
+        server.shutdown()
+    stats = server.RequestHandlerClass.stats
+    print(f"[bench] replay hits={stats['hits']} misses={stats['misses']}", flush=True)
+
+    if args.save_baseline:
+        baselines.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=1)
+        print(f"[bench] baseline saved to {args.baseline}", flush=True)
+    for line in failures:
+        print(f"[bench] REGRESSION {line}", flush=True)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
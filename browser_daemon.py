@@ -0,0 +1,160 @@
+from DrissionPage import Chromium, ChromiumOptions, ChromiumPage
+import argparse
+import time
+
+import requests
+
+from lean_browser import LeanPage, lean_options
+
+DEFAULT_ADDRESS = "127.0.0.1:9333"
+DEFAULT_PROFILE = ".browser_profile"
+DEFAULT_READY_TABS = 2
+CHECK_INTERVAL = 5.0
+PROBE_TIMEOUT = 0.5
+
+
+def daemon_running(address):
+    # A DevTools endpoint answering at address means a browser is up there.
+    if not address:
+        return False
+    try:
+        return requests.get(f"http://{address}/json/version", timeout=PROBE_TIMEOUT).ok
+    except requests.RequestException:
+        return False
+
+
+def open_page(address=DEFAULT_ADDRESS, lean=False, isolated=False):
+    # A fresh tab in the daemon's browser when one is running at address,
+    # otherwise a newly launched browser as before. Either way page.close()
+    # only closes this page's tab. In lean mode a launched browser is
+    # headless, and the tab blocks what its source doesn't need (the daemon's
+    # own --headless decides for an attached one). isolated launches on a
+    # free port with a temporary profile, so several processes on one host
+    # each get their own browser.
+    started = time.perf_counter()
+    if daemon_running(address):
+        browser = Chromium(ChromiumOptions().set_address(address).existing_only())
+        page = browser.new_tab()
+        mode = f"attached to daemon at {address}"
+    else:
+        options = ChromiumOptions()
+        if lean:
+            options = lean_options(options)
+        if isolated:
+            options.auto_port()
+        page = ChromiumPage(options)
+        mode = f"no daemon at {address}; launched a new browser" if address else "launched a new browser"
+    if lean:
+        page = LeanPage(page)
+        mode += " (lean)"
+    print(f"[browser] {mode} startup={time.perf_counter() - started:.2f}s", flush=True)
+    return page
+
+
+def new_tab(page):
+    # Another tab in page's browser, lean if page is.
+    tab = page.browser.new_tab()
+    return LeanPage(tab) if isinstance(page, LeanPage) else tab
+
+
+def add_browser_args(parser):
+    parser.add_argument(
+        "--browser-address",
+        default=DEFAULT_ADDRESS,
+        help="Attach to the browser daemon at this host:port, else launch a browser (empty = always launch).",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Headless; block images, fonts, media, trackers (and CSS on boards); log bytes and load time per URL.",
+    )
+
+
+class TimedWriter:
+    # csv.writer stand-in that notes when the first row (the first scraped
+    # card) was written.
+    def __init__(self, writer):
+        self.writer = writer
+        self.first_row_at = None
+
+    def writerow(self, row):
+        if self.first_row_at is None:
+            self.first_row_at = time.perf_counter()
+        self.writer.writerow(row)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def print_first_card(prefix, started, writer):
+    if writer.first_row_at is None:
+        print(f"[{prefix}] time_to_first_card=- (no cards)", flush=True)
+    else:
+        print(f"[{prefix}] time_to_first_card={writer.first_row_at - started:.2f}s", flush=True)
+
+
+def daemon_options(address, profile, headless):
+    options = ChromiumOptions().set_address(address).set_user_data_path(profile)
+    if headless:
+        options.headless()
+    return options
+
+
+def serve(address, profile, ready_tabs, headless):
+    # Keeps a browser with its own profile up at address, with ready_tabs
+    # blank tabs open so scrapers attach to a warm browser and closing their
+    # own tab never closes the last one.
+    if daemon_running(address):
+        raise SystemExit(f"A browser is already listening at {address}")
+    started = time.perf_counter()
+    browser = Chromium(daemon_options(address, profile, headless))
+    ready = list(browser.tab_ids)[:ready_tabs]
+    print(
+        f"[daemon] browser up at {address} profile={profile} startup={time.perf_counter() - started:.2f}s",
+        flush=True,
+    )
+    try:
+        while True:
+            live = set(browser.tab_ids)
+            ready = [tab_id for tab_id in ready if tab_id in live]
+            while len(ready) < ready_tabs:
+                ready.append(browser.new_tab().tab_id)
+            time.sleep(CHECK_INTERVAL)
+    except KeyboardInterrupt:
+        print("[daemon] stopping", flush=True)
+    finally:
+        browser.quit()
+
+
+def stop(address):
+    if not daemon_running(address):
+        print(f"[daemon] nothing running at {address}")
+        return
+    Chromium(ChromiumOptions().set_address(address).existing_only()).quit()
+    print(f"[daemon] stopped browser at {address}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Keep a warm browser running for the scrapers to attach to.")
+    parser.add_argument("command", choices=["start", "status", "stop"], help="start runs until Ctrl+C.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port for the DevTools endpoint.")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Browser profile directory.")
+    parser.add_argument("--tabs", type=int, default=DEFAULT_READY_TABS, help="Blank tabs to keep open.")
+    parser.add_argument("--headless", action="store_true", help="Run the browser without a window.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "start":
+        serve(args.address, args.profile, max(args.tabs, 1), args.headless)
+    elif args.command == "stop":
+        stop(args.address)
+    else:
+        state = "running" if daemon_running(args.address) else "not running"
+        print(f"[daemon] {state} at {args.address}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+
+# Reads every card's fields in one script round-trip instead of one `ele()`
+# call per field per card. Selector strings use DrissionPage locator syntax and
+# are translated the same way DrissionPage would resolve them, so the bulk path
+# and the per-element fallback see the same elements.
+
+# Locator and field helpers, shared with the infinite-scroll harvester.
+FIELD_JS = r"""
+function findAll(root, loc) {
+  if (loc.by === 'css') {
+    return Array.from(root.querySelectorAll(loc.value));
+  }
+  let expr = loc.value;
+  if (root !== document && expr.startsWith('/')) {
+    expr = '.' + expr;
+  }
+  const snap = document.evaluate(expr, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  const found = [];
+  for (let i = 0; i < snap.snapshotLength; i++) {
+    const node = snap.snapshotItem(i);
+    if (node.nodeType === 1) {
+      found.push(node);
+    }
+  }
+  return found;
+}
+function findFirst(root, locs) {
+  for (const loc of locs) {
+    try {
+      const found = findAll(root, loc);
+      if (found.length) {
+        return found[0];
+      }
+    } catch (e) {}
+  }
+  return null;
+}
+function readField(el, attr) {
+  if (!el) {
+    return '';
+  }
+  if (attr === 'href') {
+    return el.href || el.getAttribute('href') || '';
+  }
+  if (attr) {
+    return el.getAttribute(attr) || '';
+  }
+  return el.innerText || el.textContent || '';
+}
+function readFields(card, fields) {
+  const row = {};
+  for (const [name, field] of Object.entries(fields)) {
+    row[name] = readField(findFirst(card, field.locs), field.attr);
+  }
+  return row;
+}
+"""
+
+EXTRACT_JS = "const spec = %s;\n" + FIELD_JS + r"""
+let cards = [];
+for (const loc of spec.cards) {
+  try {
+    cards = findAll(document, loc);
+  } catch (e) {
+    cards = [];
+  }
+  if (cards.length) {
+    break;
+  }
+}
+return JSON.stringify(cards.map(card => readFields(card, spec.fields)));
+"""
+
+
+def _quote_xpath(value):
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split('"')
+    return "concat(" + ', \'"\', '.join(f'"{p}"' for p in parts) + ")"
+
+
+def translate_locator(selector):
+    # Mirror of the DrissionPage shorthands used by this project's selector lists.
+    if selector.startswith(("xpath:", "xpath=")):
+        return {"by": "xpath", "value": selector[6:]}
+    if selector.startswith(("x:", "x=")):
+        return {"by": "xpath", "value": selector[2:]}
+    if selector.startswith(("css:", "css=")):
+        return {"by": "css", "value": selector[4:]}
+    if selector.startswith(("c:", "c=")):
+        return {"by": "css", "value": selector[2:]}
+    if selector.startswith(".") and len(selector) > 1:
+        return {"by": "xpath", "value": f"//*[@class={_quote_xpath(selector[1:])}]"}
+    if selector.startswith("#") and len(selector) > 1:
+        return {"by": "xpath", "value": f"//*[@id={_quote_xpath(selector[1:])}]"}
+    if selector.startswith(("tag:", "t:")) and "@" not in selector:
+        tag = selector.split(":", 1)[1]
+        return {"by": "xpath", "value": f'//*[name()="{tag}"]'}
+    if selector.startswith("text="):
+        return {"by": "xpath", "value": f"//*[text()={_quote_xpath(selector[5:])}]"}
+    if selector.startswith(("text:", "tx:")):
+        text = selector.split(":", 1)[1]
+        return {"by": "xpath", "value": f"//*/text()[contains(., {_quote_xpath(text)})]/.."}
+    # DrissionPage treats a bare string as a fuzzy text match.
+    return {"by": "xpath", "value": f"//*/text()[contains(., {_quote_xpath(selector)})]/.."}
+
+
+def build_spec(card_selectors, field_selectors, attrs=None):
+    attrs = attrs or {}
+    return {
+        "cards": [translate_locator(sel) for sel in card_selectors],
+        "fields": {
+            name: {"locs": [translate_locator(sel) for sel in selectors], "attr": attrs.get(name, "")}
+            for name, selectors in field_selectors.items()
+        },
+    }
+
+
+def build_script(card_selectors, field_selectors, attrs=None):
+    return EXTRACT_JS % json.dumps(build_spec(card_selectors, field_selectors, attrs))
+
+
+def extract_cards(page, card_selectors, field_selectors, attrs=None):
+    # Returns one dict of field values per card, or None when the page cannot
+    # run scripts or the script failed; callers then fall back to per-element
+    # lookups. `attrs` maps a field to an attribute to read instead of its text.
+    run_js = getattr(page, "run_js", None)
+    if run_js is None:
+        return None
+    try:
+        raw = run_js(build_script(card_selectors, field_selectors, attrs))
+        records = json.loads(raw) if isinstance(raw, str) else raw
+    except Exception as e:
+        print(f"[bulk] script extraction failed, using per-element fallback: {e}", flush=True)
+        return None
+    if not isinstance(records, list):
+        return None
+    return records
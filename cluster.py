@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+DEFAULT_QUEUE = "shards.db"
+DEFAULT_LEASE = 600.0
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+
+
+class ShardQueue:
+    # The shared store: one row per (source, query, location) shard, leased
+    # to one worker at a time, plus the rows workers upload. A lease that is
+    # not renewed before it expires is handed to the next worker that asks,
+    # and an upload is only accepted from the worker still holding the lease,
+    # so a shard's rows are stored exactly once. SQLite here; on several
+    # hosts, a file on a shared volume.
+
+    def __init__(self, path=DEFAULT_QUEUE):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            " id INTEGER PRIMARY KEY, source TEXT, query TEXT, location TEXT,"
+            " status TEXT NOT NULL DEFAULT 'pending', worker TEXT, token TEXT, lease_expires REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, rows INTEGER, error TEXT,"
+            " UNIQUE (source, query, location))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_expires)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (shard INTEGER, row TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._lock = threading.Lock()
+
+    def plan(self, sources, queries, locations, settings):
+        # Adds the source x query x location matrix; existing shards (and
+        # their results) are kept, so planning again only adds new ones.
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO shards (source, query, location) VALUES (?, ?, ?)",
+                [(source, query, location) for source in sources for query in queries for location in locations],
+            )
+            added = self.db.total_changes - before
+            self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('settings', ?)", (json.dumps(settings),))
+            self.db.execute("COMMIT")
+        return added
+
+    def settings(self):
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'settings'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _expire(self, now, max_attempts):
+        # Expired leases go back to pending, or to failed once they have used
+        # max_attempts: a shard that crashes or hangs its worker every time
+        # must not be leased forever. Returns {shard id: previous worker} for
+        # the shards re-queued.
+        expired = self.db.execute(
+            "SELECT id, worker, attempts FROM shards WHERE status = 'leased' AND lease_expires < ?", (now,)
+        ).fetchall()
+        self.db.execute(
+            "UPDATE shards SET status = 'failed', worker = NULL, token = NULL,"
+            " error = 'lease expired ' || attempts || ' times'"
+            " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, max_attempts),
+        )
+        self.db.execute(
+            "UPDATE shards SET status = 'pending', worker = NULL, token = NULL"
+            " WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        )
+        return {shard_id: worker for shard_id, worker, attempts in expired if attempts < max_attempts}
+
+    def requeue_expired(self, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            requeued = self._expire(time.time(), max_attempts)
+            self.db.execute("COMMIT")
+        return len(requeued)
+
+    def claim(self, worker, lease, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        # The next pending shard (after expired leases are re-queued), leased
+        # to worker, or None.
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            requeued = self._expire(now, max_attempts)
+            row = self.db.execute(
+                "SELECT id, source, query, location FROM shards"
+                " WHERE status = 'pending' ORDER BY attempts, id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.db.execute(
+                    "UPDATE shards SET status = 'leased', worker = ?, token = ?, lease_expires = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (worker, token, now + lease, row[0]),
+                )
+            self.db.execute("COMMIT")
+        if row is None:
+            return None
+        shard_id, source, query, location = row
+        if shard_id in requeued:
+            print(
+                f"[cluster] shard {shard_id} lease of {requeued[shard_id]} expired; re-queued to {worker}", flush=True
+            )
+        return {"id": shard_id, "source": source, "query": query, "location": location, "token": token}
+
+    def renew(self, shard, lease):
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE shards SET lease_expires = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                (time.time() + lease, shard["id"], shard["token"]),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard, rows):
+        # Stores the shard's rows and marks it done, unless the lease was lost
+        # meanwhile (then another worker owns the shard). Returns True if kept.
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            owned = self.db.execute(
+                "SELECT 1 FROM shards WHERE id = ? AND token = ? AND status = 'leased'", (shard["id"], shard["token"])
+            ).fetchone()
+            if owned:
+                self.db.executemany(
+                    "INSERT INTO results (shard, row) VALUES (?, ?)", [(shard["id"], json.dumps(row)) for row in rows]
+                )
+                self.db.execute(
+                    "UPDATE shards SET status = 'done', rows = ?, token = NULL, error = NULL WHERE id = ?",
+                    (len(rows), shard["id"]),
+                )
+            self.db.execute("COMMIT")
+        return bool(owned)
+
+    def fail(self, shard, error, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        # Back to pending for another try, or failed for good after max_attempts.
+        with self._lock:
+            self.db.execute(
+                "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " token = NULL, error = ? WHERE id = ? AND token = ?",
+                (max_attempts, str(error)[:500], shard["id"], shard["token"]),
+            )
+
+    def counts(self):
+        with self._lock:
+            rows = self.db.execute("SELECT status, COUNT(*), COALESCE(SUM(rows), 0) FROM shards GROUP BY status")
+            return {status: (count, total) for status, count, total in rows}
+
+    def open_shards(self):
+        # Shards that may still produce results: pending or leased.
+        counts = self.counts()
+        return sum(counts.get(status, (0, 0))[0] for status in ("pending", "leased"))
+
+    def iter_results(self):
+        for (row,) in self.db.execute("SELECT row FROM results ORDER BY shard, rowid"):
+            yield json.loads(row)
+
+    def status_lines(self):
+        counts = self.counts()
+        lines = [
+            "[cluster] " + " ".join(f"{status}={count}" for status, (count, _) in sorted(counts.items()))
+            + f" rows={sum(total for _, total in counts.values())}"
+        ]
+        with self._lock:
+            failed = self.db.execute(
+                "SELECT source, query, location, attempts, error FROM shards WHERE status = 'failed'"
+            ).fetchall()
+            leased = self.db.execute(
+                "SELECT source, location, worker, lease_expires FROM shards WHERE status = 'leased'"
+            ).fetchall()
+        for source, location, worker, expires in leased:
+            lines.append(f"[cluster] leased {source}/{location} to {worker} ({expires - time.time():.0f}s left)")
+        for source, query, location, attempts, error in failed:
+            lines.append(f"[cluster] failed {source}/{query}/{location} after {attempts} attempts: {error}")
+        return lines
+
+    def close(self):
+        self.db.close()
+
+
+class ShardWriter:
+    # csv.writer stand-in collecting a shard's rows, normalised for the merge.
+    def __init__(self, to_row):
+        self.to_row = to_row
+        self.rows = []
+
+    def writerow(self, row):
+        self.rows.append(self.to_row(row))
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def scrape_shard(shard, settings, get_page):
+    # Runs the ordinary scraper for one source/query/location; returns its
+    # rows as merge_jobs normalised rows.
+    from browser_daemon import new_tab
+    import google_s
+    import job_boards
+    import merge_jobs
+
+    common = ["--query", shard["query"], "--location", shard["location"], "--origin", settings.get("origin", "")]
+    if settings.get("lean"):
+        common.append("--lean")
+    if shard["source"] == "google":
+        # With the adaptive rate a block page is detected and retried. Not
+        # run_google: a location still blocked after that must fail the shard
+        # (so it is retried) instead of storing it as done with no rows.
+        args = google_s.parse_args(
+            [*common, "--max-jobs", str(settings.get("max_jobs", 0)), "--adaptive-rate", "--rate-log", ""]
+        )
+        writer = ShardWriter(merge_jobs.google_row)
+        run = google_s.open_run(args)
+        try:
+            for row in google_s.iter_rows(args, get_page(), run):
+                writer.writerow(row)
+        finally:
+            google_s.close_run(run)
+        if run["rate"].gave_up:
+            raise run["rate"].gave_up[0]
+    else:
+        args = job_boards.parse_args([
+            *common,
+            "--boards", shard["source"],
+            "--max-pages", str(settings.get("max_pages", 1)),
+            "--engine", settings.get("engine", "browser"),
+        ])
+        writer = ShardWriter(merge_jobs.board_row)
+        job_boards.run_boards(args, writer, get_page, lambda: new_tab(get_page()))
+    return writer.rows
+
+
+def run_worker(args):
+    # Claims shards until none are left, renewing each lease while it
+    # scrapes. The browser is started on first use and kept across shards.
+    from browser_daemon import open_page
+
+    queue = ShardQueue(args.queue)
+    settings = queue.settings()
+    browser = {}
+
+    def get_page():
+        if "page" not in browser:
+            browser["page"] = open_page(args.browser_address, settings.get("lean", False), isolated=True)
+        return browser["page"]
+
+    done = 0
+    try:
+        while True:
+            shard = queue.claim(args.id, args.lease, args.max_attempts)
+            if shard is None:
+                if not queue.open_shards():
+                    break
+                # Others hold the rest; wait in case one of their leases expires.
+                time.sleep(POLL_INTERVAL)
+                continue
+            label = f"{shard['source']}/{shard['query']}/{shard['location']}"
+            print(f"[worker {args.id}] shard {shard['id']} {label}", flush=True)
+            stop = threading.Event()
+
+            def heartbeat(shard=shard):
+                while not stop.wait(args.lease / 3):
+                    if not queue.renew(shard, args.lease):
+                        print(f"[worker {args.id}] lost the lease on shard {shard['id']}", flush=True)
+                        return
+
+            beat = threading.Thread(target=heartbeat, daemon=True)
+            beat.start()
+            started = time.perf_counter()
+            try:
+                rows = scrape_shard(shard, settings, get_page)
+            except Exception as e:
+                stop.set()
+                queue.fail(shard, e, args.max_attempts)
+                print(f"[worker {args.id}] shard {shard['id']} failed: {e}", flush=True)
+                continue
+            stop.set()
+            kept = queue.complete(shard, rows)
+            print(
+                f"[worker {args.id}] shard {shard['id']} rows={len(rows)} wall={time.perf_counter() - started:.1f}s"
+                + ("" if kept else " (discarded: lease lost)"),
+                flush=True,
+            )
+            done += kept
+    finally:
+        if "page" in browser:
+            browser["page"].close()
+        queue.close()
+    print(f"[worker {args.id}] finished {done} shards", flush=True)
+
+
+def merge_results(queue, out):
+    import merge_jobs
+
+    merge_args = merge_jobs.parse_args(["--out", out])
+    return merge_jobs.merge_rows(queue.iter_results(), merge_args)
+
+
+def plan_from_args(queue, args):
+    import job_boards
+
+    sources = [s.strip().lower() for s in args.sources.split(",") if s.strip()]
+    known = {"google"} | {board["name"] for board in job_boards.BOARDS}
+    unknown = [s for s in sources if s not in known]
+    if unknown:
+        raise SystemExit(f"Unknown sources: {', '.join(unknown)} (known: {', '.join(sorted(known))})")
+    queries = [q.strip() for q in args.query.split(";") if q.strip()]
+    locations = [loc.strip() for loc in args.location.split(",") if loc.strip()]
+    settings = {
+        "max_jobs": args.max_jobs,
+        "max_pages": args.max_pages,
+        "engine": args.engine,
+        "origin": args.origin,
+        "lean": args.lean,
+    }
+    added = queue.plan(sources, queries, locations, settings)
+    print(f"[cluster] planned {added} new shards ({len(sources)} sources x {len(queries)} queries x "
+          f"{len(locations)} locations) in {queue.path}", flush=True)
+
+
+def coordinate(queue, args, workers=()):
+    # Re-queues expired leases and reports progress until no shard is open
+    # (and any local workers have exited), then merges everything.
+    last = None
+    while queue.open_shards() or any(w.poll() is None for w in workers):
+        requeued = queue.requeue_expired(args.max_attempts)
+        if requeued:
+            print(f"[cluster] re-queued {requeued} expired leases", flush=True)
+        lines = queue.status_lines()
+        if lines[0] != last:
+            print(lines[0], flush=True)
+            last = lines[0]
+        if workers and all(w.poll() is not None for w in workers):
+            print("[cluster] all local workers exited with shards still open", flush=True)
+            break
+        time.sleep(POLL_INTERVAL)
+    for line in queue.status_lines():
+        print(line, flush=True)
+    merge_results(queue, args.out)
+
+
+def run_local(args):
+    # The whole cluster on one box: plan, N worker processes (each in its own
+    # directory, with its own browser), coordinate, merge.
+    queue = ShardQueue(args.queue)
+    plan_from_args(queue, args)
+    queue_path = os.path.abspath(args.queue)
+    workers = []
+    for n in range(max(args.workers, 1)):
+        workdir = os.path.join(args.workdir, f"worker-{n + 1}")
+        os.makedirs(workdir, exist_ok=True)
+        command = [
+            sys.executable, os.path.abspath(__file__), "worker",
+            "--queue", queue_path, "--id", f"{platform.node()}-{n + 1}",
+            "--lease", str(args.lease), "--max-attempts", str(args.max_attempts),
+            "--browser-address", "",
+        ]
+        workers.append(subprocess.Popen(command, cwd=workdir))
+    try:
+        coordinate(queue, args, workers)
+    finally:
+        for worker in workers:
+            worker.wait()
+        queue.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shard scraping across worker processes and hosts.")
+    parser.add_argument("command", choices=["plan", "worker", "coordinate", "status", "merge", "local"])
+    parser.add_argument("--queue", default=DEFAULT_QUEUE, help="Shared shard store (SQLite file).")
+    parser.add_argument("--query", default="php developer", help="Job title or keywords; separate several with ';'.")
+    parser.add_argument(
+        "--location",
+        default="london,birmingham,coventry,manchester",
+        help="Comma-separated job locations.",
+    )
+    parser.add_argument("--sources", default="google,indeed,reed", help="Comma-separated sources to shard.")
+    parser.add_argument("--max-jobs", type=int, default=0, help="Max Google jobs per shard (0 = no limit).")
+    parser.add_argument("--max-pages", type=int, default=1, help="Pages per board shard.")
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser", help="Engine for board shards.")
+    parser.add_argument("--origin", default="", help="Send every request to this origin (e.g. a fixture server).")
+    parser.add_argument("--lean", action="store_true", help="Workers run their browsers lean.")
+    parser.add_argument("--out", default="jobs_all.csv", help="Merged output of coordinate/merge/local.")
+    parser.add_argument("--id", default=f"worker-{os.getpid()}", help="Worker name, shown in leases.")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE, help="Lease length in seconds.")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Tries per shard.")
+    parser.add_argument("--browser-address", default="", help="Worker browser daemon (empty = launch its own).")
+    parser.add_argument("--workers", type=int, default=3, help="Local worker processes (local).")
+    parser.add_argument("--workdir", default="cluster_work", help="Parent of the local workers' directories.")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.command == "worker":
+        run_worker(args)
+        return
+    if args.command == "local":
+        run_local(args)
+        return
+    queue = ShardQueue(args.queue)
+    try:
+        if args.command == "plan":
+            plan_from_args(queue, args)
+        elif args.command == "coordinate":
+            coordinate(queue, args)
+        elif args.command == "merge":
+            merge_results(queue, args.out)
+        else:
+            for line in queue.status_lines():
+                print(line)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import csv
+import os
+from multiprocessing import Pool
+import re
+
+LOCATION_LABELS = ["Location", "Job location"]
+COMPANY_LABELS = ["Company", "Employer"]
+SALARY_LABELS = ["Salary", "Compensation", "Pay"]
+
+# Shared pieces of the salary patterns.
+CURRENCY = r"(?:\$|£|€|USD|GBP|EUR)"
+# Same language as (?:\d{1,3}(?:,\d{3})+|\d+) but starting with a plain \d so
+# the regex engine can skip ahead to the next digit.
+AMOUNT = r"\d(?:\d{0,2}(?:,\d{3})+|\d*)(?:\.\d+)?(?:\s?[kK])?"
+RANGE_SEP = r"(?:\s?[-–to]+\s?)"
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class DescriptionExtractor:
+    # Compiles the label and heuristic patterns once. Labels are collected in a
+    # single multiline pass; the heuristics only run for fields no label filled
+    # and are anchored on a literal so re can jump between candidates.
+
+    def __init__(self, location_labels=None, company_labels=None, salary_labels=None):
+        self.location_labels = [l.lower() for l in (location_labels or LOCATION_LABELS)]
+        self.company_labels = [l.lower() for l in (company_labels or COMPANY_LABELS)]
+        self.salary_labels = [l.lower() for l in (salary_labels or SALARY_LABELS)]
+        labels = self.location_labels + self.company_labels + self.salary_labels
+        # Longest first so "Job location" is not shadowed by a shorter label.
+        alternation = "|".join(re.escape(l) for l in sorted(set(labels), key=len, reverse=True))
+        self.label_re = re.compile(rf"(?:^|\r)\s*({alternation})\s*[:\-]\s*(.+)", re.IGNORECASE | re.MULTILINE)
+        self.currency_re = re.compile(rf"{CURRENCY}\s*{AMOUNT}(?:{RANGE_SEP}{CURRENCY}?\s*{AMOUNT})?")
+        self.range_re = re.compile(rf"{AMOUNT}\s*[-to]+\s*{AMOUNT}\b")
+        self.in_re = re.compile(r"in\s+([A-Z][A-Za-z0-9 ,.'-/]{2,60})")
+        self.remote_re = re.compile(r"remote\b", re.IGNORECASE)
+        self.hybrid_re = re.compile(r"hybrid\b", re.IGNORECASE)
+        self.background_re = re.compile(r"Company Background\s+([A-Z][A-Za-z0-9&' -]{2,60})")
+        self.about_re = re.compile(r"About\s+([A-Z][A-Za-z0-9&' -]{2,60})\b")
+
+    def _search_word(self, pattern, text):
+        # pattern.search with a leading \b checked by hand, which keeps the
+        # literal prefix that makes the search fast.
+        pos = 0
+        while True:
+            match = pattern.search(text, pos)
+            if not match:
+                return None
+            start = match.start()
+            if start == 0 or not _is_word_char(text[start - 1]):
+                return match
+            pos = start + 1
+
+    def labeled_values(self, text):
+        # First non-empty value per label, keyed by lowercase label.
+        # Resume right after each label: a value can run onto the next line
+        # and must not hide a label that starts there.
+        values = {}
+        pos = 0
+        while True:
+            match = self.label_re.search(text, pos)
+            if not match:
+                return values
+            label = match.group(1).lower()
+            if label not in values:
+                values[label] = match.group(2).strip()
+            pos = match.end(1)
+
+    @staticmethod
+    def _pick(values, labels):
+        for label in labels:
+            if values.get(label):
+                return values[label]
+        return ""
+
+    def salary(self, text, values=None):
+        if not text:
+            return ""
+        values = self.labeled_values(text) if values is None else values
+        labeled = self._pick(values, self.salary_labels)
+        if labeled:
+            return labeled
+        match = self.currency_re.search(text)
+        if match:
+            return match.group(0).strip()
+        match = self._search_word(self.range_re, text)
+        return match.group(0).strip() if match else ""
+
+    def location(self, text, values=None):
+        if not text:
+            return ""
+        values = self.labeled_values(text) if values is None else values
+        labeled = self._pick(values, self.location_labels)
+        if labeled:
+            return labeled
+        # "in London" / "based in London" capture the same place name.
+        match = self._search_word(self.in_re, text)
+        if match:
+            return match.group(1).strip()
+        if self._search_word(self.remote_re, text):
+            if self._search_word(self.hybrid_re, text):
+                return "Hybrid"
+            return "Remote"
+        return ""
+
+    def company(self, text, values=None):
+        if not text:
+            return ""
+        values = self.labeled_values(text) if values is None else values
+        labeled = self._pick(values, self.company_labels)
+        if labeled:
+            return labeled
+        match = self._search_word(self.background_re, text)
+        if match:
+            return match.group(1).strip()
+        match = self._search_word(self.about_re, text)
+        if match:
+            return match.group(1).strip()
+        return ""
+
+    def extract(self, text):
+        if not text:
+            return {"company": "", "location": "", "salary": ""}
+        values = self.labeled_values(text)
+        return {
+            "company": self.company(text, values),
+            "location": self.location(text, values),
+            "salary": self.salary(text, values),
+        }
+
+    def extract_many(self, texts, processes=0, chunksize=500):
+        # processes <= 1 parses in this process; otherwise the texts are split
+        # into chunks across a pool, each worker with its own extractor built
+        # from this one's labels.
+        texts = list(texts)
+        if processes <= 1 or len(texts) <= chunksize:
+            return [self.extract(text) for text in texts]
+        chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+        labels = (self.location_labels, self.company_labels, self.salary_labels)
+        with Pool(processes, initializer=_init_worker, initargs=(labels,)) as pool:
+            results = pool.map(_extract_chunk, chunks)
+        return [fields for chunk in results for fields in chunk]
+
+
+_DEFAULT = None
+_WORKER = None
+
+
+def default_extractor():
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = DescriptionExtractor()
+    return _DEFAULT
+
+
+def _init_worker(labels):
+    global _WORKER
+    _WORKER = DescriptionExtractor(*labels)
+
+
+def _extract_chunk(texts):
+    return [_WORKER.extract(text) for text in texts]
+
+
+def reparse_csv(in_path, out_path, processes=0):
+    # Re-run the heuristics over a saved google_jobs.csv, refreshing the
+    # Company/Location/Salary columns from Description Full.
+    with open(in_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "Description Full" not in header:
+            raise SystemExit(f"{in_path} has no 'Description Full' column")
+        rows = list(reader)
+    i_desc = header.index("Description Full")
+    if "Salary" not in header:
+        header.append("Salary")
+    columns = {name: header.index(name) for name in ("Company", "Location", "Salary") if name in header}
+
+    texts = [row[i_desc] if len(row) > i_desc else "" for row in rows]
+    parsed = default_extractor().extract_many(texts, processes=processes)
+    with open(out_path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row, fields in zip(rows, parsed):
+            row = row + [""] * (len(header) - len(row))
+            for name, index in columns.items():
+                value = fields[name.lower()]
+                if value or name == "Salary":
+                    row[index] = value
+            writer.writerow(row)
+    print(f"Re-parsed {len(rows)} descriptions -> {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse Company/Location/Salary from saved descriptions.")
+    parser.add_argument("input", help="CSV with a 'Description Full' column (e.g. google_jobs.csv).")
+    parser.add_argument("--out", default="", help="Output CSV (default: <input>_reparsed.csv).")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for parsing (1 = in-process).",
+    )
+    args = parser.parse_args()
+    out = args.out or f"{os.path.splitext(args.input)[0]}_reparsed.csv"
+    reparse_csv(args.input, out, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_FIXTURE_DIR = "fixtures"
+DEFAULT_PORT = 8765
+# What a recording keeps: pages and the data requests they make. Scripts,
+# styles and images are left to 404 on replay.
+RECORD_TYPES = ["Document", "XHR", "Fetch"]
+TEXT_TYPES = ("text/", "application/json", "application/javascript", "application/x-javascript")
+SKIP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "set-cookie"}
+QUIET_SECONDS = 3.0
+# What --block-rate serves instead of a page: a 429 with the markers of a
+# CAPTCHA interstitial, like a rate-limited search.
+BLOCK_PAGE = (
+    b"<html><body><h1>Our systems have detected unusual traffic from your computer network.</h1>"
+    b'<div class="g-recaptcha" data-sitekey="fixture"></div></body></html>'
+)
+# Per-session tokens Google adds to its URLs; ignored when matching a replayed
+# request to a recorded one.
+VOLATILE_PARAMS = {
+    "ei", "ved", "sei", "sxsrf", "usg", "opi", "biw", "bih", "dpr", "vet", "sa", "sca_esv", "gs_lp", "oq",
+}
+
+
+def path_key(url):
+    parts = urlsplit(url)
+    return parts.path or "/", parts.query
+
+
+def stable_params(query):
+    return sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+
+
+class FixtureSet:
+    # A recorded session on disk: manifest.json (what was run, the expected
+    # row counts, and every response's method, URL, status and headers) plus
+    # content-addressed bodies under bodies/.
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = os.path.join(path, "manifest.json")
+        self.manifest = {"responses": [], "expected": {}}
+        self._bodies = {}
+        self._by_path = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            for entry in self.manifest["responses"]:
+                path, _ = path_key(entry["url"])
+                self._by_path.setdefault((entry["method"], path), []).append(entry)
+
+    @property
+    def hosts(self):
+        return sorted({urlsplit(entry["url"]).netloc for entry in self.manifest["responses"]})
+
+    def add(self, method, url, status, headers, body, resource_type):
+        digest = hashlib.sha256(body).hexdigest()
+        os.makedirs(os.path.join(self.path, "bodies"), exist_ok=True)
+        body_path = os.path.join(self.path, "bodies", digest)
+        if not os.path.exists(body_path):
+            with open(body_path, "wb") as f:
+                f.write(body)
+        entry = {
+            "method": method,
+            "url": url,
+            "status": status,
+            "headers": {k.lower(): v for k, v in headers.items() if k.lower() not in SKIP_HEADERS},
+            "body": digest,
+            "type": resource_type,
+        }
+        self.manifest["responses"].append(entry)
+        self._by_path.setdefault((method, path_key(url)[0]), []).append(entry)
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+
+    def body(self, entry):
+        digest = entry["body"]
+        if digest not in self._bodies:
+            with open(os.path.join(self.path, "bodies", digest), "rb") as f:
+                self._bodies[digest] = f.read()
+        return self._bodies[digest]
+
+    def lookup(self, method, url):
+        # Same path and query if recorded; otherwise the same path with the
+        # same query once session tokens are left out.
+        path, query = path_key(url)
+        entries = self._by_path.get((method, path), [])
+        for entry in entries:
+            if path_key(entry["url"])[1] == query:
+                return entry
+        wanted = stable_params(query)
+        for entry in entries:
+            if stable_params(path_key(entry["url"])[1]) == wanted:
+                return entry
+        return None
+
+
+def make_handler(fixtures, origin, delay, block_rate=0.0, block_for=0.0):
+    # Absolute links to the recorded hosts are rewritten to this server, so
+    # follow-up requests from the page land here too. With block_rate, a
+    # request arriving when more than block_rate requests came in the last
+    # second gets the block page, and so does everything for block_for
+    # seconds after that.
+    rewrites = [(f"https://{host}".encode(), origin.encode()) for host in fixtures.hosts]
+    rewrites += [(f"http://{host}".encode(), origin.encode()) for host in fixtures.hosts]
+    recent = []
+    blocked_until = [0.0]
+    lock = threading.Lock()
+
+    def over_limit():
+        with lock:
+            now = time.monotonic()
+            recent[:] = [t for t in recent if now - t < 1.0]
+            recent.append(now)
+            if now < blocked_until[0]:
+                return True
+            if len(recent) > block_rate:
+                blocked_until[0] = now + block_for
+                return True
+            return False
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        stats = {"hits": 0, "misses": 0, "blocked": 0}
+
+        def _serve(self):
+            if block_rate and over_limit():
+                self.stats["blocked"] += 1
+                self.send_response(429)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(BLOCK_PAGE)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(BLOCK_PAGE)
+                return
+            entry = fixtures.lookup(self.command, self.path)
+            if delay:
+                time.sleep(delay)
+            if entry is None:
+                self.stats["misses"] += 1
+                self.send_error(404, "Not recorded")
+                return
+            self.stats["hits"] += 1
+            body = fixtures.body(entry)
+            if entry["headers"].get("content-type", "").startswith(TEXT_TYPES):
+                for old, new in rewrites:
+                    body = body.replace(old, new)
+            self.send_response(entry["status"])
+            for name, value in entry["headers"].items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_GET = do_POST = do_HEAD = _serve
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def start_server(path, host="127.0.0.1", port=0, delay=0.0, block_rate=0.0, block_for=0.0):
+    # Replay server on a background thread; port 0 picks a free one.
+    # Returns (server, origin); server.shutdown() stops it.
+    fixtures = FixtureSet(path)
+    if not fixtures.manifest["responses"]:
+        raise SystemExit(f"No recorded responses in {path}")
+    server = ThreadingHTTPServer((host, port), None)
+    origin = f"http://{host}:{server.server_address[1]}"
+    server.RequestHandlerClass = make_handler(fixtures, origin, delay, block_rate, block_for)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, origin
+
+
+def count_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def record(args):
+    # Runs the real scrapers in one browser tab while listening to its
+    # network traffic, then saves every page and data response with the rows
+    # each scraper produced (the counts a replay should reproduce).
+    from browser_daemon import open_page
+    import google_s
+    import job_boards
+
+    fixtures = FixtureSet(os.path.join(args.dir, args.name))
+    if fixtures.manifest["responses"]:
+        raise SystemExit(f"{fixtures.path} already holds a recording")
+    os.makedirs(fixtures.path, exist_ok=True)
+    page = open_page(args.browser_address)
+    page.listen.start(res_type=RECORD_TYPES)
+    common = ["--query", args.query, "--location", args.location, "--browser-address", args.browser_address]
+    scrapers = [s.strip() for s in args.scrapers.split(",") if s.strip()]
+    expected = {}
+    try:
+        if "google" in scrapers:
+            google_args = google_s.parse_args([*common, "--max-jobs", str(args.max_jobs), "--seen-index", ""])
+            out = os.path.join(fixtures.path, "google_jobs.csv")
+            with open(out, mode="w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(google_s.GOOGLE_HEADERS)
+                google_s.run_google(google_args, page, writer)
+            expected["google"] = count_rows(out)
+        if "boards" in scrapers:
+            boards_args = job_boards.parse_args([*common, "--max-pages", str(args.max_pages)])
+            out = os.path.join(fixtures.path, "jobs_indeed_reed.csv")
+            with open(out, mode="w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(job_boards.BOARD_HEADERS)
+                job_boards.run_boards(boards_args, writer, lambda: page, lambda: page)
+            expected["boards"] = count_rows(out)
+        for packet in page.listen.steps(timeout=QUIET_SECONDS):
+            response = packet.response
+            if response is None or response.raw_body is None:
+                continue
+            body = response.body
+            if not isinstance(body, bytes):
+                # Decoded text or parsed JSON; keep the bytes as sent.
+                body = response.raw_body.encode("utf-8")
+            fixtures.add(
+                packet.method, packet.url, response.status, dict(response.headers or {}), body, packet.resourceType
+            )
+    finally:
+        page.listen.stop()
+        page.close()
+
+    fixtures.manifest.update({
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "query": args.query,
+        "location": args.location,
+        "max_jobs": args.max_jobs,
+        "max_pages": args.max_pages,
+        "scrapers": scrapers,
+        "expected": expected,
+    })
+    fixtures.save()
+    print(
+        f"[fixtures] recorded {len(fixtures.manifest['responses'])} responses from {', '.join(fixtures.hosts)} "
+        f"expected={expected} -> {fixtures.path}",
+        flush=True,
+    )
+
+
+def serve(args):
+    server, origin = start_server(
+        os.path.join(args.dir, args.name), args.host, args.port, args.delay, args.block_rate, args.block_for
+    )
+    print(f"[fixtures] replaying {args.name} at {origin} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        stats = server.RequestHandlerClass.stats
+        print(f"[fixtures] hits={stats['hits']} misses={stats['misses']} blocked={stats['blocked']}", flush=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record scraper sessions as fixtures and replay them locally.")
+    parser.add_argument("command", choices=["record", "serve", "list"])
+    parser.add_argument("name", nargs="?", default="default", help="Fixture set name.")
+    parser.add_argument("--dir", default=DEFAULT_FIXTURE_DIR, help="Directory holding fixture sets.")
+    parser.add_argument("--query", default="php developer", help="Job title or keywords to record.")
+    parser.add_argument("--location", default="london", help="Comma-separated locations to record.")
+    parser.add_argument("--max-jobs", type=int, default=10, help="Google jobs per location to record.")
+    parser.add_argument("--max-pages", type=int, default=1, help="Board pages per location to record.")
+    parser.add_argument("--scrapers", default="google,boards", help="Which scrapers to record.")
+    parser.add_argument("--browser-address", default="", help="Browser daemon to record in (empty = launch).")
+    parser.add_argument("--host", default="127.0.0.1", help="Replay server host.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Replay server port.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to hold every replayed response.")
+    parser.add_argument(
+        "--block-rate",
+        type=float,
+        default=0.0,
+        help="Answer with a 429 CAPTCHA page when more than this many requests arrive in a second (0 = never).",
+    )
+    parser.add_argument("--block-for", type=float, default=5.0, help="Seconds to keep blocking once triggered.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "record":
+        record(args)
+    elif args.command == "serve":
+        serve(args)
+    else:
+        names = sorted(os.listdir(args.dir)) if os.path.isdir(args.dir) else []
+        for name in names:
+            manifest = FixtureSet(os.path.join(args.dir, name)).manifest
+            print(
+                f"{name}: responses={len(manifest['responses'])} expected={manifest.get('expected', {})} "
+                f"recorded_at={manifest.get('recorded_at', '-')}"
+            )
+
+
+if __name__ == "__main__":
+    main()
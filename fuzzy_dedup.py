@@ -0,0 +1,250 @@
+import hashlib
+import heapq
+import random
+import re
+import zlib
+from array import array
+
+DEFAULT_PERMS = 32
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_DESC_THRESHOLD = 0.5
+DESC_SKETCH_SIZE = 64
+DESC_SHINGLE = 3
+MERSENNE = (1 << 61) - 1
+COMPANY_WEIGHT = 3
+LOCATION_WEIGHT = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+TITLE_ABBREVIATIONS = {
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "jnr": "junior",
+    "dev": "developer",
+    "devs": "developer",
+    "eng": "engineer",
+    "engr": "engineer",
+    "mgr": "manager",
+    "mngr": "manager",
+    "asst": "assistant",
+    "assoc": "associate",
+    "js": "javascript",
+}
+COMPANY_NOISE = {"the", "ltd", "limited", "plc", "inc", "llc", "llp", "co", "corp", "corporation", "group", "uk"}
+LOCATION_NOISE = {"uk", "gb", "united", "kingdom", "england", "scotland", "wales", "great", "britain", "greater"}
+
+
+def tokens(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def title_tokens(title):
+    return [TITLE_ABBREVIATIONS.get(t, t) for t in tokens(title)]
+
+
+def company_tokens(company):
+    return [t for t in tokens(company) if t not in COMPANY_NOISE]
+
+
+def location_tokens(location):
+    # "London, UK" / "Greater London" / "London EC1A" -> ["london"]
+    first = (location or "").split(",", 1)[0]
+    return [t for t in tokens(first) if t not in LOCATION_NOISE and not any(c.isdigit() for c in t)]
+
+
+def header_shingles(title, company, location):
+    # Title words and word pairs, company and location words, tagged by field
+    # so "london" the place never matches "london" in a company name. Company
+    # and location words are repeated under several tags: the same title at
+    # another employer or in another city is a different job, so those fields
+    # must weigh more than a single title word.
+    words = title_tokens(title)
+    shingles = {f"t:{w}" for w in words}
+    shingles.update(f"t:{a}_{b}" for a, b in zip(words, words[1:]))
+    for copy in range(COMPANY_WEIGHT):
+        shingles.update(f"c{copy}:{w}" for w in company_tokens(company))
+    for copy in range(LOCATION_WEIGHT):
+        shingles.update(f"l{copy}:{w}" for w in location_tokens(location))
+    return shingles
+
+
+def shingle_hash(shingle):
+    return zlib.crc32(shingle.encode("utf-8"))
+
+
+def description_sketch(description, size=DESC_SKETCH_SIZE):
+    # Bottom-k MinHash of word 3-grams: one hash per shingle, keep the k
+    # smallest. Cheap for long texts, and comparable with sketch_similarity.
+    words = tokens(description)
+    if len(words) < DESC_SHINGLE:
+        return []
+    hashes = {
+        shingle_hash(" ".join(words[i:i + DESC_SHINGLE])) for i in range(len(words) - DESC_SHINGLE + 1)
+    }
+    return sorted(heapq.nsmallest(size, hashes))
+
+
+def sketch_similarity(a, b, size=DESC_SKETCH_SIZE):
+    if not a or not b:
+        return None
+    union = heapq.nsmallest(size, set(a) | set(b))
+    both = set(a) & set(b)
+    return sum(1 for h in union if h in both) / len(union)
+
+
+def lsh_params(threshold, perms):
+    # Bands x rows with bands * rows == perms whose S-curve midpoint
+    # (1/bands) ** (1/rows) is the highest one not above the threshold:
+    # candidates err on the side of recall and are verified afterwards.
+    best = (perms, 1)
+    for rows in range(1, perms + 1):
+        if perms % rows:
+            continue
+        bands = perms // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    def __init__(self, perms=DEFAULT_PERMS, seed=1):
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, MERSENNE), rng.randrange(0, MERSENNE)) for _ in range(perms)]
+
+    def signature(self, shingles):
+        hashes = [shingle_hash(s) for s in shingles]
+        if not hashes:
+            return None
+        return array("Q", [min((a * x + b) % MERSENNE for x in hashes) for a, b in self.perms])
+
+
+def signature_similarity(a, b):
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class FuzzyIndex:
+    # Online near-duplicate clustering. Each row's header signature is split
+    # into LSH bands; a row sharing a band with an existing cluster's first
+    # row (its representative) is verified against it, on the header
+    # signature and, when both have one, the description sketch. Verified rows
+    # join that cluster; everything else starts a new one. Each row costs at
+    # most one lookup and one comparison per band, so the whole stage is
+    # near-linear instead of pairwise.
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, desc_threshold=DEFAULT_DESC_THRESHOLD, perms=DEFAULT_PERMS):
+        self.threshold = threshold
+        self.desc_threshold = desc_threshold
+        self.hasher = MinHasher(perms)
+        self.bands, self.rows_per_band = lsh_params(threshold, perms)
+        self.clusters = 0
+        self.matched = 0
+        self._buckets = {}
+        self._reps = {}
+
+    # Storage; overridden by the persistent index used for incremental merges.
+    def _bucket_get(self, band_key):
+        return self._buckets.get(band_key)
+
+    def _bucket_put(self, band_key, cluster_id):
+        self._buckets.setdefault(band_key, cluster_id)
+
+    def _rep_get(self, cluster_id):
+        return self._reps[cluster_id]
+
+    def _rep_put(self, cluster_id, signature, sketch):
+        self._reps[cluster_id] = (signature, sketch)
+
+    def _new_cluster_id(self):
+        self.clusters += 1
+        return self.clusters
+
+    def band_keys(self, signature):
+        r = self.rows_per_band
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * r:(band + 1) * r].tobytes(), digest_size=8).digest()
+            yield band, int.from_bytes(digest, "big", signed=True)
+
+    def is_match(self, signature, sketch, cluster_id):
+        rep_signature, rep_sketch = self._rep_get(cluster_id)
+        if signature_similarity(signature, rep_signature) < self.threshold:
+            return False
+        desc_similarity = sketch_similarity(sketch, rep_sketch)
+        return desc_similarity is None or desc_similarity >= self.desc_threshold
+
+    def assign(self, title, company, location, description=""):
+        # Returns (cluster_id, is_new_cluster).
+        signature = self.hasher.signature(header_shingles(title, company, location))
+        sketch = description_sketch(description)
+        if signature is None:
+            return self._new_cluster_id(), True
+        keys = list(self.band_keys(signature))
+        cluster_id = None
+        tried = set()
+        for key in keys:
+            candidate = self._bucket_get(key)
+            if candidate is None or candidate in tried:
+                continue
+            tried.add(candidate)
+            if self.is_match(signature, sketch, candidate):
+                cluster_id = candidate
+                break
+        is_new = cluster_id is None
+        if is_new:
+            cluster_id = self._new_cluster_id()
+            self._rep_put(cluster_id, signature, sketch)
+        else:
+            self.matched += 1
+        # Members register their bands too, so later variants that drifted
+        # further from the representative can still find the cluster.
+        for key in keys:
+            self._bucket_put(key, cluster_id)
+        return cluster_id, is_new
+
+
+class SqliteFuzzyIndex(FuzzyIndex):
+    # FuzzyIndex whose buckets and representatives live in a SQLite database,
+    # so incremental merges keep cluster IDs stable across runs.
+
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self._db = db
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets (band INTEGER, bucket INTEGER, cluster INTEGER,"
+            " PRIMARY KEY (band, bucket)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS lsh_reps (cluster INTEGER PRIMARY KEY, sig BLOB, sketch BLOB)")
+        row = self._db.execute("SELECT COALESCE(MAX(cluster), 0) FROM lsh_reps").fetchone()
+        self._next_id = row[0]
+
+    def reset(self):
+        self._db.execute("DELETE FROM lsh_buckets")
+        self._db.execute("DELETE FROM lsh_reps")
+        self._next_id = 0
+
+    def _new_cluster_id(self):
+        self.clusters += 1
+        self._next_id += 1
+        return self._next_id
+
+    def _bucket_get(self, band_key):
+        row = self._db.execute(
+            "SELECT cluster FROM lsh_buckets WHERE band = ? AND bucket = ?", band_key
+        ).fetchone()
+        return row[0] if row else None
+
+    def _bucket_put(self, band_key, cluster_id):
+        self._db.execute(
+            "INSERT OR IGNORE INTO lsh_buckets (band, bucket, cluster) VALUES (?, ?, ?)", (*band_key, cluster_id)
+        )
+
+    def _rep_get(self, cluster_id):
+        sig, sketch = self._db.execute(
+            "SELECT sig, sketch FROM lsh_reps WHERE cluster = ?", (cluster_id,)
+        ).fetchone()
+        return array("Q", sig), list(array("Q", sketch))
+
+    def _rep_put(self, cluster_id, signature, sketch):
+        self._db.execute(
+            "INSERT OR REPLACE INTO lsh_reps (cluster, sig, sketch) VALUES (?, ?, ?)",
+            (cluster_id, signature.tobytes(), array("Q", sketch).tobytes()),
+        )
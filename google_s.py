@@ -1,12 +1,56 @@
-from DrissionPage import ChromiumPage
 import argparse
 import csv
+import json
+import queue
+import threading
 import time
-import re
-from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urlsplit
+
+from browser_daemon import TimedWriter, add_browser_args, new_tab, open_page, print_first_card
+from bulk_extract import extract_cards
+from description_parser import default_extractor
+from harvest import DEFAULT_BUDGET, DEFAULT_IDLE_BATCHES, CardHarvester
+from http_fetch import rebase_url, static_page
+from job_record import JobRecord, SinkWriter, add_sink_args, join_locations, open_sink, scraper_args
+from job_store import JobStore, StoreWriter, add_store_args, today
+import profiling
+from rate_control import DEFAULT_START_INTERVAL, Blocked, add_rate_args, rate_from_args
+from response_cache import add_cache_args, cache_from_args, card_key
+from seen_jobs import DEFAULT_MAX_AGE_DAYS, DEFAULT_SEEN_INDEX, SeenJobs
+import selector_stats
+from waits import LatencyBudget, WaitStats, panel_text, wait_for_stable_count, wait_for_text_change
+from work_queue import add_checkpoint_args, queue_from_args, unit_key
 
 DEFAULT_QUERY = "php developer"
 DEFAULT_LOCATIONS = ["london", "birmingham", "coventry", "manchester"]
+DEFAULT_CHECKPOINT = "google_checkpoint.db"
+
+CARD_SELECTOR = "xpath://div[contains(@class,'GoEOPd')]"
+PANEL_SELECTORS = ["#jobDescriptionText", ".K7O2sd", ".HBvzbc", ".GYM22b"]
+CARD_FIELDS = {
+    "title": ["xpath:./div", "xpath:.//div"],
+    "company": ["xpath:.//*[contains(@class,'waQ7qe')]"],
+    "location": ["xpath:.//*[contains(@class,'mLdNec')]"],
+    "posted_time": ["xpath:.//*[contains(@class,'RcZtZb')]"],
+    "link": ["xpath:.//a[@href]"],
+}
+DETAIL_FIELDS = {
+    "click_target": ["xpath:.//*[contains(@class,'tNxQIb')]"],
+    "desc_snippet": [".HBvzbc", ".K7O2sd", ".GYM22b"],
+    "desc_full": ["#jobDescriptionText", ".K7O2sd", ".HBvzbc"],
+}
+# Fields whose selectors are interchangeable alternatives for one element, so
+# selector learning may reorder them. The desc_* lists are in priority order
+# (.K7O2sd also matches the snippet) and are always tried as written.
+LEARNED_FIELDS = {*CARD_FIELDS, "click_target"}
+
+# Per-step timeouts and the per-job latency budget (seconds).
+WAIT_DEFAULTS = {
+    "page_timeout": 10.0,
+    "step_timeout": 2.0,
+    "job_budget": 6.0,
+}
 
 
 def clean_text(value):
@@ -23,15 +67,10 @@ def safe_href(ele):
     return ele.attr("href") if ele else ""
 
 
-def first_ele(parent, selectors, timeout=0.5):
-    for sel in selectors:
-        try:
-            ele = parent.ele(sel, timeout=timeout)
-        except Exception:
-            ele = None
-        if ele:
-            return ele
-    return None
+def first_ele(parent, selectors, timeout=0.5, field=""):
+    return selector_stats.first_ele(
+        parent, selectors, "google", field or selectors[0], timeout, learn=field in LEARNED_FIELDS
+    )
 
 
 def click_first(page, selectors, timeout=0.5):
@@ -99,80 +138,12 @@ def find_description_by_heading(page, headings, timeout=0.5):
     return ""
 
 
-def extract_labeled_value(text, labels):
-    if not text:
-        return ""
-    for label in labels:
-        pattern = rf"(?:^|\n|\r)\s*{re.escape(label)}\s*[:\-]\s*(.+)"
-        match = re.search(pattern, text, flags=re.IGNORECASE)
-        if match:
-            value = match.group(1).strip()
-            # stop at next labeled line if present
-            value = re.split(r"\n\s*[A-Za-z][A-Za-z /]{1,30}\s*[:\-]\s*", value)[0].strip()
-            if value:
-                return value
-    return ""
-
-
-def extract_salary(text):
-    if not text:
-        return ""
-    # Common patterns: "$120,000", "£50k", "USD 80,000", "€70,000 - €90,000"
-    currency = r"(?:\$|£|€|USD|GBP|EUR)"
-    amount = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:\s?[kK])?"
-    range_sep = r"(?:\s?[-–to]+\s?)"
-    pattern = rf"{currency}\s*{amount}(?:{range_sep}{currency}?\s*{amount})?"
-    match = re.search(pattern, text)
-    if match:
-        return match.group(0).strip()
-    # Fallback: ranges without currency, e.g., "70,000 - 85,000" or "70k-85k"
-    range_no_currency = rf"\b{amount}\s*[-to]+\s*{amount}\b"
-    match = re.search(range_no_currency, text)
-    return match.group(0).strip() if match else ""
-
-
-def extract_location(text):
-    if not text:
-        return ""
-    # Prefer explicit labels
-    labeled = extract_labeled_value(text, ["Location", "Job location"])
-    if labeled:
-        return labeled
-    # Common phrasing: "in London", "in Manchester", "based in London"
-    match = re.search(r"\b(?:in|based in)\s+([A-Z][A-Za-z0-9 ,.'-/]{2,60})", text)
-    if match:
-        return match.group(1).strip()
-    # Remote/hybrid keywords
-    if re.search(r"\bremote\b", text, flags=re.IGNORECASE):
-        if re.search(r"\bhybrid\b", text, flags=re.IGNORECASE):
-            return "Hybrid"
-        return "Remote"
-    return ""
-
-
-def extract_company(text):
-    if not text:
-        return ""
-    labeled = extract_labeled_value(text, ["Company", "Employer"])
-    if labeled:
-        return labeled
-    # Heuristic: "Company Background <Name> ..."
-    match = re.search(r"\bCompany Background\s+([A-Z][A-Za-z0-9&' -]{2,60})", text)
-    if match:
-        return match.group(1).strip()
-    # Heuristic: "About <Name>" (only if looks like a proper noun)
-    match = re.search(r"\bAbout\s+([A-Z][A-Za-z0-9&' -]{2,60})\b", text)
-    if match:
-        return match.group(1).strip()
-    return ""
-
-
-def build_gjobs_url(query, location):
+def build_gjobs_url(query, location, origin=""):
     q = quote_plus(f"{query} jobs {location}".strip())
-    return f"https://www.google.com/search?q={q}&jbr=sep:0&udm=8"
+    return rebase_url(f"https://www.google.com/search?q={q}&jbr=sep:0&udm=8", origin)
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Scrape Google Jobs listings.")
     parser.add_argument("--query", default=DEFAULT_QUERY, help="Job title or keywords.")
     parser.add_argument(
@@ -186,98 +157,539 @@ def parse_args():
         default=0,
         help="Max jobs per location (0 = no limit).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Browser tabs to scrape with in parallel (1 = one location at a time).",
+    )
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        default=WAIT_DEFAULTS["page_timeout"],
+        help="Max seconds to wait for result cards after loading a search.",
+    )
+    parser.add_argument(
+        "--step-timeout",
+        type=float,
+        default=WAIT_DEFAULTS["step_timeout"],
+        help="Max seconds for each per-card wait (panel update, description expand).",
+    )
+    parser.add_argument(
+        "--job-budget",
+        type=float,
+        default=WAIT_DEFAULTS["job_budget"],
+        help="Max total seconds of waiting per job card (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--seen-index",
+        default=DEFAULT_SEEN_INDEX,
+        help="Jobs already scraped, with descriptions; known cards skip the click-and-expand step (empty = off).",
+    )
+    parser.add_argument(
+        "--seen-max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE_DAYS,
+        help="Days a stored description is reused before the card is expanded again (0 = forever).",
+    )
+    parser.add_argument(
+        "--refresh-seen",
+        action="store_true",
+        help="Expand every card again and update the seen index.",
+    )
+    parser.add_argument(
+        "--origin",
+        default="",
+        help="Send searches to this origin instead (e.g. http://127.0.0.1:8765 for fixtures.py serve).",
+    )
+    parser.add_argument(
+        "--harvest",
+        action="store_true",
+        help="Keep scrolling the results and process cards as each new batch loads, not just the first batch.",
+    )
+    parser.add_argument(
+        "--harvest-idle",
+        type=int,
+        default=DEFAULT_IDLE_BATCHES,
+        help="Stop harvesting a location after this many scrolls in a row bring no new cards.",
+    )
+    parser.add_argument(
+        "--harvest-budget",
+        type=float,
+        default=DEFAULT_BUDGET,
+        help="Max seconds to harvest one location (0 = no limit).",
+    )
+    add_rate_args(parser, "google_rate.json")
+    add_cache_args(parser)
+    add_store_args(parser)
+    add_sink_args(parser)
+    selector_stats.add_selector_args(parser)
+    add_browser_args(parser)
+    profiling.add_profile_args(parser, "profile_google")
+    add_checkpoint_args(parser, DEFAULT_CHECKPOINT)
+    return parser.parse_args(argv)
 
 
 def parse_locations(raw_value):
     return [loc.strip() for loc in raw_value.split(",") if loc.strip()]
 
 
-args = parse_args()
-locations = parse_locations(args.location)
-page = ChromiumPage()
-
-# Open a CSV file to write the data
-with open("google_jobs.csv", mode="w", newline="", encoding="utf-8") as file:
-    writer = csv.writer(file)
-    writer.writerow([
-        "Title",
-        "Company",
-        "Location",
-        "Posted Time",
-        "Job Link",
-        "Description Snippet",
-        "Description Full",
-        "Salary",
-    ])
-
-    for location in locations:
-        print(f"[google] location={location} url={build_gjobs_url(args.query, location)}", flush=True)
-        page.get(build_gjobs_url(args.query, location))
-        time.sleep(3)  # Wait for the page to load
-
-        job_cards = page.eles("xpath://div[contains(@class,'GoEOPd')]")
+def read_card(job):
+    return {
+        "title": safe_text(first_ele(job, CARD_FIELDS["title"], field="title")),
+        "company": safe_text(first_ele(job, CARD_FIELDS["company"], field="company")),
+        "location": safe_text(first_ele(job, CARD_FIELDS["location"], field="location")),
+        "posted_time": safe_text(first_ele(job, CARD_FIELDS["posted_time"], field="posted_time")),
+        "link": safe_href(first_ele(job, CARD_FIELDS["link"], field="link")),
+    }
+
+
+def store_record(row):
+    # google_jobs.csv row -> JobStore.add arguments.
+    title, company, location, posted_time, link, desc_snippet, desc_full, salary = row
+    return "google", title, company, location, posted_time, link, today(), salary, desc_snippet, desc_full
+
+
+def build_row(card, desc_snippet, desc_full):
+    # Parse Company/Location/Salary from Description Full
+    with profiling.span("parse_description", source="google"):
+        parsed = default_extractor().extract(desc_full)
+    return [
+        card["title"],
+        parsed["company"] or card["company"],
+        parsed["location"] or card["location"],
+        card["posted_time"],
+        card["link"],
+        desc_snippet,
+        desc_full,
+        parsed["salary"],
+    ]
+
+
+def expand_details(page, job, wait_config, stats=None):
+    # Click the card, expand its description and read the detail panel.
+    step_timeout = wait_config["step_timeout"]
+    budget = LatencyBudget(wait_config["job_budget"])
+    with profiling.span("card_click", source="google") as span:
+        previous_panel = panel_text(page, PANEL_SELECTORS)
+        click_target = first_ele(job, DETAIL_FIELDS["click_target"], field="click_target")
+        if click_target:
+            click_target.click()
+        else:
+            job.click()
+        panel = wait_for_text_change(
+            page, PANEL_SELECTORS, previous_panel, step_timeout,
+            name="panel", stats=stats, budget=budget, baseline=0.2,
+        )
+        span.ok = bool(panel)
+    # Expand the panel description using simple text selector
+    try:
+        with profiling.span("expand_description", source="google"):
+            page.ele("text:Show full description", timeout=budget.clamp(1)).click()
+            wait_for_text_change(
+                page, PANEL_SELECTORS, panel, step_timeout,
+                name="expand", stats=stats, budget=budget, baseline=0.2,
+            )
+    except Exception:
+        pass  # Button might not exist or already expanded
+    # Job details are usually in the right-side panel, not the card itself.
+    desc_snippet = safe_text(first_ele(page, DETAIL_FIELDS["desc_snippet"], field="desc_snippet"))
+    desc_full = safe_text(first_ele(page, DETAIL_FIELDS["desc_full"], field="desc_full"))
+    if not desc_full:
+        with profiling.span("heading_fallback", source="google") as span:
+            desc_full = find_description_by_heading(
+                page,
+                ["Job description", "Description", "Responsibilities", "About the job"],
+                timeout=0.5,
+            )
+            span.ok = bool(desc_full)
+    return desc_snippet, desc_full
+
+
+def cached_details(cache, card):
+    if cache is None:
+        return None
+    body = cache.get_text(card_key(card["title"], card["company"], card["location"], card["link"]), "google-card")
+    return json.loads(body) if body else None
+
+
+def store_details(cache, card, desc_snippet, desc_full):
+    if cache is None or not (desc_snippet or desc_full):
+        return
+    key = card_key(card["title"], card["company"], card["location"], card["link"])
+    cache.put(key, "google-card", json.dumps({"snippet": desc_snippet, "full": desc_full}))
+
+
+def known_details(cache, seen, card):
+    details = cached_details(cache, card)
+    if details is None and seen is not None:
+        details = seen.lookup(card)
+    return details
+
+
+def card_id(card):
+    return card_key(card["title"], card["company"], card["location"], card["link"])
+
+
+def replay_location(url, html, location, max_jobs, emit, cache, seen=None, done_cards=()):
+    # Rebuild rows from a cached results page and cached card details only.
+    page = static_page(url, html)
+    job_cards = page.eles(CARD_SELECTOR)
+    print(f"[google] location={location} cards={len(job_cards)} (replay)", flush=True)
+    job_count = 0
+    for job in job_cards:
+        if max_jobs and job_count >= max_jobs:
+            break
+        card = read_card(job)
+        key = card_id(card)
+        if key not in done_cards:
+            details = known_details(cache, seen, card) or {"snippet": "", "full": ""}
+            emit(build_row(card, details["snippet"], details["full"]), key)
+        job_count += 1
+    return job_count, 0
+
+
+def scrape_location(page, query, location, max_jobs, emit, wait_config=None, stats=None, cache=None, seen=None,
+                    origin="", done_cards=(), harvest=None, rate=None):
+    # emit(row, card_key) receives each finished row. Cards in done_cards
+    # were written by an earlier, interrupted run: they still count towards
+    # max_jobs but are neither expanded nor emitted again. With harvest
+    # ({"idle_batches", "budget"}) the list is scrolled and new cards are
+    # processed as each batch loads. With rate (a RateControl) the search is
+    # paced and a block page is retried, then skipped. Returns (jobs, failed
+    # cards).
+    wait_config = wait_config or WAIT_DEFAULTS
+    url = build_gjobs_url(query, location, origin)
+    print(f"[google] location={location} url={url}", flush=True)
+    if cache is not None and cache.replay_only:
+        html = cache.get_text(url, "google")
+        if html is None:
+            print(f"[cache] replay miss, skipping {url}", flush=True)
+            return 0, 0
+        return replay_location(url, html, location, max_jobs, emit, cache, seen, done_cards)
+
+    def discover():
+        with profiling.span("navigate", source="google"):
+            page.get(url)
+        harvester = None
+        card_records = None
+        with profiling.span("discover_cards", source="google") as span:
+            # Wait until the card list has rendered and stopped growing.
+            job_cards = wait_for_stable_count(
+                page, [CARD_SELECTOR], wait_config["page_timeout"], name="results", stats=stats, baseline=3.0
+            )
+            if harvest is not None and job_cards:
+                harvester = CardHarvester(page, [CARD_SELECTOR], CARD_FIELDS, {"link": "href"})
+                if not harvester.install():
+                    harvester = None
+            if harvester is None:
+                # Read every card's fields in one script call; fall back per card
+                # if the script failed or saw a different card list.
+                card_records = extract_cards(page, [CARD_SELECTOR], CARD_FIELDS, {"link": "href"}) if job_cards else []
+                if card_records is not None and len(card_records) != len(job_cards):
+                    card_records = None
+                if card_records is None:
+                    profiling.count("bulk_extract_fallback", source="google")
+            span.ok = bool(job_cards)
+        return job_cards, harvester, card_records
+
+    def load():
+        # The page's URL and text for block detection: a redirect to a
+        # /sorry/ page or a CAPTCHA in place of the results.
+        found = discover()
+        html = "" if found[0] else f"{page.url}\n{page.html}"
+        return len(found[0]), None, html, found
+
+    if rate is None:
+        job_cards, harvester, card_records = discover()
+    else:
+        try:
+            job_cards, harvester, card_records = rate.fetch(urlsplit(url).netloc, load, url)
+        except Blocked as e:
+            print(f"[rate] giving up on location={location}: {e}", flush=True)
+            return 0, 0
+    if harvester is not None:
+        # The first batch comes back through the observer too; only one
+        # card's element handle is held at a time from here on.
+        print(f"[google] location={location} harvesting from {len(job_cards)} rendered cards", flush=True)
+        job_cards = None
+        cards = (
+            (record, lambda record=record: harvester.element(record))
+            for record in harvester.stream(
+                max_jobs, harvest["idle_batches"], harvest["budget"], wait_config["step_timeout"], stats
+            )
+        )
+    else:
         print(f"[google] location={location} cards={len(job_cards)}", flush=True)
-        job_count = 0
-        for job in job_cards:
-            try:
-                if args.max_jobs and job_count >= args.max_jobs:
-                    print(f"[google] location={location} reached max_jobs={args.max_jobs}", flush=True)
-                    break
-                click_target = first_ele(job, ["xpath:.//*[contains(@class,'tNxQIb')]"], timeout=0.5)
-                if click_target:
-                    click_target.click()
-                else:
-                    job.click()
-                time.sleep(0.2)
-
-                title = safe_text(first_ele(job, ["xpath:./div", "xpath:.//div"], timeout=0.5))
-                company = safe_text(first_ele(job, ["xpath:.//*[contains(@class,'waQ7qe')]"], timeout=0.5))
-                location = safe_text(first_ele(job, ["xpath:.//*[contains(@class,'mLdNec')]"], timeout=0.5))
-                posted_time = safe_text(first_ele(job, ["xpath:.//*[contains(@class,'RcZtZb')]"], timeout=0.5))
-                job_link = safe_href(first_ele(job, ["xpath:.//a[@href]"], timeout=0.5))
-                # Expand the panel description using simple text selector
-                try:
-                    page.ele("text:Show full description", timeout=1).click()
-                except Exception:
-                    pass  # Button might not exist or already expanded
-                time.sleep(0.2)
-                # Job details are usually in the right-side panel, not the card itself.
-                desc_snippet = safe_text(first_ele(page, [".HBvzbc", ".K7O2sd", ".GYM22b"], timeout=0.5))
-                desc_full = safe_text(first_ele(page, ["#jobDescriptionText", ".K7O2sd", ".HBvzbc"], timeout=0.5))
-                if not desc_full:
-                    desc_full = find_description_by_heading(
-                        page,
-                        ["Job description", "Description", "Responsibilities", "About the job"],
-                        timeout=0.5,
-                    )
-
-                # Parse Company/Location/Salary from Description Full
-                parsed_company = extract_company(desc_full)
-                parsed_location = extract_location(desc_full)
-                salary = extract_labeled_value(desc_full, ["Salary", "Compensation", "Pay"]) or extract_salary(desc_full)
-                if parsed_company:
-                    company = parsed_company
-                if parsed_location:
-                    location = parsed_location
-
-                writer.writerow([
-                    title,
-                    company,
-                    location,
-                    posted_time,
-                    job_link,
-                    desc_snippet,
-                    desc_full,
-                    salary,
-                ])
+        if cache is not None and job_cards:
+            cache.put(url, "google", page.html)
+        cards = (
+            (card_records[index] if card_records is not None else None, lambda job=job: job)
+            for index, job in enumerate(job_cards)
+        )
+    job_count = 0
+    failed = 0
+    for record, get_job in cards:
+        try:
+            if max_jobs and job_count >= max_jobs:
+                print(f"[google] location={location} reached max_jobs={max_jobs}", flush=True)
+                break
+            if record is not None:
+                card = {name: clean_text(value) for name, value in record.items() if name != "_id"}
+            else:
+                card = read_card(get_job())
+            key = card_id(card)
+            if key in done_cards:
                 job_count += 1
-
-            except Exception as e:
-                print(f"Error occurred: {e}")
                 continue
 
-# Close the DrissionPage
-page.close()
+            with profiling.span("job", source="google"):
+                # A cached or already seen description skips the
+                # click-and-expand path entirely.
+                details = known_details(cache, seen, card)
+                if details is not None:
+                    desc_snippet, desc_full = details["snippet"], details["full"]
+                else:
+                    desc_snippet, desc_full = expand_details(page, get_job(), wait_config, stats)
+                    store_details(cache, card, desc_snippet, desc_full)
+                    if seen is not None:
+                        seen.remember(card, desc_snippet, desc_full)
+
+                emit(build_row(card, desc_snippet, desc_full), key)
+            job_count += 1
 
-print("Job data has been successfully saved to google_jobs.csv")
+        except Exception as e:
+            print(f"Error occurred: {e}")
+            failed += 1
+            continue
+    if harvester is not None:
+        print(harvester.summary_line(f"location={location}"), flush=True)
+        if cache is not None and harvester.cards:
+            cache.put(url, "google", page.html)
+    return job_count, failed
+
+
+def iter_units(page, units, max_jobs, concurrency, wait_config=None, stats=None, cache=None, seen=None, origin="",
+               work_queue=None, harvest=None, rate=None):
+    # Yields each row as soon as it is scraped. Each worker borrows a tab from
+    # the pool; rows come back through a queue so only the consumer's thread
+    # sees them, and the checkpoint for a row is taken when the consumer asks
+    # for the next one, i.e. after it has written this one. Closing the
+    # generator early lets running locations finish and skips the rest.
+    tabs = queue.Queue()
+    tabs.put(page)
+    extra_tabs = []
+    for _ in range(max(concurrency, 1) - 1):
+        # Replay runs have no browser; workers then share no page at all.
+        tab = new_tab(page) if page is not None else None
+        if tab is not None:
+            extra_tabs.append(tab)
+        tabs.put(tab)
+    rows = queue.Queue()
+    stop = threading.Event()
+
+    def work(unit):
+        if stop.is_set():
+            return 0
+        query, location = unit
+        key = unit_key("google", query, location)
+        done_cards = ()
+        if work_queue is not None:
+            if work_queue.unit_done(key) is not None:
+                print(f"[google] location={location} already written, skipping", flush=True)
+                return 0
+            done_cards = work_queue.done_cards(key)
+        tab = tabs.get()
+        started = time.perf_counter()
+        try:
+            job_count, failed = scrape_location(
+                tab, query, location, max_jobs, lambda row, card: rows.put((key, row, card)),
+                wait_config, stats, cache, seen, origin, done_cards, harvest, rate,
+            )
+        finally:
+            tabs.put(tab)
+        if job_count and not failed:
+            # Marks the unit finished once all its rows are written; locations
+            # with no cards (a block page?) or failed cards are retried.
+            rows.put((key, None, job_count))
+        elapsed = time.perf_counter() - started
+        print(f"[google] location={location} jobs={job_count} wall={elapsed:.1f}s", flush=True)
+        return job_count
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            futures = [pool.submit(work, unit) for unit in units]
+            try:
+                while True:
+                    try:
+                        key, row, card = rows.get(timeout=0.2)
+                    except queue.Empty:
+                        # A worker may put its last rows after the timeout
+                        # and then finish: only stop once every worker is
+                        # done and what they put has been read.
+                        if all(f.done() for f in futures) and rows.empty():
+                            break
+                        continue
+                    if row is None:
+                        if work_queue is not None:
+                            work_queue.unit_written(key, card)
+                        continue
+                    yield row
+                    if work_queue is not None:
+                        work_queue.card_written(key, card)
+            finally:
+                stop.set()
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error occurred: {e}")
+    finally:
+        for tab in extra_tabs:
+            tab.close()
+
+
+GOOGLE_HEADERS = [
+    "Title",
+    "Company",
+    "Location",
+    "Posted Time",
+    "Job Link",
+    "Description Snippet",
+    "Description Full",
+    "Salary",
+]
+
+
+def open_run(args):
+    # The per-run helpers both entry points share, from parsed args.
+    if args.selector_stats:
+        selector_stats.enable(args.selector_stats)
+    return {
+        "wait_config": {
+            "page_timeout": args.page_timeout,
+            "step_timeout": args.step_timeout,
+            "job_budget": args.job_budget,
+        },
+        "harvest": {"idle_batches": args.harvest_idle, "budget": args.harvest_budget} if args.harvest else None,
+        "stats": WaitStats(),
+        "cache": cache_from_args(args),
+        "seen": SeenJobs(args.seen_index, args.refresh_seen, args.seen_max_age) if args.seen_index else None,
+        "rate": rate_from_args(args, DEFAULT_START_INTERVAL, args.concurrency),
+        "rate_log": args.rate_log,
+    }
+
+
+def close_run(run):
+    run["stats"].print_summary()
+    if run["rate"] is not None:
+        run["rate"].finish(run["rate_log"])
+    fields = {**CARD_FIELDS, **DETAIL_FIELDS}
+    selector_stats.finish("google", {name: fields[name] for name in LEARNED_FIELDS})
+    if run["cache"] is not None:
+        print(run["cache"].summary_line(), flush=True)
+        run["cache"].close()
+    if run["seen"] is not None:
+        print(run["seen"].summary_line(), flush=True)
+        run["seen"].close()
+
+
+def iter_rows(args, page, run, work_queue=None):
+    # iter_units over every location in args.
+    units = [(args.query, location) for location in parse_locations(args.location)]
+    return iter_units(
+        page, units, args.max_jobs, args.concurrency, run["wait_config"], run["stats"], run["cache"], run["seen"],
+        args.origin, work_queue, run["harvest"], run["rate"],
+    )
+
+
+def iter_google_jobs(query, locations, page=None, **options):
+    # Library entry point: yields a JobRecord per job as soon as it is
+    # scraped. options are the command-line flags by name (max_jobs=20,
+    # concurrency=2, harvest=True, ...); the seen-jobs index and selector
+    # stats are off unless given a path (seen_index="seen_jobs.db"). Without
+    # a page a browser is opened for the run (none for cache replay runs) and
+    # closed at the end.
+    args = scraper_args(parse_args, query=query, location=join_locations(locations), **options)
+    own_page = page is None and not args.replay
+    if own_page:
+        page = open_page(args.browser_address, args.lean)
+    run = open_run(args)
+    try:
+        for row in iter_rows(args, page, run):
+            yield JobRecord.from_google_row(row, today())
+    finally:
+        close_run(run)
+        if own_page:
+            page.close()
+
+
+def run_google(args, page, writer, work_queue=None):
+    # Scrape every location in args onto writer; page may be None in replay
+    # mode. With a work_queue, finished locations and cards are checkpointed
+    # and skipped. Returns the number of rows written.
+    run = open_run(args)
+    store = JobStore(args.store) if args.store else None
+    sinks = [open_sink(path) for path in args.sink]
+    writer = profiling.profiled_writer(writer, "google")
+    if store is not None:
+        writer = StoreWriter(writer, store, store_record)
+    if sinks:
+        writer = SinkWriter(writer, sinks, lambda row: JobRecord.from_google_row(row, today()))
+
+    started = time.perf_counter()
+    total = 0
+    for row in iter_rows(args, page, run, work_queue):
+        writer.writerow(row)
+        total += 1
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed else 0.0
+    print(
+        f"[google] total jobs={total} locations={len(parse_locations(args.location))} wall={elapsed:.1f}s "
+        f"throughput={rate:.2f} jobs/s",
+        flush=True,
+    )
+    close_run(run)
+    for sink in sinks:
+        sink.close()
+    if store is not None:
+        store.close()
+        print(store.summary_line(), flush=True)
+    if work_queue is not None:
+        print(work_queue.summary_line(), flush=True)
+    return total
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    if args.profile:
+        profiling.enable(args.profile)
+    # Replay runs are served from the cache and never start Chromium.
+    page = None if args.replay else open_page(args.browser_address, args.lean)
+
+    # Open a CSV file to write the data; checkpointed runs append to it on
+    # --resume.
+    work_queue = queue_from_args(args, DEFAULT_CHECKPOINT)
+    if work_queue is not None:
+        file = work_queue.open_output("google_jobs.csv", GOOGLE_HEADERS)
+    else:
+        file = open("google_jobs.csv", mode="w", newline="", encoding="utf-8")
+        csv.writer(file).writerow(GOOGLE_HEADERS)
+    with file:
+        writer = TimedWriter(csv.writer(file))
+        run_google(args, page, writer, work_queue)
+    if work_queue is not None:
+        work_queue.close()
+    print_first_card("google", started, writer)
+    profiling.finish(args.profile)
+
+    # Close the DrissionPage
+    if page is not None:
+        page.close()
+
+    print("Job data has been successfully saved to google_jobs.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import json
+import time
+
+from bulk_extract import FIELD_JS, build_spec
+import profiling
+from waits import wait_until
+
+DEFAULT_IDLE_BATCHES = 3
+DEFAULT_BUDGET = 120.0
+
+# Installed once per page. The observer tags every card as it is added with
+# data-harvest="<n>" and queues it; take() returns the queued cards' fields
+# and empties the queue, so the page keeps no list of cards already handed
+# over. Card selectors rooted at "//" are matched against the added subtree
+# only; other selectors fall back to a document query for untagged cards.
+INSTALL_JS = "const spec = %s;\n" + FIELD_JS + r"""
+if (!window.__jobHarvest) {
+  const h = {next: 0, pending: [], last: null};
+  function within(node, loc) {
+    if (loc.by === 'css') {
+      const found = node.matches(loc.value) ? [node] : [];
+      return found.concat(Array.from(node.querySelectorAll(loc.value)));
+    }
+    if (loc.value.startsWith('//')) {
+      return findAll(node, {by: 'xpath', value: 'descendant-or-self::' + loc.value.slice(2)});
+    }
+    return findAll(document, loc);
+  }
+  h.add = function (node) {
+    for (const loc of spec.cards) {
+      let found = [];
+      try {
+        found = within(node, loc);
+      } catch (e) {}
+      for (const el of found) {
+        if (!el.hasAttribute('data-harvest')) {
+          el.setAttribute('data-harvest', String(h.next++));
+          h.pending.push(el);
+          h.last = el;
+        }
+      }
+      if (found.length) {
+        break;
+      }
+    }
+  };
+  h.take = function () {
+    const batch = h.pending.splice(0);
+    const rows = batch.map(el => Object.assign({_id: el.getAttribute('data-harvest')}, readFields(el, spec.fields)));
+    return JSON.stringify(rows);
+  };
+  h.observer = new MutationObserver(records => {
+    for (const record of records) {
+      for (const node of record.addedNodes) {
+        if (node.nodeType === 1) {
+          h.add(node);
+        }
+      }
+    }
+  });
+  h.observer.observe(document.body, {childList: true, subtree: true});
+  h.add(document.body);
+  window.__jobHarvest = h;
+}
+return window.__jobHarvest.next;
+"""
+
+TAKE_JS = "return window.__jobHarvest ? window.__jobHarvest.take() : '[]';"
+PENDING_JS = "return window.__jobHarvest ? window.__jobHarvest.pending.length : 0;"
+# Bring the newest card into view and scroll its scrolling container (or the
+# window) to the bottom, which is what triggers the next batch.
+SCROLL_JS = r"""
+const h = window.__jobHarvest;
+const el = h && h.last;
+if (el && el.isConnected) {
+  el.scrollIntoView({block: 'end'});
+  for (let p = el.parentElement; p && p !== document.body; p = p.parentElement) {
+    const overflow = getComputedStyle(p).overflowY;
+    if (p.scrollHeight > p.clientHeight + 1 && (overflow === 'auto' || overflow === 'scroll')) {
+      p.scrollTop = p.scrollHeight;
+      break;
+    }
+  }
+}
+window.scrollTo(0, document.documentElement.scrollHeight);
+return true;
+"""
+
+
+class CardHarvester:
+    # Streams result cards from an infinitely scrolling list. Only the cards
+    # added since the last batch cross over from the page, and an element
+    # handle is looked up only for a card that needs clicking, so neither
+    # side accumulates per-card state as the list grows.
+
+    def __init__(self, page, card_selectors, field_selectors, attrs=None, source="google"):
+        self.page = page
+        self.spec = build_spec(card_selectors, field_selectors, attrs)
+        self.source = source
+        self.batches = 0
+        self.cards = 0
+        self.duplicates = 0
+        self.stopped = ""
+        self._seen = set()
+
+    def install(self):
+        # False when the page can't run the observer; callers then read the
+        # card list once as before.
+        try:
+            self.page.run_js(INSTALL_JS % json.dumps(self.spec))
+            return True
+        except Exception as e:
+            print(f"[harvest] observer install failed, reading the first batch only: {e}", flush=True)
+            return False
+
+    def take(self):
+        try:
+            raw = self.page.run_js(TAKE_JS)
+            return json.loads(raw) if isinstance(raw, str) else (raw or [])
+        except Exception as e:
+            print(f"[harvest] take failed: {e}", flush=True)
+            return []
+
+    def pending(self):
+        try:
+            return self.page.run_js(PENDING_JS)
+        except Exception:
+            return 0
+
+    def scroll(self):
+        try:
+            self.page.run_js(SCROLL_JS)
+        except Exception as e:
+            print(f"[harvest] scroll failed: {e}", flush=True)
+
+    def element(self, record, timeout=0.5):
+        return self.page.ele(f'css:[data-harvest="{record["_id"]}"]', timeout=timeout)
+
+    def stream(self, max_cards=0, idle_batches=DEFAULT_IDLE_BATCHES, budget=DEFAULT_BUDGET, batch_timeout=2.0,
+               stats=None):
+        # Yields card records (field values plus "_id") batch by batch,
+        # scrolling for the next batch once the current one is consumed. Stops
+        # after max_cards, after idle_batches scrolls in a row bring nothing
+        # new, or once budget seconds have passed (0 = no limit).
+        started = time.perf_counter()
+        idle = 0
+        while True:
+            batch = self.take()
+            if batch:
+                idle = 0
+                self.batches += 1
+                for record in batch:
+                    # A card re-rendered in place comes back as a new node.
+                    key = tuple(value for name, value in sorted(record.items()) if name != "_id")
+                    if key in self._seen:
+                        self.duplicates += 1
+                        continue
+                    self._seen.add(key)
+                    self.cards += 1
+                    yield record
+                    if max_cards and self.cards >= max_cards:
+                        self.stopped = "target"
+                        return
+                    if budget and time.perf_counter() - started >= budget:
+                        self.stopped = "budget"
+                        return
+                continue
+            elapsed = time.perf_counter() - started
+            if budget and elapsed >= budget:
+                self.stopped = "budget"
+                return
+            if idle >= idle_batches:
+                self.stopped = "idle"
+                return
+            timeout = min(batch_timeout, budget - elapsed) if budget else batch_timeout
+            with profiling.span("harvest_scroll", source=self.source) as span:
+                self.scroll()
+                arrived = wait_until(self.pending, timeout, name="harvest", stats=stats, baseline=batch_timeout)
+                span.ok = bool(arrived)
+            if not arrived:
+                idle += 1
+
+    def summary_line(self, label):
+        return (
+            f"[{self.source}] {label} cards={self.cards} batches={self.batches} "
+            f"duplicates={self.duplicates} stopped={self.stopped or 'caller'}"
+        )
@@ -0,0 +1,94 @@
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from DrissionPage.common import make_session_ele
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE):
+    # One keep-alive connection pool per host, shared by every HttpPage.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def rebase_url(url, origin):
+    # Point a URL at another scheme://host[:port], e.g. a local fixture server.
+    if not origin:
+        return url
+    target = urlsplit(origin)
+    parts = urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+
+class HttpPage:
+    # Page-like wrapper over a requests session: get() fetches static HTML and
+    # ele()/eles() resolve DrissionPage locators against it, so scrapers can
+    # use it in place of a ChromiumPage for boards that render server-side.
+    is_static = True
+
+    def __init__(self, session=None, timeout=DEFAULT_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+        self.url = ""
+        self.status = None
+        self.html = ""
+        self.bytes = 0
+        self.elapsed = 0.0
+        self._root = None
+
+    def get(self, url):
+        started = time.perf_counter()
+        self.url = url
+        if self.session is None:
+            self.session = make_session()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[http] GET {url} failed: {e}", flush=True)
+            self.status = None
+            self.load_html("")
+            return False
+        finally:
+            self.elapsed = time.perf_counter() - started
+        self.status = response.status_code
+        self.bytes = len(response.content)
+        self.load_html(response.text)
+        return response.ok
+
+    def load_html(self, html):
+        self.html = html
+        self._root = make_session_ele(html) if html else None
+
+    def ele(self, locator, timeout=None):
+        return self._root.ele(locator) if self._root is not None else None
+
+    def eles(self, locator, timeout=None):
+        return self._root.eles(locator) if self._root is not None else []
+
+    def close(self):
+        pass
+
+
+def static_page(url, html):
+    # HttpPage holding already-fetched HTML, e.g. a cache hit.
+    page = HttpPage()
+    page.url = url
+    page.status = 200
+    page.load_html(html)
+    return page
@@ -1,52 +1,64 @@
-from DrissionPage import ChromiumPage
 import argparse
 import csv
+import threading
 import time
 from urllib.parse import quote_plus
 
+from browser_daemon import TimedWriter, add_browser_args, new_tab, open_page, print_first_card
+from bulk_extract import extract_cards
+from http_fetch import HttpPage, make_session, rebase_url, static_page
+from job_record import JobRecord, SinkWriter, add_sink_args, join_locations, open_sink, scraper_args
+from job_store import JobStore, StoreWriter, add_store_args, today
+import profiling
+from rate_control import Blocked, add_rate_args, rate_from_args
+from response_cache import add_cache_args, cache_from_args
+import scheduler
+import selector_stats
+from waits import WaitStats, wait_for_eles, wait_for_stable_count
+from work_queue import add_checkpoint_args, queue_from_args, unit_key
+
 DEFAULT_QUERY = "php developer"
 DEFAULT_LOCATIONS = ["london", "birmingham", "coventry", "manchester"]
 DEFAULT_MAX_PAGES = 1  # Increase carefully; some sites block aggressive scraping
+DEFAULT_PAGE_TIMEOUT = 10.0
+DEFAULT_CHECKPOINT = "boards_checkpoint.db"
+ENGINES = ["browser", "http"]
+SCHEDULERS = ["serial", "async"]
 
 BOARDS = [
     {
         "name": "indeed",
         "base_url": "https://www.indeed.com",
+        "needs_js": False,
         "search_url": "https://www.indeed.com/jobs?q={query}&l={location}&start={start}",
         "card_selectors": [".job_seen_beacon", ".result"],
         "selectors": {
-            "title": ["h2.jobTitle", "a.jcs-JobTitle"],
-            "company": ["span.companyName"],
-            "location": ["div.companyLocation"],
-            "posted_time": ["span.date"],
-            "link": ["a.jcs-JobTitle"],
+            "title": ["css:h2.jobTitle", "css:a.jcs-JobTitle"],
+            "company": ["css:span.companyName"],
+            "location": ["css:div.companyLocation"],
+            "posted_time": ["css:span.date"],
+            "link": ["css:a.jcs-JobTitle"],
         },
     },
     {
         "name": "reed",
         "base_url": "https://www.reed.co.uk",
+        "needs_js": False,
         "search_url": "https://www.reed.co.uk/jobs/{query}-jobs-in-{location}?p={page}",
-        "card_selectors": ["article.job-result", "li.job-result"],
+        "card_selectors": ["css:article.job-result", "css:li.job-result"],
         "selectors": {
-            "title": ["h2.job-result-heading__title", "h2.job-result__title"],
-            "company": ["a.job-result-heading__company", "span.job-result__company"],
-            "location": ["span.job-result-heading__location", "span.job-result__location"],
-            "posted_time": ["span.job-result-heading__date", "span.job-result__date"],
-            "link": ["a.job-result-heading__title", "a.job-result__title"],
+            "title": ["css:h2.job-result-heading__title", "css:h2.job-result__title"],
+            "company": ["css:a.job-result-heading__company", "css:span.job-result__company"],
+            "location": ["css:span.job-result-heading__location", "css:span.job-result__location"],
+            "posted_time": ["css:span.job-result-heading__date", "css:span.job-result__date"],
+            "link": ["css:a.job-result-heading__title", "css:a.job-result__title"],
         },
     },
 ]
 
 
-def first_ele(parent, selectors):
-    for sel in selectors:
-        try:
-            ele = parent.ele(sel)
-        except Exception:
-            ele = None
-        if ele:
-            return ele
-    return None
+def first_ele(parent, selectors, source="boards", field=""):
+    return selector_stats.first_ele(parent, selectors, source, field or selectors[0])
 
 
 def safe_text(ele):
@@ -65,6 +77,17 @@ def build_url(board, page_index, query, location):
     return board["search_url"].format(query=q, location=loc, page=page_index + 1)
 
 
+def with_origin(board, origin):
+    # Copy of a board whose URLs point at `origin` (e.g. a local fixture server).
+    if not origin:
+        return board
+    return {
+        **board,
+        "base_url": rebase_url(board["base_url"], origin).rstrip("/"),
+        "search_url": rebase_url(board["search_url"], origin),
+    }
+
+
 def normalize_link(base_url, href):
     if not href:
         return ""
@@ -75,40 +98,170 @@ def normalize_link(base_url, href):
     return f"{base_url}/{href}"
 
 
-def scrape_board(page, board, writer, query, location, max_pages):
+def read_card(card, board):
+    selectors = board["selectors"]
+    name = board["name"]
+    return {
+        "title": safe_text(first_ele(card, selectors["title"], name, "title")),
+        "company": safe_text(first_ele(card, selectors["company"], name, "company")),
+        "location": safe_text(first_ele(card, selectors["location"], name, "location")),
+        "posted_time": safe_text(first_ele(card, selectors["posted_time"], name, "posted_time")),
+        "link": safe_href(first_ele(card, selectors["link"], name, "link")),
+    }
+
+
+def discover_cards(page, board, page_timeout=DEFAULT_PAGE_TIMEOUT, stats=None):
+    # The loaded page's card elements and their field values.
+    # The card selector that matched most recently is polled first.
+    card_selectors = selector_stats.order(board["name"], "cards", board["card_selectors"])
+    with profiling.span("discover_cards", source=board["name"]) as span:
+        if getattr(page, "is_static", False):
+            # Fetched HTML is already complete; nothing to wait for.
+            cards = wait_for_eles(page, card_selectors, 0)
+        else:
+            # Returns as soon as either card selector resolves and the count settles.
+            cards = wait_for_stable_count(
+                page, card_selectors, page_timeout, name=f"{board['name']}_results", stats=stats,
+                baseline=3.0,
+            )
+        if cards:
+            selector_stats.note_match(page, board["name"], "cards", card_selectors)
+        # One script call for the whole page; per-element lookups only if it fails.
+        records = extract_cards(page, card_selectors, board["selectors"], {"link": "href"}) if cards else []
+        if records is None:
+            profiling.count("bulk_extract_fallback", source=board["name"])
+            records = [read_card(card, board) for card in cards]
+        span.ok = bool(cards)
+    return cards, records
+
+
+def scrape_page(page, board, query, location, page_index, page_timeout=DEFAULT_PAGE_TIMEOUT, stats=None, cache=None,
+                rate=None):
+    # One results page's rows, timed as a "page" span from request to rows.
+    with profiling.span("page", source=board["name"]) as span:
+        rows = read_page(page, board, query, location, page_index, page_timeout, stats, cache, rate)
+        span.ok = bool(rows)
+    return rows
+
+
+def read_page(page, board, query, location, page_index, page_timeout, stats, cache, rate):
+    url = build_url(board, page_index, query, location)
+    cached = cache.get_text(url, board["name"]) if cache is not None else None
+    if cached is not None:
+        page = static_page(url, cached)
+        cards, records = discover_cards(page, board, page_timeout, stats)
+    elif cache is not None and cache.replay_only:
+        print(f"[cache] replay miss, skipping {url}", flush=True)
+        return []
+    else:
+        def load():
+            with profiling.span("navigate", source=board["name"]):
+                page.get(url)
+            cards, records = discover_cards(page, board, page_timeout, stats)
+            # An empty page's final URL and markup are checked for block pages.
+            html = f"{page.url}\n{page.html}" if rate is not None and not cards else ""
+            return len(cards), getattr(page, "status", None), html, (cards, records)
+
+        if rate is None:
+            cards, records = load()[3]
+        else:
+            try:
+                cards, records = rate.fetch(scheduler.board_domain(board), load, url, first_page=page_index == 0)
+            except Blocked as e:
+                print(f"[rate] giving up on {url}: {e.reason}", flush=True)
+                return []
+
+    print(f"[boards] board={board['name']} location={location} page={page_index} cards={len(cards)}", flush=True)
+    if cache is not None and cached is None and records:
+        # Only pages that produced cards, so block/empty pages are refetched.
+        cache.put(url, board["name"], page.html)
+
+    return [
+        [
+            board["name"],
+            record["title"],
+            record["company"],
+            record["location"],
+            record["posted_time"],
+            normalize_link(board["base_url"], record["link"]),
+        ]
+        for record in records
+    ]
+
+
+def iter_board_pages(page, board, query, location, max_pages, page_timeout=DEFAULT_PAGE_TIMEOUT, stats=None,
+                     cache=None, work_queue=None, rate=None):
+    # Yields the rows of each results page that has any. A page is
+    # checkpointed once the consumer asks for the next one.
     for page_index in range(max_pages):
-        url = build_url(board, page_index, query, location)
-        page.get(url)
-        time.sleep(3)
-
-        cards = page.eles(board["card_selectors"][0])
-        if not cards and len(board["card_selectors"]) > 1:
-            cards = page.eles(board["card_selectors"][1])
-
-        for card in cards:
-            title_ele = first_ele(card, board["selectors"]["title"])
-            company_ele = first_ele(card, board["selectors"]["company"])
-            location_ele = first_ele(card, board["selectors"]["location"])
-            posted_ele = first_ele(card, board["selectors"]["posted_time"])
-            link_ele = first_ele(card, board["selectors"]["link"])
-
-            title = safe_text(title_ele)
-            company = safe_text(company_ele)
-            location = safe_text(location_ele)
-            posted_time = safe_text(posted_ele)
-            job_link = normalize_link(board["base_url"], safe_href(link_ele))
-
-            writer.writerow([
-                board["name"],
-                title,
-                company,
-                location,
-                posted_time,
-                job_link,
-            ])
-
-
-def parse_args():
+        key = unit_key(board["name"], query, location, page_index)
+        if work_queue is not None and work_queue.unit_done(key) is not None:
+            continue
+        rows = scrape_page(page, board, query, location, page_index, page_timeout, stats, cache, rate)
+        if not rows:
+            # Past the last page of results; later pages would be empty too.
+            # Empty pages (or a block page) are never checkpointed, so a
+            # resumed run tries them again.
+            break
+        yield rows
+        if work_queue is not None:
+            work_queue.unit_written(key, len(rows))
+
+
+def scrape_board(page, board, writer, query, location, max_pages, page_timeout=DEFAULT_PAGE_TIMEOUT, stats=None,
+                 cache=None, work_queue=None, rate=None):
+    for rows in iter_board_pages(
+        page, board, query, location, max_pages, page_timeout, stats, cache, work_queue, rate
+    ):
+        writer.writerows(rows)
+
+
+def find_board(name):
+    for board in BOARDS:
+        if board["name"] == name:
+            return board
+    raise ValueError(f"unknown board {name!r} (known: {', '.join(b['name'] for b in BOARDS)})")
+
+
+def iter_board_jobs(board, query, locations, page=None, **options):
+    # Library entry point: yields a JobRecord per job on board (a name or a
+    # BOARDS entry), page by page. options are the command-line flags by
+    # name (max_pages=3, origin=..., cache_dir=..., ...); no state files are
+    # written unless asked for (selector_stats="selector_stats.db"). Without
+    # a page the board is fetched over HTTP.
+    args = scraper_args(parse_args, query=query, location=join_locations(locations), **options)
+    board = with_origin(find_board(board) if isinstance(board, str) else board, args.origin)
+    if page is None:
+        page = HttpPage(make_session())
+    if args.selector_stats:
+        selector_stats.enable(args.selector_stats)
+    stats = WaitStats()
+    cache = cache_from_args(args)
+    rate = rate_from_args(args, args.min_interval, 1)
+    try:
+        for location in parse_locations(args.location):
+            for rows in iter_board_pages(
+                page, board, args.query, location, args.max_pages, args.page_timeout, stats, cache, rate=rate
+            ):
+                for row in rows:
+                    yield JobRecord.from_board_row(row, today())
+    finally:
+        stats.print_summary()
+        if rate is not None:
+            rate.finish(args.rate_log)
+        selector_stats.finish(board["name"], {"cards": board["card_selectors"], **board["selectors"]})
+        if cache is not None:
+            print(cache.summary_line(), flush=True)
+            cache.close()
+
+
+def store_record(row):
+    # jobs_indeed_reed.csv row -> JobStore.add arguments.
+    source, title, company, location, posted_time, link = row
+    return source, title, company, location, posted_time, link, today()
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Scrape job boards for listings.")
     parser.add_argument("--query", default=DEFAULT_QUERY, help="Job title or keywords.")
     parser.add_argument(
@@ -122,27 +275,180 @@ def parse_args():
         default=DEFAULT_MAX_PAGES,
         help="Pages per board to scan.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        default=DEFAULT_PAGE_TIMEOUT,
+        help="Max seconds to wait for result cards on each page.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="browser",
+        help="browser renders every page in Chromium; http fetches static boards over plain HTTP.",
+    )
+    parser.add_argument(
+        "--origin",
+        default="",
+        help="Send board requests to this origin instead (e.g. http://127.0.0.1:8000 for fixtures).",
+    )
+    parser.add_argument(
+        "--boards",
+        default="",
+        help=f"Comma-separated boards to scrape (default: all of {', '.join(b['name'] for b in BOARDS)}).",
+    )
+    parser.add_argument(
+        "--scheduler",
+        choices=SCHEDULERS,
+        default="serial",
+        help="serial scrapes one page at a time; async runs boards/locations/pages concurrently.",
+    )
+    parser.add_argument(
+        "--per-domain",
+        type=int,
+        default=scheduler.DEFAULT_PER_DOMAIN,
+        help="Max concurrent requests per domain (async scheduler).",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=scheduler.DEFAULT_MIN_INTERVAL,
+        help="Min seconds between request starts to the same domain (async scheduler; the starting pace with "
+        "--adaptive-rate).",
+    )
+    add_rate_args(parser, "boards_rate.json")
+    add_cache_args(parser)
+    add_store_args(parser)
+    add_sink_args(parser)
+    selector_stats.add_selector_args(parser)
+    add_browser_args(parser)
+    profiling.add_profile_args(parser, "profile_boards")
+    add_checkpoint_args(parser, DEFAULT_CHECKPOINT)
+    return parser.parse_args(argv)
 
 
 def parse_locations(raw_value):
     return [loc.strip() for loc in raw_value.split(",") if loc.strip()]
 
 
-def main():
-    args = parse_args()
+BOARD_HEADERS = ["Source", "Title", "Company", "Location", "Posted Time", "Job Link"]
+
+
+def run_boards(args, writer, get_page, new_tab, work_queue=None):
+    # Scrape every board in args onto writer. get_page() returns the browser
+    # page used by the serial loop and new_tab() a fresh tab for the async
+    # pool; neither is called for boards served over HTTP. With a work_queue,
+    # finished pages are checkpointed and skipped.
     locations = parse_locations(args.location)
-    page = ChromiumPage()
+    stats = WaitStats()
+    if args.selector_stats:
+        selector_stats.enable(args.selector_stats)
+    cache = cache_from_args(args)
+    store = JobStore(args.store) if args.store else None
+    sinks = [open_sink(path) for path in args.sink]
+    writer = profiling.profiled_writer(writer, "boards")
+    if store is not None:
+        writer = StoreWriter(writer, store, store_record)
+    if sinks:
+        writer = SinkWriter(writer, sinks, lambda row: JobRecord.from_board_row(row, today()))
+    selected = {name.strip().lower() for name in args.boards.split(",") if name.strip()}
+    boards = [with_origin(board, args.origin) for board in BOARDS if not selected or board["name"] in selected]
+    session = make_session() if args.engine == "http" else None
+    # With --adaptive-rate the controller paces each domain, so the
+    # scheduler's fixed interval is dropped and --per-domain is its ceiling.
+    rate = rate_from_args(args, args.min_interval, args.per_domain if args.scheduler == "async" else 1)
+
+    def uses_http(board):
+        # Boards that need JS (or --engine browser) still get Chromium;
+        # replay runs never start a browser.
+        if cache is not None and cache.replay_only:
+            return True
+        return session is not None and not board.get("needs_js")
+
+    def new_page(board):
+        return HttpPage(session) if uses_http(board) else new_tab()
 
-    with open("jobs_indeed_reed.csv", mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Source", "Title", "Company", "Location", "Posted Time", "Job Link"])
+    def scrape_unit(page, unit):
+        return scrape_page(
+            page, unit["board"], unit["query"], unit["location"], unit["page_index"], args.page_timeout, stats, cache,
+            rate,
+        )
 
-        for board in BOARDS:
+    def page_key(unit):
+        return unit_key(unit["board"]["name"], unit["query"], unit["location"], unit["page_index"])
+
+    def unit_done(unit, rows):
+        if rows:
+            work_queue.unit_written(page_key(unit), len(rows))
+
+    if args.scheduler == "async":
+        units = scheduler.expand_units(boards, args.query, locations, args.max_pages)
+        if work_queue is not None:
+            units = [unit for unit in units if work_queue.unit_done(page_key(unit)) is None]
+        pools = scheduler.run(
+            units, scrape_unit, new_page, writer.writerow, args.per_domain, 0.0 if rate else args.min_interval,
+            unit_done if work_queue is not None else None,
+        )
+        for pool in pools.values():
+            for page in pool.pages:
+                page.close()
+    else:
+        for board in boards:
+            page = HttpPage(session) if uses_http(board) else get_page()
             for location in locations:
-                scrape_board(page, board, writer, args.query, location, args.max_pages)
+                scrape_board(
+                    page, board, writer, args.query, location, args.max_pages, args.page_timeout, stats, cache,
+                    work_queue, rate,
+                )
+
+    stats.print_summary()
+    if rate is not None:
+        rate.finish(args.rate_log)
+    for board in boards:
+        selector_stats.finish(board["name"], {"cards": board["card_selectors"], **board["selectors"]})
+    if cache is not None:
+        print(cache.summary_line(), flush=True)
+        cache.close()
+    for sink in sinks:
+        sink.close()
+    if store is not None:
+        store.close()
+        print(store.summary_line(), flush=True)
+    if work_queue is not None:
+        print(work_queue.summary_line(), flush=True)
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    if args.profile:
+        profiling.enable(args.profile)
+    browser_lock = threading.Lock()
+    browser = {}
+
+    def get_browser():
+        # Started on first use, so an all-HTTP run never launches Chromium.
+        with browser_lock:
+            if "page" not in browser:
+                browser["page"] = open_page(args.browser_address, args.lean)
+            return browser["page"]
+
+    work_queue = queue_from_args(args, DEFAULT_CHECKPOINT)
+    if work_queue is not None:
+        file = work_queue.open_output("jobs_indeed_reed.csv", BOARD_HEADERS)
+    else:
+        file = open("jobs_indeed_reed.csv", mode="w", newline="", encoding="utf-8")
+        csv.writer(file).writerow(BOARD_HEADERS)
+    with file:
+        writer = TimedWriter(csv.writer(file))
+        run_boards(args, writer, get_browser, lambda: new_tab(get_browser()), work_queue)
+    if work_queue is not None:
+        work_queue.close()
+    print_first_card("boards", started, writer)
+    profiling.finish(args.profile)
 
-    page.close()
+    if "page" in browser:
+        browser["page"].close()
     print("Job data has been successfully saved to jobs_indeed_reed.csv")
 
 
@@ -0,0 +1,652 @@
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+from array import array
+
+from job_store import parse_since, today
+
+DEFAULT_INDEX = "jobs_index.db"
+DEFAULT_CSV = "jobs_all.csv"
+DEFAULT_BATCH_DOCS = 20000
+DEFAULT_LIMIT = 20
+HASH_CHUNK = 1024 * 1024
+# A title word counts this many times towards a job's term frequency.
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Every update adds one posting segment per term it saw; a term past this
+# many segments has them merged back into one.
+MAX_SEGMENTS = 8
+# Most frequent terms a "word*" query expands to.
+MAX_PREFIX_TERMS = 64
+# Decoded posting lists kept between the queries of one session.
+MAX_CACHED_TERMS = 256
+# Words plus the tech spellings recruiters search for: c++, c#, node.js, asp.net.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+QUERY_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()]+')
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or our that the their this to we will "
+    "with you your".split()
+)
+# Columns read from the merged CSV (merge_jobs.STANDARD_HEADERS names).
+COLUMNS = ["Source", "Title", "Company", "Location", "Job Link", "Collected At", "Description Snippet",
+           "Description Full"]
+DOC_FIELDS = ["source", "title", "company", "location", "link", "collected_at"]
+
+
+def tokenize(text):
+    # Dotted tokens are indexed whole and by their parts, so "node.js" is
+    # found by "node" too and "php.Senior" (lost whitespace) by "php".
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "." in token:
+            tokens.extend(part for part in token.split(".") if part not in STOPWORDS)
+    return tokens
+
+
+def query_terms(word):
+    return [token for token in TOKEN_RE.findall(word.lower()) if token not in STOPWORDS]
+
+
+def encode_postings(docs, tfs, base):
+    # Doc-id gaps and term frequencies as varints: most postings take 2 bytes.
+    out = bytearray()
+    previous = base
+    for doc, tf in zip(docs, tfs):
+        for value in (doc - previous, tf):
+            while value >= 0x80:
+                out.append(value & 0x7F | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc
+    return bytes(out)
+
+
+def decode_postings(data, base):
+    docs = []
+    tfs = []
+    previous = base
+    value = shift = 0
+    is_doc = True
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if is_doc:
+            previous += value
+            docs.append(previous)
+        else:
+            tfs.append(value)
+        is_doc = not is_doc
+        value = shift = 0
+    return docs, tfs
+
+
+def parse_query(text, any_terms=False):
+    # Query -> tree of ("term", t), ("prefix", p), ("and"|"or", [nodes]),
+    # ("not", node) and ("all",) for a word that is only stopwords. Words
+    # next to each other are ANDed (ORed with any_terms); AND, OR, NOT,
+    # -word, word*, parentheses and "quoted words" (all of them, in any
+    # order: positions aren't indexed) are understood.
+    tokens = QUERY_RE.findall(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def word(raw):
+        if raw.startswith('"'):
+            terms = query_terms(raw.strip('"'))
+        elif raw.endswith("*") and query_terms(raw):
+            return "prefix", query_terms(raw)[0]
+        else:
+            terms = query_terms(raw)
+        if not terms:
+            return ("all",)
+        if len(terms) == 1:
+            return "term", terms[0]
+        return "and", [("term", term) for term in terms]
+
+    def unary():
+        token = peek()
+        if token is None or token == ")":
+            return ("all",)
+        take()
+        if token == "NOT":
+            return "not", unary()
+        if token == "(":
+            node = alternatives()
+            if peek() == ")":
+                take()
+            return node
+        if token.startswith("-") and len(token) > 1:
+            return "not", word(token[1:])
+        return word(token)
+
+    def conjunction():
+        nodes = [unary()]
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                take()
+                nodes.append(unary())
+            elif any_terms:
+                break
+            else:
+                nodes.append(unary())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def alternatives():
+        nodes = [conjunction()]
+        while True:
+            if peek() == "OR":
+                take()
+            elif not (any_terms and peek() not in (None, ")")):
+                break
+            nodes.append(conjunction())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    node = alternatives()
+    while peek() is not None:
+        # Stray ")" and the like: read on rather than drop the rest.
+        take()
+        if peek() is not None:
+            node = ("or" if any_terms else "and", [node, alternatives()])
+    return node
+
+
+def scored_terms(node):
+    # Terms and prefixes outside NOT: the ones that rank a match.
+    if node[0] in ("term", "prefix"):
+        return [node]
+    if node[0] in ("and", "or"):
+        return [leaf for child in node[1] for leaf in scored_terms(child)]
+    return []
+
+
+def file_prefix_sha256(path, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(HASH_CHUNK, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def read_rows(f, start, digest):
+    # (row start, row, row end) from the binary file f, positioned at start.
+    # Bytes are hashed as they are consumed; csv.reader pulls no line past
+    # the row it returns, so digest always covers [0, row end).
+    consumed = start
+
+    def lines():
+        nonlocal consumed
+        for line in f:
+            consumed += len(line)
+            digest.update(line)
+            yield line.decode("utf-8")
+
+    row_start = start
+    for row in csv.reader(lines()):
+        yield row_start, row, consumed
+        row_start = consumed
+
+
+def read_row_at(path, offset):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for _, row, _ in read_rows(f, offset, hashlib.sha256()):
+            return row
+    return None
+
+
+class JobIndex:
+    # Inverted index over the merged CSV's titles and descriptions, in SQLite.
+    # Jobs are numbered in file order. Each term's posting list is a set of
+    # varint-compressed segments, one per update that saw the term, so new
+    # rows are indexed by appending segments rather than rewriting lists.
+    # The index remembers how far into the CSV it has read and a hash of
+    # those bytes: a merge that only appended is indexed from there, a
+    # rewritten file is indexed again from the start.
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = path
+        self._postings = {}
+        self._lengths = None
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS docs (doc INTEGER PRIMARY KEY, offset INTEGER,"
+            + ", ".join(f" {name} TEXT" for name in DOC_FIELDS) + ")"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS docs_source ON docs (source COLLATE NOCASE)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS docs_collected ON docs (collected_at)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS lengths (first_doc INTEGER PRIMARY KEY, data BLOB)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER, segments INTEGER) WITHOUT ROWID"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT, first_doc INTEGER, data BLOB, PRIMARY KEY (term, first_doc)) WITHOUT ROWID"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def _meta(self, name, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, **values):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    @property
+    def doc_count(self):
+        return int(self._meta("doc_count", 0))
+
+    @property
+    def csv_path(self):
+        return self._meta("csv", "")
+
+    def reset(self):
+        with self.db:
+            for table in ("docs", "lengths", "terms", "postings", "meta"):
+                self.db.execute(f"DELETE FROM {table}")
+        self._postings.clear()
+        self._lengths = None
+
+    def _stale_reason(self, csv_path):
+        # Why the index can't just continue reading csv_path, or "".
+        if not self.doc_count and not self._meta("offset"):
+            return ""
+        offset = int(self._meta("offset", 0))
+        if self.csv_path != os.path.abspath(csv_path):
+            return f"indexed {self.csv_path or 'nothing'} before"
+        if os.path.getsize(csv_path) < offset:
+            return "file is shorter than what was indexed"
+        if file_prefix_sha256(csv_path, offset).hexdigest() != self._meta("sha256"):
+            return "indexed rows changed"
+        return ""
+
+    def update(self, csv_path=DEFAULT_CSV, rebuild=False, batch_docs=DEFAULT_BATCH_DOCS):
+        # Indexes the rows added to csv_path since the last update, or all of
+        # them when rebuilding. Returns {"added", "rebuilt", "reason"}.
+        reason = "requested" if rebuild else self._stale_reason(csv_path)
+        if reason:
+            self.reset()
+        offset = start = int(self._meta("offset", 0))
+        digest = file_prefix_sha256(csv_path, offset)
+        header = json.loads(self._meta("header", "null") or "null")
+        doc = self.doc_count
+        total_length = int(self._meta("total_length", 0))
+        added = 0
+        batch = []
+        with open(csv_path, "rb") as f:
+            f.seek(offset)
+            for row_start, row, row_end in read_rows(f, offset, digest):
+                if header is None:
+                    header = [name.strip() for name in row]
+                    self._set_meta(header=json.dumps(header))
+                    offset = row_end
+                    continue
+                if not any(row):
+                    offset = row_end
+                    continue
+                batch.append((doc, row_start, row))
+                doc += 1
+                offset = row_end
+                if len(batch) >= batch_docs:
+                    total_length += self._write_batch(batch, header, csv_path, offset, digest, total_length)
+                    added += len(batch)
+                    batch = []
+            total_length += self._write_batch(batch, header, csv_path, offset, digest, total_length)
+            added += len(batch)
+        self.compact()
+        self._postings.clear()
+        self._lengths = None
+        return {"added": added, "rebuilt": bool(reason) or not start, "reason": reason}
+
+    def _write_batch(self, batch, header, csv_path, offset, digest, total_length):
+        # One transaction per batch, with the read position: an interrupted
+        # update carries on after the last committed batch.
+        names = [name.lower() for name in header]
+        positions = [names.index(name.lower()) if name.lower() in names else None for name in COLUMNS]
+        indexed_on = today()
+        docs = []
+        lengths = array("I")
+        postings = {}
+        for doc, row_start, row in batch:
+            source, title, company, location, link, collected_at, snippet, full = (
+                row[i].strip() if i is not None and i < len(row) else "" for i in positions
+            )
+            description = full if snippet in full else f"{snippet}\n{full}"
+            counts = {}
+            for token in tokenize(title):
+                counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+            for token in tokenize(description):
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                entry = postings.setdefault(token, ([], []))
+                entry[0].append(doc)
+                entry[1].append(tf)
+            lengths.append(sum(counts.values()))
+            # Rows without a collection date are dated by when they were indexed.
+            docs.append((doc, row_start, source, title, company, location, link, collected_at or indexed_on))
+        added_length = sum(lengths)
+        with self.db:
+            if batch:
+                self.db.executemany(
+                    f"INSERT INTO docs (doc, offset, {', '.join(DOC_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", docs
+                )
+                self.db.execute("INSERT INTO lengths (first_doc, data) VALUES (?, ?)", (batch[0][0], lengths.tobytes()))
+                self.db.executemany(
+                    "INSERT INTO postings (term, first_doc, data) VALUES (?, ?, ?)",
+                    [(term, ids[0], encode_postings(ids, tfs, ids[0])) for term, (ids, tfs) in postings.items()],
+                )
+                self.db.executemany(
+                    "INSERT INTO terms (term, df, segments) VALUES (?, ?, 1)"
+                    " ON CONFLICT (term) DO UPDATE SET df = df + excluded.df, segments = segments + 1",
+                    [(term, len(ids)) for term, (ids, _) in postings.items()],
+                )
+            self._set_meta(
+                csv=os.path.abspath(csv_path),
+                offset=offset,
+                sha256=digest.hexdigest(),
+                doc_count=batch[-1][0] + 1 if batch else self.doc_count,
+                total_length=total_length + added_length,
+            )
+        return added_length
+
+    def compact(self, max_segments=MAX_SEGMENTS):
+        # Merges the segments of every term that has more than max_segments.
+        terms = [term for (term,) in self.db.execute("SELECT term FROM terms WHERE segments > ?", (max_segments,))]
+        with self.db:
+            for term in terms:
+                docs = []
+                tfs = []
+                for first_doc, data in self.db.execute(
+                    "SELECT first_doc, data FROM postings WHERE term = ? ORDER BY first_doc", (term,)
+                ).fetchall():
+                    segment_docs, segment_tfs = decode_postings(data, first_doc)
+                    docs += segment_docs
+                    tfs += segment_tfs
+                self.db.execute("DELETE FROM postings WHERE term = ?", (term,))
+                self.db.execute(
+                    "INSERT INTO postings (term, first_doc, data) VALUES (?, ?, ?)",
+                    (term, docs[0], encode_postings(docs, tfs, docs[0])),
+                )
+                self.db.execute("UPDATE terms SET segments = 1 WHERE term = ?", (term,))
+        # Fold the write-ahead log back into the database file and truncate
+        # it, so the index on disk is one file of its real size.
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return len(terms)
+
+    def postings(self, term):
+        # ([doc ids], [term frequencies]) in doc order.
+        if term not in self._postings:
+            if len(self._postings) >= MAX_CACHED_TERMS:
+                self._postings.clear()
+            docs = []
+            tfs = []
+            for first_doc, data in self.db.execute(
+                "SELECT first_doc, data FROM postings WHERE term = ? ORDER BY first_doc", (term,)
+            ):
+                segment_docs, segment_tfs = decode_postings(data, first_doc)
+                docs += segment_docs
+                tfs += segment_tfs
+            self._postings[term] = (docs, tfs)
+        return self._postings[term]
+
+    def expand(self, node):
+        # The indexed terms a term or prefix node stands for.
+        if node[0] == "term":
+            return [node[1]]
+        return [
+            term for (term,) in self.db.execute(
+                "SELECT term FROM terms WHERE term >= ? AND term < ? ORDER BY df DESC LIMIT ?",
+                (node[1], node[1] + "\uffff", MAX_PREFIX_TERMS),
+            )
+        ]
+
+    def doc_lengths(self):
+        if self._lengths is None:
+            self._lengths = array("I")
+            for (data,) in self.db.execute("SELECT data FROM lengths ORDER BY first_doc"):
+                self._lengths.frombytes(data)
+        return self._lengths
+
+    def match(self, node):
+        # Set of doc ids matching node; None stands for every doc.
+        kind = node[0]
+        if kind == "all":
+            return None
+        if kind in ("term", "prefix"):
+            matched = set()
+            for term in self.expand(node):
+                matched.update(self.postings(term)[0])
+            return matched
+        if kind == "not":
+            inner = self.match(node[1])
+            return set() if inner is None else set(range(self.doc_count)) - inner
+        if kind == "or":
+            matched = set()
+            for child in node[1]:
+                child_docs = self.match(child)
+                if child_docs is None:
+                    return None
+                matched |= child_docs
+            return matched
+        # AND: intersect the positive children smallest first, then take the
+        # negated ones away.
+        positive = []
+        negative = []
+        for child in node[1]:
+            if child[0] == "not":
+                inner = self.match(child[1])
+                if inner is None:
+                    return set()
+                negative.append(inner)
+            else:
+                child_docs = self.match(child)
+                if child_docs is not None:
+                    positive.append(child_docs)
+        positive.sort(key=len)
+        matched = set(positive[0]) if positive else set(range(self.doc_count))
+        for child_docs in positive[1:]:
+            matched &= child_docs
+        for child_docs in negative:
+            matched -= child_docs
+        return matched
+
+    def filter_docs(self, source="", location="", since=""):
+        # Doc ids passing the filters, or None without filters.
+        where = []
+        params = []
+        if source:
+            where.append("source = ? COLLATE NOCASE")
+            params.append(source)
+        if location:
+            where.append("location LIKE ?")
+            params.append(f"%{location}%")
+        if since:
+            where.append("collected_at >= ?")
+            params.append(since)
+        if not where:
+            return None
+        return {doc for (doc,) in self.db.execute(f"SELECT doc FROM docs WHERE {' AND '.join(where)}", params)}
+
+    def search(self, query, ranked=True, any_terms=False, source="", location="", since="", limit=DEFAULT_LIMIT):
+        # Returns (total matches, [(doc, score)]): best BM25 scores first, or
+        # newest first (score None) for boolean searches and queries with
+        # nothing to rank by.
+        node = parse_query(query, any_terms)
+        matched = self.match(node)
+        if matched is None:
+            matched = set(range(self.doc_count))
+        allowed = self.filter_docs(source, location, since)
+        if allowed is not None:
+            matched &= allowed
+        terms = {term for leaf in scored_terms(node) for term in self.expand(leaf)} if ranked else set()
+        if not terms or not matched:
+            return len(matched), [(doc, None) for doc in heapq.nlargest(limit, matched)]
+        count = self.doc_count
+        average = (int(self._meta("total_length", 0)) / count) or 1.0
+        lengths = self.doc_lengths()
+        scores = {}
+        for term in terms:
+            docs, tfs = self.postings(term)
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, tf in zip(docs, tfs):
+                if doc in matched:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc] / average)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return len(matched), heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def documents(self, docs):
+        # {doc: {field: value, "offset": ...}} for the given doc ids.
+        found = {}
+        docs = list(docs)
+        for start in range(0, len(docs), 500):
+            chunk = docs[start:start + 500]
+            for row in self.db.execute(
+                f"SELECT doc, offset, {', '.join(DOC_FIELDS)} FROM docs WHERE doc IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            ):
+                found[row[0]] = {"offset": row[1], **dict(zip(DOC_FIELDS, row[2:]))}
+        return found
+
+    def stats(self):
+        terms, segments = self.db.execute("SELECT COUNT(*), COALESCE(SUM(segments), 0) FROM terms").fetchone()
+        return {
+            "docs": self.doc_count,
+            "terms": terms,
+            "segments": segments,
+            "csv": self.csv_path,
+            "indexed_bytes": int(self._meta("offset", 0)),
+            # Committed pages can still sit in the write-ahead log.
+            "index_bytes": sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p)),
+        }
+
+    def close(self):
+        self.db.close()
+
+
+def update_index(csv_path, index_path=DEFAULT_INDEX, rebuild=False, batch_docs=DEFAULT_BATCH_DOCS):
+    # Brings index_path up to date with csv_path and reports it.
+    started = time.perf_counter()
+    index = JobIndex(index_path)
+    result = index.update(csv_path, rebuild, batch_docs)
+    docs = index.doc_count
+    index.close()
+    how = f"rebuilt ({result['reason']})" if result["reason"] else ("built" if result["rebuilt"] else "updated")
+    print(
+        f"[index] {how} {index_path}: added={result['added']} docs={docs} "
+        f"wall={time.perf_counter() - started:.1f}s",
+        flush=True,
+    )
+    return result
+
+
+def print_results(index, total, results, elapsed):
+    print(f"[search] {total} matches in {elapsed * 1000:.0f} ms", flush=True)
+    details = index.documents(doc for doc, _ in results)
+    for rank, (doc, score) in enumerate(results, 1):
+        d = details.get(doc, {})
+        score_text = "" if score is None else f" {score:.2f}"
+        print(f"{rank:>3}.{score_text} {d.get('title', '')} | {d.get('company', '')} | {d.get('location', '')}")
+        print(f"     {d.get('source', '')} {d.get('collected_at', '')} {d.get('link', '')}".rstrip())
+
+
+def export_results(index, results, path):
+    # The full merged-CSV rows of the results, in rank order.
+    details = index.documents(doc for doc, _ in results)
+    header = json.loads(index._meta("header", "[]"))
+    with open(path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for doc, _ in results:
+            row = read_row_at(index.csv_path, details[doc]["offset"])
+            if row is not None:
+                writer.writerow(row)
+    print(f"[search] wrote {len(results)} rows -> {path}", flush=True)
+
+
+def run_search(index, query, args):
+    started = time.perf_counter()
+    total, results = index.search(
+        query, not args.boolean, args.any, args.source, args.location, parse_since(args.since), args.limit
+    )
+    print_results(index, total, results, time.perf_counter() - started)
+    if args.out:
+        export_results(index, results, args.out)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text index and search over the merged jobs CSV.")
+    parser.add_argument("command", choices=["update", "search", "optimize", "stats"])
+    parser.add_argument("query", nargs="?", default="", help="Search query (search without one prompts for queries).")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="Index path.")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Merged CSV to index (merge_jobs.py output).")
+    parser.add_argument("--rebuild", action="store_true", help="Index the whole CSV again.")
+    parser.add_argument("--batch-docs", type=int, default=DEFAULT_BATCH_DOCS, help="Rows per index transaction.")
+    parser.add_argument("--boolean", action="store_true", help="Unranked matches, newest first, instead of BM25.")
+    parser.add_argument("--any", action="store_true", help="Match any of the words instead of all of them.")
+    parser.add_argument("--source", default="", help="Only this source (google, indeed, reed, ...).")
+    parser.add_argument("--location", default="", help="Only locations containing this text.")
+    parser.add_argument("--since", default="", help="Only jobs collected on/after YYYY-MM-DD, or in the last N days.")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Results to show.")
+    parser.add_argument("--out", default="", help="Also write the results' full CSV rows here.")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.command == "update":
+        update_index(args.csv, args.index, args.rebuild, args.batch_docs)
+        return
+    index = JobIndex(args.index)
+    try:
+        if args.command == "optimize":
+            print(f"[index] merged the posting segments of {index.compact(1)} terms", flush=True)
+        elif args.command == "stats":
+            for name, value in index.stats().items():
+                print(f"[index] {name}={value}")
+        elif args.query:
+            run_search(index, args.query, args)
+        else:
+            # One open index for a whole session: posting lists and doc
+            # lengths stay loaded between queries.
+            while True:
+                try:
+                    query = input("search> ").strip()
+                except (EOFError, KeyboardInterrupt):
+                    print()
+                    break
+                if query:
+                    run_search(index, query, args)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import csv
+import json
+
+from job_store import EXPORT_HEADERS, FIELDS, JobStore, today
+
+
+class JobRecord:
+    # One scraped job, in the job store's field order. __slots__ keeps a
+    # record to the size of its ten strings, so long streams stay cheap.
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, source, title, company="", location="", posted_time="", link="", collected_at="", salary="",
+                 desc_snippet="", desc_full=""):
+        values = (source, title, company, location, posted_time, link, collected_at, salary, desc_snippet, desc_full)
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, (value or "").strip())
+
+    @classmethod
+    def from_google_row(cls, row, collected_at=""):
+        # google_jobs.csv layout: title, company, location, posted, link,
+        # snippet, description, salary.
+        title, company, location, posted_time, link, desc_snippet, desc_full, salary = row
+        return cls("google", title, company, location, posted_time, link, collected_at, salary, desc_snippet,
+                   desc_full)
+
+    @classmethod
+    def from_board_row(cls, row, collected_at=""):
+        # jobs_indeed_reed.csv layout: source, title, company, location, posted, link.
+        source, title, company, location, posted_time, link = row
+        return cls(source, title, company, location, posted_time, link, collected_at)
+
+    def values(self):
+        return [getattr(self, name) for name in FIELDS]
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __eq__(self, other):
+        return isinstance(other, JobRecord) and self.values() == other.values()
+
+    def __repr__(self):
+        return f"JobRecord({self.source!r}, {self.title!r}, {self.company!r}, {self.location!r})"
+
+
+# Sinks consume records: write(record) each, close() at the end. Use them
+# directly, chain several with write_records, or hang them off a scraper's
+# CSV writer with SinkWriter.
+
+
+class CsvSink:
+    # The job store export layout (merge_jobs input, minus salary columns).
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, mode="w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_HEADERS)
+
+    def write(self, record):
+        self._writer.writerow(record.values())
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, mode="w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record.as_dict(), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class StoreSink:
+    # Upserts into a JobStore; records without a date get today's.
+    def __init__(self, path):
+        self.store = JobStore(path)
+
+    def write(self, record):
+        values = record.values()
+        values[FIELDS.index("collected_at")] = values[FIELDS.index("collected_at")] or today()
+        self.store.add(*values)
+
+    def close(self):
+        self.store.close()
+
+
+def open_sink(path):
+    # By extension: .jsonl -> JSON lines, .db/.sqlite -> job store, else CSV.
+    if path.endswith(".jsonl"):
+        return JsonLinesSink(path)
+    if path.endswith((".db", ".sqlite")):
+        return StoreSink(path)
+    return CsvSink(path)
+
+
+def write_records(records, *sinks):
+    # Feeds every record to every sink and closes them; returns the count.
+    written = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            written += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return written
+
+
+class SinkWriter:
+    # csv.writer stand-in for the scrapers: writes the row as before and
+    # hands it, as a JobRecord, to each sink.
+    def __init__(self, writer, sinks, to_record):
+        self.writer = writer
+        self.sinks = sinks
+        self.to_record = to_record
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        record = self.to_record(row)
+        for sink in self.sinks:
+            sink.write(record)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+# Options the library entry points default differently from the command
+# line: an embedding service gets no state files in its working directory
+# (seen-jobs index, rate log) unless it passes a path.
+LIBRARY_DEFAULTS = {"seen_index": "", "rate_log": ""}
+
+
+def scraper_args(parse_args, **options):
+    # A scraper's command-line defaults, with LIBRARY_DEFAULTS and then
+    # options (by flag name, dashes as underscores) applied, for the library
+    # entry points.
+    args = parse_args([])
+    for name, value in LIBRARY_DEFAULTS.items():
+        if hasattr(args, name):
+            setattr(args, name, value)
+    for name, value in options.items():
+        if not hasattr(args, name):
+            raise TypeError(f"unknown option {name!r}")
+        setattr(args, name, value)
+    return args
+
+
+def join_locations(locations):
+    return locations if isinstance(locations, str) else ",".join(locations)
+
+
+def add_sink_args(parser):
+    parser.add_argument(
+        "--sink",
+        action="append",
+        default=[],
+        help="Also stream every job to PATH: .jsonl (JSON lines), .db (job store) or .csv. Repeatable.",
+    )
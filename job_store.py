@@ -0,0 +1,207 @@
+import argparse
+import csv
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+DEFAULT_STORE = "jobs.db"
+DEFAULT_BATCH_SIZE = 500
+# Columns in the order every scraper row is normalised to (see
+# merge_jobs.normalize_row), which is also the export layout.
+FIELDS = [
+    "source",
+    "title",
+    "company",
+    "location",
+    "posted_time",
+    "link",
+    "collected_at",
+    "salary",
+    "desc_snippet",
+    "desc_full",
+]
+EXPORT_HEADERS = [
+    "Source",
+    "Title",
+    "Company",
+    "Location",
+    "Posted Time",
+    "Job Link",
+    "Collected At",
+    "Salary",
+    "Description Snippet",
+    "Description Full",
+]
+# Taken from a later sighting when it has them: it fills blanks and replaces
+# stale values. An older sighting (an earlier collected_at) only fills blanks.
+UPDATED = ["posted_time", "link", "salary", "desc_snippet", "desc_full"]
+
+# SQLite evaluates every SET expression against the stored row, so
+# jobs.collected_at below is the date before this sighting.
+UPSERT_SQL = (
+    f"INSERT INTO jobs (dedup_key, {', '.join(FIELDS)}, first_seen, last_seen)"
+    f" VALUES (?, {', '.join('?' for _ in FIELDS)}, ?, ?)"
+    " ON CONFLICT (dedup_key) DO UPDATE SET last_seen = excluded.last_seen,"
+    " collected_at = MAX(jobs.collected_at, excluded.collected_at)"
+    + "".join(
+        f", {name} = CASE WHEN excluded.{name} != '' AND (jobs.{name} = ''"
+        f" OR excluded.collected_at >= jobs.collected_at) THEN excluded.{name} ELSE jobs.{name} END"
+        for name in UPDATED
+    )
+)
+
+
+def dedup_key(title, company, location):
+    # Same identity as merge_jobs.row_key: title + company + location.
+    return "|".join([title.lower(), company.lower(), location.lower()])
+
+
+def today():
+    return date.today().isoformat()
+
+
+def parse_since(raw_value):
+    # "2026-02-01" or a number of days back ("7").
+    if not raw_value:
+        return ""
+    if raw_value.isdigit():
+        return (date.today() - timedelta(days=int(raw_value))).isoformat()
+    return datetime.strptime(raw_value, "%Y-%m-%d").date().isoformat()
+
+
+class JobStore:
+    # SQLite job table shared by the scrapers and the merge. Rows are upserted
+    # on the dedup key in batched transactions: the first sighting fixes the
+    # source, title, company and location; a later one updates collected_at
+    # (the latest collection date, what --since filters on), last_seen and
+    # the UPDATED fields. added counts new rows, updated rows seen again.
+
+    def __init__(self, path=DEFAULT_STORE, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        self.added = 0
+        self.updated = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY, dedup_key TEXT NOT NULL UNIQUE,"
+            + "".join(f" {name} TEXT NOT NULL DEFAULT ''," for name in FIELDS)
+            + " first_seen TEXT, last_seen TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_source ON jobs (source COLLATE NOCASE, collected_at)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_collected ON jobs (collected_at)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_link ON jobs (link)")
+        self.db.commit()
+
+    def add(self, source, title, company, location, posted_time="", link="", collected_at="", salary="",
+            desc_snippet="", desc_full=""):
+        fields = (source, title, company, location, posted_time, link, collected_at, salary, desc_snippet, desc_full)
+        values = [(v or "").strip() for v in fields]
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._pending.append((dedup_key(values[1], values[2], values[3]), *values, now, now))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self.db:
+            # Rows are never deleted, so new ids are exactly the new rows.
+            before = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM jobs").fetchone()[0]
+            self.db.executemany(UPSERT_SQL, self._pending)
+            added = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM jobs").fetchone()[0] - before
+        self.added += added
+        self.updated += len(self._pending) - added
+        self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def count(self):
+        self.flush()
+        return self.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def iter_rows(self, source="", location="", since=""):
+        # Rows in FIELDS order, oldest sighting first; filters are optional.
+        self.flush()
+        where = []
+        params = []
+        if source:
+            where.append("source = ? COLLATE NOCASE")
+            params.append(source)
+        if location:
+            where.append("location LIKE ?")
+            params.append(f"%{location}%")
+        if since:
+            where.append("collected_at >= ?")
+            params.append(since)
+        sql = f"SELECT {', '.join(FIELDS)} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        for row in self.db.execute(sql + " ORDER BY id", params):
+            yield list(row)
+
+    def summary_line(self, prefix="[store]"):
+        return f"{prefix} {self.added} new, {self.updated} updated rows in {self.path}"
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+class StoreWriter:
+    # csv.writer stand-in for the scrapers: writes the CSV row as before and
+    # also upserts it into the store, via to_record(row) -> JobStore.add args.
+    def __init__(self, writer, store, to_record):
+        self.writer = writer
+        self.store = store
+        self.to_record = to_record
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        self.store.add(*self.to_record(row))
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def add_store_args(parser):
+    parser.add_argument(
+        "--store",
+        default="",
+        help=f"Also upsert every row into this SQLite job store (e.g. {DEFAULT_STORE}).",
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export jobs from the SQLite job store to CSV.")
+    parser.add_argument("--db", default=DEFAULT_STORE, help="Job store path.")
+    parser.add_argument("--out", default="jobs_export.csv", help="Output CSV path.")
+    parser.add_argument("--source", default="", help="Only this source (google, indeed, reed, ...).")
+    parser.add_argument("--location", default="", help="Only locations containing this text.")
+    parser.add_argument("--since", default="", help="Only jobs collected on/after YYYY-MM-DD, or in the last N days.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = JobStore(args.db)
+    count = 0
+    with open(args.out, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADERS)
+        for row in store.iter_rows(args.source, args.location, parse_since(args.since)):
+            writer.writerow(row)
+            count += 1
+    store.close()
+    print(f"Exported {count} jobs -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+# Ad, analytics and tag-manager hosts none of the scrapers read from.
+TRACKER_PATTERNS = [
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*bat.bing.com*",
+    "*scorecardresearch.com*",
+    "*criteo.*",
+    "*adnxs.com*",
+    "*optimizely.com*",
+    "*onetrust.com*",
+    "*cookielaw.org*",
+]
+
+# What each source can do without, matched on the page's host. Resource types
+# are CDP Network.ResourceType names; URL patterns use CDP's "*" wildcards.
+# Google keeps its stylesheets: cards and the detail panel are clicked, which
+# needs a real layout. The boards are only read, so CSS goes too.
+LEAN_PROFILES = {
+    "google": {
+        "hosts": ["google."],
+        "types": ["Image", "Media", "Font"],
+        "patterns": TRACKER_PATTERNS + ["*encrypted-tbn*.gstatic.com*", "*/maps/vt*", "*ogs.google.com*"],
+    },
+    "indeed": {
+        "hosts": ["indeed."],
+        "types": ["Image", "Media", "Font", "Stylesheet"],
+        "patterns": TRACKER_PATTERNS + ["*indeed.com/rpc/log*", "*indeed.com/m/rpc*"],
+    },
+    "reed": {
+        "hosts": ["reed.co.uk"],
+        "types": ["Image", "Media", "Font", "Stylesheet"],
+        "patterns": TRACKER_PATTERNS,
+    },
+    # Anything else, including fixture origins.
+    "default": {
+        "hosts": [],
+        "types": ["Image", "Media", "Font"],
+        "patterns": TRACKER_PATTERNS,
+    },
+}
+
+
+def profile_for(url):
+    host = (urlparse(url).hostname or "").lower()
+    for name, profile in LEAN_PROFILES.items():
+        if any(part in host for part in profile["hosts"]):
+            return name
+    return "default"
+
+
+def lean_options(options):
+    # Launch settings for a browser started in lean mode; the per-request
+    # blocking is set up on each tab by LeanPage.
+    return options.headless().no_imgs().mute()
+
+
+def format_bytes(count):
+    if count >= 1024 * 1024:
+        return f"{count / (1024 * 1024):.1f}MB"
+    return f"{count / 1024:.1f}KB"
+
+
+class LeanPage:
+    # Wraps a DrissionPage tab: blocks the current source's resource types
+    # (paused by Fetch and failed before they hit the network) and URL
+    # patterns (Network.setBlockedURLs), and meters every get(url) — load
+    # time, bytes on the wire, requests sent and blocked. A URL's line is
+    # printed when the next one is loaded or the tab is closed, so XHRs the
+    # page fires after load are counted against it. Everything else is
+    # passed through to the tab.
+
+    def __init__(self, page):
+        self._page = page
+        self.profile = None
+        self._lock = threading.Lock()
+        self._current = None
+        self.totals = {"pages": 0, "bytes": 0, "requests": 0, "blocked": 0, "load": 0.0}
+        page.run_cdp("Network.enable")
+        # Headless Chrome says so in its user agent, which Google answers with
+        # different markup; present as the regular browser instead.
+        user_agent = page.run_cdp("Browser.getVersion").get("userAgent", "")
+        if "HeadlessChrome" in user_agent:
+            page.run_cdp("Network.setUserAgentOverride", userAgent=user_agent.replace("HeadlessChrome", "Chrome"))
+        driver = page.driver
+        driver.set_callback("Network.requestWillBeSent", self._on_request)
+        driver.set_callback("Network.loadingFinished", self._on_finished)
+        driver.set_callback("Network.loadingFailed", self._on_failed)
+        driver.set_callback("Fetch.requestPaused", self._on_paused, immediate=True)
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    def apply(self, name):
+        profile = LEAN_PROFILES[name]
+        self._page.run_cdp("Network.setBlockedURLs", urls=profile["patterns"])
+        if profile["types"]:
+            patterns = [{"urlPattern": "*", "resourceType": t, "requestStage": "Request"} for t in profile["types"]]
+            self._page.run_cdp("Fetch.enable", patterns=patterns)
+        else:
+            self._page.run_cdp("Fetch.disable")
+        self.profile = name
+
+    def _on_paused(self, **event):
+        # Only the profile's blocked resource types are ever paused.
+        try:
+            self._page.run_cdp("Fetch.failRequest", requestId=event["requestId"], errorReason="BlockedByClient")
+        except Exception:
+            pass
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            if self._current is not None:
+                self._current[name] += amount
+
+    def _on_request(self, **event):
+        self._count("requests")
+
+    def _on_finished(self, **event):
+        self._count("bytes", int(event.get("encodedDataLength") or 0))
+
+    def _on_failed(self, **event):
+        if event.get("blockedReason") or "BLOCKED_BY_CLIENT" in (event.get("errorText") or ""):
+            self._count("blocked")
+
+    def _report(self):
+        with self._lock:
+            current, self._current = self._current, None
+        if current is None:
+            return
+        for name in ("bytes", "requests", "blocked", "load"):
+            self.totals[name] += current[name]
+        self.totals["pages"] += 1
+        print(
+            f"[lean] profile={current['profile']} url={current['url']} load={current['load']:.2f}s "
+            f"bytes={format_bytes(current['bytes'])} requests={current['requests']} blocked={current['blocked']}",
+            flush=True,
+        )
+
+    def get(self, url, *args, **kwargs):
+        self._report()
+        name = profile_for(url)
+        if name != self.profile:
+            self.apply(name)
+        with self._lock:
+            self._current = {"profile": name, "url": url, "bytes": 0, "requests": 0, "blocked": 0, "load": 0.0}
+            current = self._current
+        started = time.perf_counter()
+        try:
+            return self._page.get(url, *args, **kwargs)
+        finally:
+            current["load"] = time.perf_counter() - started
+
+    def summary_line(self):
+        pages = self.totals["pages"]
+        average = self.totals["load"] / pages if pages else 0.0
+        return (
+            f"[lean] pages={pages} bytes={format_bytes(self.totals['bytes'])} "
+            f"requests={self.totals['requests']} blocked={self.totals['blocked']} avg_load={average:.2f}s"
+        )
+
+    def close(self):
+        self._report()
+        if self.totals["pages"]:
+            print(self.summary_line(), flush=True)
+        self._page.close()
@@ -1,9 +1,26 @@
+import argparse
 import csv
 import glob
+import hashlib
 import os
+import tempfile
 from datetime import datetime
+from functools import lru_cache
+
+import fuzzy_dedup
+from fuzzy_dedup import FuzzyIndex, SqliteFuzzyIndex
+from job_index import update_index
+from job_store import JobStore
+from merge_state import DEFAULT_STATE_FILE, MergeState
+from salary import format_amount, parse_salary
 
 OUTPUT_FILE = "jobs_all.csv"
+DEFAULT_MEMORY_LIMIT_MB = 256
+DEFAULT_PARTITIONS = 16
+MAX_SPILL_LEVELS = 3
+# Rough cost of one 64-bit hashed key in a Python set (int object + slot).
+KEY_BYTES = 72
+SALARY_CACHE_SIZE = 65536
 
 # Known input files
 INPUT_FILES = [
@@ -19,10 +36,19 @@ STANDARD_HEADERS = [
     "Posted Time",
     "Job Link",
     "Collected At",
+    "Salary",
+    "Salary Min",
+    "Salary Max",
+    "Salary Currency",
+    "Salary Period",
+    "Description Snippet",
+    "Description Full",
+    "Cluster ID",
 ]
 
 
-def normalize_row(source, title, company, location, posted_time, job_link, collected_at):
+def normalize_row(source, title, company, location, posted_time, job_link, collected_at, salary="",
+                  desc_snippet="", desc_full=""):
     return [
         source.strip(),
         title.strip(),
@@ -31,9 +57,31 @@ def normalize_row(source, title, company, location, posted_time, job_link, colle
         posted_time.strip(),
         job_link.strip(),
         collected_at.strip(),
+        salary.strip(),
+        desc_snippet.strip(),
+        desc_full.strip(),
     ]
 
 
+def google_salary(r):
+    # google_s layout keeps Salary after the two description columns.
+    return r[7] if len(r) > 7 else ""
+
+
+def google_descriptions(r):
+    return (r[5] if len(r) > 5 else "", r[6] if len(r) > 6 else "")
+
+
+def google_row(r):
+    # google_jobs.csv row -> normalised row.
+    return normalize_row("google", r[0], r[1], r[2], r[3], r[4], "", google_salary(r), *google_descriptions(r))
+
+
+def board_row(r):
+    # jobs_indeed_reed.csv row -> normalised row.
+    return normalize_row(r[0], r[1], r[2], r[3], r[4], r[5], "")
+
+
 def row_key(row):
     # Deduplicate by title + company + location
     return "|".join([
@@ -49,60 +97,50 @@ def has_header(row):
 
 
 def read_google_s(path):
-    rows = []
     with open(path, newline="", encoding="utf-8") as f:
         reader = csv.reader(f)
         first = next(reader, None)
         if not first:
-            return rows
+            return
         if has_header(first):
             for r in reader:
                 if len(r) < 5:
                     continue
-                rows.append(normalize_row(
-                    "google",
-                    r[0], r[1], r[2], r[3], r[4], ""
-                ))
+                yield google_row(r)
         else:
             # No header; assume google_s layout
             r = first
             if len(r) >= 5:
-                rows.append(normalize_row("google", r[0], r[1], r[2], r[3], r[4], ""))
+                yield google_row(r)
             for r in reader:
                 if len(r) < 5:
                     continue
-                rows.append(normalize_row("google", r[0], r[1], r[2], r[3], r[4], ""))
-    return rows
+                yield google_row(r)
 
 
 def read_indeed_reed(path):
-    rows = []
     with open(path, newline="", encoding="utf-8") as f:
         reader = csv.reader(f)
         first = next(reader, None)
         if not first:
-            return rows
+            return
         if has_header(first):
             for r in reader:
                 if len(r) < 6:
                     continue
-                rows.append(normalize_row(
-                    r[0], r[1], r[2], r[3], r[4], r[5], ""
-                ))
+                yield board_row(r)
         else:
             r = first
             if len(r) >= 6:
-                rows.append(normalize_row(r[0], r[1], r[2], r[3], r[4], r[5], ""))
+                yield board_row(r)
             for r in reader:
                 if len(r) < 6:
                     continue
-                rows.append(normalize_row(r[0], r[1], r[2], r[3], r[4], r[5], ""))
-    return rows
+                yield board_row(r)
 
 
 def read_data_recorder(path):
     # Expected tuple: (source_label, num, title, company, location, posted_time, link)
-    rows = []
     collected_at = ""
     try:
         base = os.path.basename(path)
@@ -117,7 +155,7 @@ def read_data_recorder(path):
         reader = csv.reader(f)
         first = next(reader, None)
         if not first:
-            return rows
+            return
         if has_header(first):
             # Try to map by header names if present
             headers = [h.lower() for h in first]
@@ -130,11 +168,14 @@ def read_data_recorder(path):
             i_location = idx("location")
             i_posted = idx("posted time") if "posted time" in headers else idx("posted")
             i_link = idx("job link") if "job link" in headers else idx("link")
+            i_salary = idx("salary")
+            i_snippet = idx("description snippet")
+            i_full = idx("description full")
 
             for r in reader:
                 if i_title is None or i_company is None or i_location is None:
                     continue
-                rows.append(normalize_row(
+                yield normalize_row(
                     r[i_source] if i_source is not None else "google",
                     r[i_title],
                     r[i_company],
@@ -142,54 +183,374 @@ def read_data_recorder(path):
                     r[i_posted] if i_posted is not None else "",
                     r[i_link] if i_link is not None else "",
                     collected_at,
-                ))
+                    r[i_salary] if i_salary is not None and i_salary < len(r) else "",
+                    r[i_snippet] if i_snippet is not None and i_snippet < len(r) else "",
+                    r[i_full] if i_full is not None and i_full < len(r) else "",
+                )
         else:
             # No header; assume tuple order
             r = first
             if len(r) >= 7:
-                rows.append(normalize_row(
+                yield normalize_row(
                     r[0], r[2], r[3], r[4], r[5], r[6], collected_at
-                ))
+                )
             for r in reader:
                 if len(r) < 7:
                     continue
-                rows.append(normalize_row(
+                yield normalize_row(
                     r[0], r[2], r[3], r[4], r[5], r[6], collected_at
-                ))
-    return rows
+                )
 
 
-def main():
-    combined = []
+def read_input(path):
+    lower = os.path.basename(path).lower()
+    if lower == "google_jobs.csv":
+        return read_google_s(path)
+    if lower == "jobs_indeed_reed.csv":
+        return read_indeed_reed(path)
+    if lower.startswith("data_"):
+        return read_data_recorder(path)
+    return iter(())
 
-    for path in INPUT_FILES:
+
+def iter_input_rows(paths):
+    # Rows from every input file, one at a time.
+    for path in paths:
         if not os.path.exists(path):
             continue
-        lower = path.lower()
-        if lower == "google_jobs.csv":
-            combined.extend(read_google_s(path))
-        elif lower == "jobs_indeed_reed.csv":
-            combined.extend(read_indeed_reed(path))
-        elif lower.startswith("data_"):
-            combined.extend(read_data_recorder(path))
-
-    # Deduplicate
+        yield from read_input(path)
+
+
+def hashed_key(row):
+    # 64-bit digest of row_key: a set of small ints costs far less than a set
+    # of the key strings themselves. Signed so it fits a SQLite INTEGER.
+    digest = hashlib.blake2b(row_key(row).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class SpillPartitions:
+    # Rows that arrive after the in-memory key set is full, hash-partitioned
+    # into CSV files so each partition can be deduplicated on its own.
+    def __init__(self, count, spill_dir=None, level=0):
+        self.count = count
+        self.level = level
+        self.rows = 0
+        self.dir = tempfile.mkdtemp(prefix="merge_spill_", dir=spill_dir)
+        self.paths = [os.path.join(self.dir, f"part_{i:03d}.csv") for i in range(count)]
+        self._files = [open(path, "w", newline="", encoding="utf-8") for path in self.paths]
+        self._writers = [csv.writer(f) for f in self._files]
+
+    def write(self, key, row):
+        # Mixing in the level keeps a re-partitioned partition from landing in
+        # a single child.
+        self._writers[hash((self.level, key)) % self.count].writerow([key] + row)
+        self.rows += 1
+
+    def partitions(self):
+        for f in self._files:
+            f.close()
+        for path in self.paths:
+            with open(path, newline="", encoding="utf-8") as f:
+                yield ((int(r[0]), r[1:]) for r in csv.reader(f))
+            os.remove(path)
+        os.rmdir(self.dir)
+
+
+def dedup_keyed(keyed_rows, max_keys, partitions=DEFAULT_PARTITIONS, spill_dir=None, stats=None, level=0):
+    # Yields the first row for each key, as soon as it is accepted, while at
+    # most max_keys keys are held in memory. Past that, unseen rows are
+    # spilled to disk partitions and deduplicated one partition at a time
+    # after the input ends, so those rows come out grouped by partition.
     seen = set()
-    deduped = []
-    for row in combined:
-        key = row_key(row)
+    spill = None
+    for key, row in keyed_rows:
         if key in seen:
             continue
-        seen.add(key)
-        deduped.append(row)
+        if spill is None and len(seen) < max_keys:
+            seen.add(key)
+            yield row
+            continue
+        if spill is None:
+            spill = SpillPartitions(partitions, spill_dir, level)
+        spill.write(key, row)
+    if spill is None:
+        return
+    seen.clear()
+    if stats is not None and level == 0:
+        stats["spilled"] = spill.rows
+    for part in spill.partitions():
+        if level >= MAX_SPILL_LEVELS:
+            # Pathological key distribution; finish this partition in memory.
+            yield from dedup_keyed(part, float("inf"), partitions, spill_dir, stats, level + 1)
+        else:
+            yield from dedup_keyed(part, max_keys, partitions, spill_dir, stats, level + 1)
+
+
+def stream_dedup(rows, max_keys, partitions=DEFAULT_PARTITIONS, spill_dir=None, stats=None):
+    stats = stats if stats is not None else {}
+    stats.update(read=0, unique=0, spilled=0)
+
+    def keyed():
+        for row in rows:
+            stats["read"] += 1
+            yield hashed_key(row), row
+
+    for row in dedup_keyed(keyed(), max_keys, partitions, spill_dir, stats):
+        stats["unique"] += 1
+        yield row
+
+
+@lru_cache(maxsize=SALARY_CACHE_SIZE)
+def salary_columns(salary):
+    # Salary Min/Max/Currency/Period for one Salary string; repeated strings
+    # are parsed once.
+    parsed = parse_salary(salary.strip())
+    return [
+        format_amount(parsed["min"]),
+        format_amount(parsed["max"]),
+        parsed["currency"],
+        parsed["period"],
+    ]
+
+
+def output_row(row, cluster_id):
+    # Normalised row -> STANDARD_HEADERS order.
+    return row[:8] + salary_columns(row[7]) + row[8:] + [cluster_id]
+
+
+def label_clusters(rows, index, drop=False, stats=None):
+    # Tags each exact-unique row with its near-duplicate cluster; with drop
+    # set, only the first row of each cluster is kept.
+    for row in rows:
+        if index is None:
+            yield output_row(row, "")
+            continue
+        cluster_id, is_new = index.assign(row[1], row[2], row[3], row[9])
+        if not is_new and stats is not None:
+            stats["fuzzy"] = stats.get("fuzzy", 0) + 1
+        if is_new or not drop:
+            yield output_row(row, cluster_id)
+
+
+def fuzzy_index(args, state=None):
+    # Opt-in: outside --incremental the LSH index lives in memory and grows
+    # with every unique row, which --memory-limit-mb doesn't cover.
+    if not (args.fuzzy or args.fuzzy_drop):
+        return None
+    settings = {"threshold": args.fuzzy_threshold, "desc_threshold": args.desc_threshold, "perms": args.minhash_perms}
+    if state is not None:
+        return SqliteFuzzyIndex(state.db, **settings)
+    return FuzzyIndex(**settings)
+
+
+def output_layout(args):
+    # Everything that changes which rows are written or how they look.
+    fuzzy = "off" if not (args.fuzzy or args.fuzzy_drop) else (
+        f"{args.fuzzy_threshold}/{args.desc_threshold}/{args.minhash_perms}/{'drop' if args.fuzzy_drop else 'tag'}"
+    )
+    return "|".join(STANDARD_HEADERS) + f"|fuzzy={fuzzy}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Merge scraped job CSVs into one deduplicated file.")
+    parser.add_argument("--out", default=OUTPUT_FILE, help="Output CSV path.")
+    parser.add_argument(
+        "--memory-limit-mb",
+        type=float,
+        default=DEFAULT_MEMORY_LIMIT_MB,
+        help="Memory for the in-memory dedup keys; later unique rows spill to disk partitions.",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=DEFAULT_PARTITIONS,
+        help="Disk partitions to spill into once the memory limit is reached.",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        default=None,
+        help="Directory for spill files (default: system temp dir).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only read new or changed inputs and append rows not merged before.",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="With --incremental, rebuild the output and state from every input.",
+    )
+    parser.add_argument(
+        "--state",
+        default=DEFAULT_STATE_FILE,
+        help="Incremental state: input manifest and merged dedup keys.",
+    )
+    parser.add_argument(
+        "--store",
+        default="",
+        help="Dedup by upserting into this SQLite job store (e.g. jobs.db) and write the output from it.",
+    )
+    parser.add_argument(
+        "--skip-inputs",
+        action="store_true",
+        help="With --store, don't read the CSV inputs; export only what the scrapers already stored.",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Cluster near-duplicates into Cluster ID (off: left empty). Held in memory unless --incremental.",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=fuzzy_dedup.DEFAULT_THRESHOLD,
+        help="Min title/company/location similarity (0-1) for two rows to share a cluster.",
+    )
+    parser.add_argument(
+        "--desc-threshold",
+        type=float,
+        default=fuzzy_dedup.DEFAULT_DESC_THRESHOLD,
+        help="Min description similarity (0-1) when both rows have a description.",
+    )
+    parser.add_argument(
+        "--minhash-perms",
+        type=int,
+        default=fuzzy_dedup.DEFAULT_PERMS,
+        help="MinHash signature length; more is more accurate and slower.",
+    )
+    parser.add_argument(
+        "--fuzzy-drop",
+        action="store_true",
+        help="Write only the first row of each near-duplicate cluster (implies --fuzzy).",
+    )
+    parser.add_argument(
+        "--index",
+        default="",
+        help="Then bring this full-text search index (e.g. jobs_index.db) up to date with the output.",
+    )
+    return parser.parse_args(argv)
+
+
+def merge_incremental(args):
+    # Appends to args.out only the unseen rows of inputs that are new or
+    # changed since the last run; the dedup keys live in the state DB, not in
+    # memory.
+    state = MergeState(args.state)
+    index = fuzzy_index(args, state)
+    rebuild = args.rebuild or not state.output_matches(args.out, output_layout(args))
+    if rebuild:
+        state.reset()
+        if index is not None:
+            index.reset()
+    paths = [path for path in INPUT_FILES if os.path.exists(path)]
+    changed = []
+    for path in paths:
+        change = state.input_change(path)
+        if change is not None:
+            changed.append((path, change))
+
+    stats = {"read": 0, "unique": 0}
+
+    def new_rows(path):
+        for row in read_input(path):
+            stats["read"] += 1
+            if state.add_key(hashed_key(row)):
+                stats["unique"] += 1
+                yield row
+
+    written = 0
+    with open(args.out, mode="w" if rebuild else "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if rebuild:
+            writer.writerow(STANDARD_HEADERS)
+        for path, change in changed:
+            for out in label_clusters(new_rows(path), index, args.fuzzy_drop, stats):
+                writer.writerow(out)
+                written += 1
+            state.record_input(path, change)
+    state.finish(args.out, output_layout(args))
+    state.close()
+
+    mode = "rebuilt" if rebuild else "appended"
+    print(f"[merge] {len(changed)} of {len(paths)} inputs new or changed; {mode} {written} rows")
+    print_fuzzy_summary(stats, index, args.fuzzy_drop)
+    print(f"Merged {stats['read']} rows into {stats['unique']} new unique rows -> {args.out}")
+
+
+def print_fuzzy_summary(stats, index, drop):
+    if index is None:
+        return
+    action = "dropped" if drop else "tagged"
+    print(
+        f"[merge] near-duplicates {action}={stats.get('fuzzy', 0)} clusters={index.clusters} "
+        f"lsh={index.bands}x{index.rows_per_band}",
+        flush=True,
+    )
 
-    with open(OUTPUT_FILE, mode="w", newline="", encoding="utf-8") as f:
+
+def merge_store(args):
+    # The store's unique dedup key replaces the in-memory seen set: CSV rows
+    # are upserted into it, then the whole store is written out in
+    # first-seen order.
+    store = JobStore(args.store)
+    read = 0
+    if not args.skip_inputs:
+        for row in iter_input_rows(INPUT_FILES):
+            store.add(*row)
+            read += 1
+        store.flush()
+
+    stats = {}
+    index = fuzzy_index(args)
+    written = 0
+    with open(args.out, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(STANDARD_HEADERS)
-        for row in deduped:
-            writer.writerow(row)
+        for out in label_clusters(store.iter_rows(), index, args.fuzzy_drop, stats):
+            writer.writerow(out)
+            written += 1
+    store.close()
+
+    print_fuzzy_summary(stats, index, args.fuzzy_drop)
+    print(f"Merged {read} rows into {args.store}; wrote {written} rows -> {args.out}")
+
 
-    print(f"Merged {len(combined)} rows into {len(deduped)} unique rows -> {OUTPUT_FILE}")
+def merge_rows(rows, args):
+    # Dedups, clusters and writes normalised rows to args.out. Rows are
+    # streamed and written as soon as they are accepted; only the hashed
+    # dedup keys stay in memory. Returns the stats dict.
+    max_keys = max(int(args.memory_limit_mb * 1024 * 1024 / KEY_BYTES), 1)
+    partitions = max(args.partitions, 2)
+    stats = {}
+    index = fuzzy_index(args)
+
+    with open(args.out, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(STANDARD_HEADERS)
+        unique_rows = stream_dedup(rows, max_keys, partitions, args.spill_dir, stats)
+        for out in label_clusters(unique_rows, index, args.fuzzy_drop, stats):
+            writer.writerow(out)
+
+    if stats["spilled"]:
+        print(f"[merge] memory limit reached; spilled {stats['spilled']} rows to {partitions} partitions")
+    print_fuzzy_summary(stats, index, args.fuzzy_drop)
+    print(f"Merged {stats['read']} rows into {stats['unique']} unique rows -> {args.out}")
+    return stats
+
+
+def main():
+    args = parse_args()
+    if args.store and args.incremental:
+        raise SystemExit("--store and --incremental are separate modes; pick one")
+    if args.store:
+        merge_store(args)
+    elif args.incremental:
+        merge_incremental(args)
+    else:
+        merge_rows(iter_input_rows(INPUT_FILES), args)
+    if args.index:
+        update_index(args.out, args.index)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import sqlite3
+
+DEFAULT_STATE_FILE = "merge_state.db"
+HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MergeState:
+    # What an incremental merge has already consumed: every input's size,
+    # mtime and content hash, the hashed dedup keys of every row written, and
+    # the output file's size and layout (header plus any settings that shape
+    # the rows) so a truncated, edited or differently shaped output forces a
+    # rebuild. Nothing is committed until finish(), so an interrupted run is
+    # rebuilt next time.
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS inputs (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, sha256 TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS keys (key INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def _meta(self, name):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def output_matches(self, out_path, layout):
+        # The output is exactly what the last finished run left behind.
+        if not os.path.exists(out_path):
+            return False
+        return (
+            self._meta("output") == os.path.abspath(out_path)
+            and self._meta("output_size") == str(os.path.getsize(out_path))
+            and self._meta("layout") == layout
+        )
+
+    def reset(self):
+        self.db.execute("DELETE FROM inputs")
+        self.db.execute("DELETE FROM keys")
+        self.db.execute("DELETE FROM meta")
+
+    def input_change(self, path):
+        # None if the input is unchanged since it was last merged, else the
+        # (size, mtime, sha256) to record once it has been read. The hash is
+        # only computed when size or mtime moved.
+        stat = os.stat(path)
+        row = self.db.execute(
+            "SELECT size, mtime, sha256 FROM inputs WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return None
+        sha256 = file_sha256(path)
+        if row and row[2] == sha256:
+            # Touched but identical; just remember the new mtime.
+            self.record_input(path, (stat.st_size, stat.st_mtime, sha256))
+            return None
+        return stat.st_size, stat.st_mtime, sha256
+
+    def record_input(self, path, change):
+        self.db.execute(
+            "INSERT OR REPLACE INTO inputs (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+            (os.path.abspath(path), *change),
+        )
+
+    def add_key(self, key):
+        # True if the key was not seen before (the row should be written).
+        cursor = self.db.execute("INSERT OR IGNORE INTO keys (key) VALUES (?)", (key,))
+        return cursor.rowcount == 1
+
+    def finish(self, out_path, layout):
+        for name, value in (
+            ("output", os.path.abspath(out_path)),
+            ("output_size", str(os.path.getsize(out_path))),
+            ("layout", layout),
+        ):
+            self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
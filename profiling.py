@@ -0,0 +1,274 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = "jobscraper"
+QUANTILES = [0.5, 0.95, 0.99]
+TOP_SPANS = 12
+# Durations kept per step for the quantiles.
+SAMPLE_SIZE = 1024
+
+_PROFILER = None
+
+
+class _Span:
+    # Handed to the with-block; set .ok = False when the step came back empty
+    # (e.g. a selector that never resolved) so it counts as a failure.
+    __slots__ = ("ok",)
+
+    def __init__(self):
+        self.ok = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _Span()
+
+
+class Profiler:
+    # Timing spans and event counters for one run. Each span is written to
+    # the JSON lines file (if any) as it ends and folded into running
+    # per-step aggregates, so memory stays flat however long the run is;
+    # quantiles come from a bounded sample per step. Safe to use from the
+    # scraper worker threads.
+
+    def __init__(self, jsonl_path=""):
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.steps = {}
+        self.counters = {}
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._file = open(jsonl_path, "w", encoding="utf-8") if jsonl_path else None
+        if self._file is not None:
+            self._file.write(json.dumps({"type": "run", "started_at": self.started_at}) + "\n")
+
+    @contextmanager
+    def span(self, name, labels):
+        span = _Span()
+        begin = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except Exception as e:
+            span.ok = False
+            error = type(e).__name__
+            raise
+        finally:
+            self._record(name, labels, begin, time.perf_counter() - begin, span.ok, error)
+
+    def _record(self, name, labels, begin, seconds, ok, error):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            step = self.steps.get(key)
+            if step is None:
+                step = self.steps[key] = {"count": 0, "total": 0.0, "max": 0.0, "failures": 0, "sample": []}
+            step["count"] += 1
+            step["total"] += seconds
+            step["max"] = max(step["max"], seconds)
+            step["failures"] += not ok
+            # Reservoir sampling: every span so far is equally likely to be
+            # among the SAMPLE_SIZE kept.
+            if len(step["sample"]) < SAMPLE_SIZE:
+                step["sample"].append((seconds, ok))
+            else:
+                slot = random.randrange(step["count"])
+                if slot < SAMPLE_SIZE:
+                    step["sample"][slot] = (seconds, ok)
+            if self._file is not None:
+                event = {
+                    "type": "span",
+                    "name": name,
+                    "labels": labels,
+                    "start": round(begin - self.started, 6),
+                    "seconds": round(seconds, 6),
+                    "ok": ok,
+                    "thread": threading.current_thread().name,
+                }
+                if error:
+                    event["error"] = error
+                self._file.write(json.dumps(event) + "\n")
+
+    def count(self, name, amount, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def span_stats(self):
+        # (name, labels) -> count, total, max, failures and quantiles.
+        with self._lock:
+            steps = {key: dict(step, sample=list(step["sample"])) for key, step in self.steps.items()}
+        stats = {}
+        for key, step in steps.items():
+            seconds = sorted(value for value, _ in step["sample"])
+            stats[key] = {
+                "count": step["count"],
+                "total": step["total"],
+                "max": step["max"],
+                "failures": step["failures"],
+                "quantiles": {q: seconds[min(len(seconds) - 1, int(q * len(seconds)))] for q in QUANTILES},
+            }
+        return stats
+
+    def sampled_seconds(self, name):
+        # Sampled durations of the successful spans called name, any labels.
+        with self._lock:
+            return [
+                value
+                for (step_name, _), step in self.steps.items()
+                if step_name == name
+                for value, ok in step["sample"]
+                if ok
+            ]
+
+    def close_jsonl(self):
+        # Appends the counter totals and closes the JSON lines file.
+        with self._lock:
+            if self._file is None:
+                return
+            for (name, labels), value in sorted(self.counters.items()):
+                line = {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+                self._file.write(json.dumps(line) + "\n")
+            self._file.close()
+            self._file = None
+
+    def write_prometheus(self, path):
+        with self._lock:
+            counters = dict(self.counters)
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_seconds Time spent in each scraper step.",
+            f"# TYPE {METRIC_PREFIX}_span_seconds summary",
+        ]
+        stats = self.span_stats()
+        for (name, labels), step in sorted(stats.items()):
+            base = (("span", name),) + labels
+            for q, value in step["quantiles"].items():
+                lines.append(f"{METRIC_PREFIX}_span_seconds{format_labels(base + (('quantile', str(q)),))} {value:.6f}")
+            lines.append(f"{METRIC_PREFIX}_span_seconds_sum{format_labels(base)} {step['total']:.6f}")
+            lines.append(f"{METRIC_PREFIX}_span_seconds_count{format_labels(base)} {step['count']}")
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_max_seconds Slowest single run of each step.",
+            f"# TYPE {METRIC_PREFIX}_span_max_seconds gauge",
+        ]
+        for (name, labels), step in sorted(stats.items()):
+            base = (("span", name),) + labels
+            lines.append(f"{METRIC_PREFIX}_span_max_seconds{format_labels(base)} {step['max']:.6f}")
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_failures_total Steps that raised or came back empty.",
+            f"# TYPE {METRIC_PREFIX}_span_failures_total counter",
+        ]
+        for (name, labels), step in sorted(stats.items()):
+            base = (("span", name),) + labels
+            lines.append(f"{METRIC_PREFIX}_span_failures_total{format_labels(base)} {step['failures']}")
+        lines += [
+            f"# HELP {METRIC_PREFIX}_events_total Counted events, e.g. selector fallbacks.",
+            f"# TYPE {METRIC_PREFIX}_events_total counter",
+        ]
+        for (name, labels), value in sorted(counters.items()):
+            lines.append(f"{METRIC_PREFIX}_events_total{format_labels((('event', name),) + labels)} {value}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def summary_lines(self, prefix="[profile]"):
+        stats = sorted(self.span_stats().items(), key=lambda item: item[1]["total"], reverse=True)
+        lines = []
+        for (name, labels), step in stats[:TOP_SPANS]:
+            label_text = "".join(f" {k}={v}" for k, v in labels)
+            lines.append(
+                f"{prefix} span={name}{label_text} count={step['count']} total={step['total']:.1f}s "
+                f"avg={step['total'] / step['count']:.3f}s p95={step['quantiles'][0.95]:.3f}s "
+                f"max={step['max']:.3f}s failed={step['failures']}"
+            )
+        with self._lock:
+            counters = sorted(self.counters.items())
+        for (name, labels), value in counters:
+            label_text = "".join(f" {k}={v}" for k, v in labels)
+            lines.append(f"{prefix} event={name}{label_text} count={value}")
+        return lines
+
+
+def format_labels(pairs):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+def enable(prefix=""):
+    # With a prefix, spans are streamed to <prefix>.jsonl as they end.
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = Profiler(f"{prefix}.jsonl" if prefix else "")
+    return _PROFILER
+
+
+def enabled():
+    return _PROFILER is not None
+
+
+def span(name, **labels):
+    # with span("navigate", source="google") as s: ...
+    # A shared no-op unless profiling was enabled for this run.
+    if _PROFILER is None:
+        return _NULL_SPAN
+    return _PROFILER.span(name, labels)
+
+
+def span_seconds(name):
+    # A sample (up to SAMPLE_SIZE per label set) of the successful spans'
+    # durations called name.
+    if _PROFILER is None:
+        return []
+    return _PROFILER.sampled_seconds(name)
+
+
+def count(name, amount=1, **labels):
+    if _PROFILER is not None:
+        _PROFILER.count(name, amount, labels)
+
+
+class ProfiledWriter:
+    # csv.writer stand-in timing every write as a write_csv span.
+    def __init__(self, writer, source):
+        self.writer = writer
+        self.source = source
+
+    def writerow(self, row):
+        with span("write_csv", source=self.source):
+            self.writer.writerow(row)
+
+    def writerows(self, rows):
+        with span("write_csv", source=self.source):
+            self.writer.writerows(rows)
+
+
+def profiled_writer(writer, source):
+    return ProfiledWriter(writer, source) if enabled() else writer
+
+
+def finish(prefix):
+    # Completes <prefix>.jsonl, writes <prefix>.prom and prints the slowest
+    # steps.
+    if _PROFILER is None:
+        return
+    _PROFILER.close_jsonl()
+    _PROFILER.write_prometheus(f"{prefix}.prom")
+    for line in _PROFILER.summary_lines():
+        print(line, flush=True)
+    print(f"[profile] wrote {prefix}.jsonl and {prefix}.prom", flush=True)
+
+
+def add_profile_args(parser, default_prefix):
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=default_prefix,
+        default="",
+        help=f"Time each step and write PREFIX.jsonl and PREFIX.prom (default prefix: {default_prefix}).",
+    )
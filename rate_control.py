@@ -0,0 +1,294 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+BLOCK_STATUSES = {403, 429, 503}
+# Lower-case text of the interstitials that replace a results page: Google's
+# /sorry/ page and consent wall, reCAPTCHA/hCaptcha and the usual bot walls.
+BLOCK_MARKERS = [
+    "our systems have detected unusual traffic",
+    "/sorry/index",
+    "g-recaptcha",
+    "recaptcha/api",
+    "hcaptcha",
+    "captcha-delivery",
+    "px-captcha",
+    "cf-chl-",
+    "challenge-platform",
+    "are you a robot",
+    "verify you are human",
+    "consent.google.com",
+    "before you continue to google",
+    "request unsuccessful. incapsula",
+    "access denied",
+]
+DEFAULT_START_INTERVAL = 1.0
+DEFAULT_RETRIES = 2
+# Empty first pages in a row, on a domain that has been returning cards,
+# before the last one counts as a block. One empty page is usually a search
+# with no results.
+EMPTY_STREAK = 3
+# Fastest pace the controller will climb to (seconds between starts).
+MIN_INTERVAL = 0.05
+MAX_INTERVAL = 60.0
+# Additive increase: requests/second added after every INCREASE_WINDOW clean
+# pages (plus one concurrent slot, up to the configured maximum).
+INCREASE = 0.1
+INCREASE_WINDOW = 4
+# Multiplicative decrease on a block, for the rate and the concurrency.
+DECREASE = 0.5
+BASE_COOLDOWN = 5.0
+MAX_COOLDOWN = 300.0
+JITTER = 0.5
+POLL = 0.05
+
+
+class Blocked(Exception):
+    def __init__(self, reason, url=""):
+        super().__init__(f"blocked ({reason}) {url}".strip())
+        self.reason = reason
+        self.url = url
+
+
+def detect_block(status=None, html="", cards=0, url="", expect_cards=False):
+    # Why this response looks like a block page, or "". Markers only count on
+    # pages without cards, so a results page that happens to load a captcha
+    # script for some widget is not a block. expect_cards marks a first
+    # results page that should not be empty (see DomainController.expects_cards):
+    # coming back empty is then suspicious too.
+    if status in BLOCK_STATUSES:
+        return f"status_{status}"
+    if cards:
+        return ""
+    text = f"{url}\n{(html or '')[:200000]}".lower()
+    for marker in BLOCK_MARKERS:
+        if marker in text:
+            return f"marker:{marker}"
+    if expect_cards:
+        return "zero_cards"
+    return ""
+
+
+class DomainController:
+    # AIMD pacing for one domain. Every request waits in acquire() for a free
+    # slot and its start time; release() reports whether the response was a
+    # block. Clean responses add rate and slots a little at a time; a block
+    # halves both and pauses the domain for a jittered cooldown that doubles
+    # with each block in a row. Blocks reported while a cooldown is running
+    # come from requests already in flight and don't cut the rate again.
+
+    def __init__(self, domain, interval=DEFAULT_START_INTERVAL, max_concurrency=1, adaptive=True):
+        self.domain = domain
+        self.adaptive = adaptive
+        self.rate = 1.0 / max(interval, MIN_INTERVAL)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.concurrency = self.max_concurrency
+        self.in_flight = 0
+        self.requests = 0
+        self.blocks = 0
+        self.clean_streak = 0
+        self.consecutive_blocks = 0
+        self.seen_cards = False
+        self.empty_streak = 0
+        self.peak_rate = self.rate
+        self.events = []
+        self._next_start = 0.0
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # 0 when a slot and a start time were taken, else seconds to wait.
+        with self._lock:
+            now = time.monotonic()
+            if self.in_flight >= self.concurrency:
+                return POLL
+            start = max(self._next_start, self._cooldown_until)
+            if start > now:
+                return start - now
+            self.in_flight += 1
+            self._next_start = now + 1.0 / self.rate
+            return 0.0
+
+    def acquire(self):
+        while True:
+            delay = self._reserve()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def expects_cards(self):
+        # True once EMPTY_STREAK - 1 first pages in a row came back empty on a
+        # domain that has returned cards, so the next empty one is a block.
+        with self._lock:
+            return self.seen_cards and self.empty_streak + 1 >= EMPTY_STREAK
+
+    def release(self, reason="", url="", cards=0, first_page=False):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.requests += 1
+            if cards:
+                self.seen_cards = True
+                self.empty_streak = 0
+            elif reason == "zero_cards":
+                # Counted from scratch after the cooldown, so a location that
+                # is still empty on the retry is taken as having no results.
+                self.empty_streak = 0
+            elif first_page and not reason:
+                self.empty_streak += 1
+            if reason:
+                self._blocked(reason, url)
+            elif self.adaptive:
+                self._clean()
+
+    def _clean(self):
+        self.clean_streak += 1
+        if self.clean_streak % INCREASE_WINDOW:
+            return
+        self.consecutive_blocks = 0
+        self.rate = min(self.rate + INCREASE, 1.0 / MIN_INTERVAL)
+        self.peak_rate = max(self.peak_rate, self.rate)
+        self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+
+    def _blocked(self, reason, url):
+        now = time.monotonic()
+        self.blocks += 1
+        event = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "domain": self.domain,
+            "reason": reason,
+            "url": url,
+            "requests": self.requests,
+        }
+        if now < self._cooldown_until:
+            # Same episode; the cooldown already covers it.
+            event["during_cooldown"] = True
+            self.events.append(event)
+            return
+        self.clean_streak = 0
+        self.consecutive_blocks += 1
+        if self.adaptive:
+            self.rate = max(self.rate * DECREASE, 1.0 / MAX_INTERVAL)
+            self.concurrency = max(int(self.concurrency * DECREASE), 1)
+        cooldown = min(BASE_COOLDOWN * 2 ** (self.consecutive_blocks - 1), MAX_COOLDOWN)
+        cooldown *= random.uniform(1 - JITTER, 1 + JITTER)
+        self._cooldown_until = now + cooldown
+        event.update({"rate_after": round(self.rate, 3), "concurrency_after": self.concurrency,
+                      "cooldown": round(cooldown, 1)})
+        self.events.append(event)
+        print(
+            f"[rate] domain={self.domain} blocked ({reason}); rate={self.rate:.2f}/s "
+            f"concurrency={self.concurrency} cooldown={cooldown:.1f}s",
+            flush=True,
+        )
+
+    def summary(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "blocks": self.blocks,
+                "rate": round(self.rate, 3),
+                "peak_rate": round(self.peak_rate, 3),
+                "concurrency": self.concurrency,
+            }
+
+
+class RateControl:
+    # One DomainController per domain, created on first use, plus the block
+    # log written next to the scraper's output. gave_up keeps the Blocked
+    # raised for each page skipped after its retries.
+
+    def __init__(self, interval=DEFAULT_START_INTERVAL, max_concurrency=1, adaptive=True, retries=DEFAULT_RETRIES):
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+        self.adaptive = adaptive
+        self.retries = retries
+        self.gave_up = []
+        self._domains = {}
+        self._lock = threading.Lock()
+
+    def domain(self, name):
+        with self._lock:
+            if name not in self._domains:
+                self._domains[name] = DomainController(name, self.interval, self.max_concurrency, self.adaptive)
+            return self._domains[name]
+
+    def fetch(self, domain, load, url="", first_page=True):
+        # Runs load() -> (cards, status, html, result) inside one paced slot,
+        # retrying after the cooldown while it looks blocked. Returns result,
+        # or raises Blocked once the retries are used up.
+        controller = self.domain(domain)
+        for attempt in range(self.retries + 1):
+            controller.acquire()
+            reason = ""
+            cards = 0
+            try:
+                cards, status, html, result = load()
+                reason = detect_block(status, html, cards, url, first_page and controller.expects_cards())
+            finally:
+                controller.release(reason, url, cards, first_page)
+            if not reason:
+                return result
+            if attempt < self.retries:
+                print(f"[rate] domain={domain} retrying {url} after the cooldown", flush=True)
+        blocked = Blocked(reason, url)
+        with self._lock:
+            self.gave_up.append(blocked)
+        raise blocked
+
+    def summary_lines(self, prefix="[rate]"):
+        with self._lock:
+            domains = sorted(self._domains.items())
+        lines = []
+        for name, controller in domains:
+            s = controller.summary()
+            lines.append(
+                f"{prefix} domain={name} requests={s['requests']} blocks={s['blocks']} "
+                f"rate={s['rate']:.2f}/s peak={s['peak_rate']:.2f}/s concurrency={s['concurrency']}"
+            )
+        return lines
+
+    def write_log(self, path):
+        with self._lock:
+            domains = sorted(self._domains.items())
+        data = {
+            "written_at": datetime.now().isoformat(timespec="seconds"),
+            "adaptive": self.adaptive,
+            "domains": {name: controller.summary() for name, controller in domains},
+            "block_events": [event for _, controller in domains for event in controller.events],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+    def finish(self, path):
+        for line in self.summary_lines():
+            print(line, flush=True)
+        if path:
+            self.write_log(path)
+            print(f"[rate] block log -> {path}", flush=True)
+
+
+def rate_from_args(args, interval, max_concurrency):
+    if not args.adaptive_rate:
+        return None
+    return RateControl(interval, max_concurrency, retries=args.block_retries)
+
+
+def add_rate_args(parser, default_log):
+    parser.add_argument(
+        "--adaptive-rate",
+        action="store_true",
+        help="Pace each domain adaptively: speed up while pages come back clean, back off on blocks/CAPTCHAs.",
+    )
+    parser.add_argument(
+        "--block-retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Retries for a page that came back blocked, each after the domain's cooldown.",
+    )
+    parser.add_argument(
+        "--rate-log",
+        default=default_log,
+        help="With --adaptive-rate, write per-domain rates and block events here (empty = off).",
+    )
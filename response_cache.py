@@ -0,0 +1,224 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_DIR = ".scrape_cache"
+DEFAULT_MAX_MB = 500
+# Seconds a cached entry stays fresh, per source. Card details change far less
+# often than result listings.
+DEFAULT_TTLS = {
+    "google": 6 * 3600,
+    "google-card": 7 * 24 * 3600,
+    "indeed": 6 * 3600,
+    "reed": 6 * 3600,
+}
+FALLBACK_TTL = 6 * 3600
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid")
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url):
+    # Same page -> same key: lowercase scheme/host, no default port, no
+    # fragment or tracking params, query parameters sorted.
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ]
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+def card_key(title, company, location, link=""):
+    # Identity of a Google card, mirroring merge_jobs.row_key plus the link.
+    return "card:" + "|".join(v.strip().lower() for v in (title, company, location, link))
+
+
+def parse_ttls(raw_value):
+    # "google=3600,reed=600" -> {"google": 3600.0, "reed": 600.0}
+    ttls = {}
+    for item in raw_value.split(","):
+        if "=" not in item:
+            continue
+        source, seconds = item.split("=", 1)
+        ttls[source.strip()] = float(seconds)
+    return ttls
+
+
+class ResponseCache:
+    # Content-addressed on-disk cache. Bodies live in blobs/<sha256>, so the
+    # same page cached under several keys is stored once; index.db maps keys
+    # to blobs with per-source TTLs and evicts least recently used entries
+    # once the blobs exceed max_bytes. In replay_only mode entries never
+    # expire and callers must not touch the network on a miss.
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, ttls=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 replay_only=False):
+        self.root = root
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, source TEXT, digest TEXT, size INTEGER,"
+            " stored_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)")
+        self._db.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _key(self, key):
+        return key if key.startswith("card:") else normalize_url(key)
+
+    def get(self, key, source):
+        key = self._key(key)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, size, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            fresh = row is not None and (
+                self.replay_only or now - row[2] <= self.ttls.get(source, FALLBACK_TTL)
+            )
+            body = None
+            if fresh:
+                try:
+                    with open(self._blob_path(row[0]), "rb") as f:
+                        body = f.read()
+                except OSError:
+                    body = None
+            if body is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            self.bytes_saved += row[1]
+            return body
+
+    def put(self, key, source, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key = self._key(key)
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, path)
+            old = self._db.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, source, digest, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, digest, len(body), now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_unused(old[0])
+            self.stores += 1
+            self._evict()
+            self._db.commit()
+
+    def get_text(self, key, source):
+        body = self.get(key, source)
+        return body.decode("utf-8", errors="replace") if body is not None else None
+
+    def _drop_blob_if_unused(self, digest):
+        in_use = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if in_use:
+            return False
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+        return True
+
+    def _total_bytes(self):
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self._db.execute(
+            "SELECT key, digest, size FROM entries ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            if self._drop_blob_if_unused(digest):
+                total -= size
+            self.evictions += 1
+            if total <= self.max_bytes:
+                break
+
+    def summary_line(self, prefix="[cache]"):
+        return (
+            f"{prefix} hits={self.hits} misses={self.misses} stores={self.stores} "
+            f"evictions={self.evictions} bytes_saved={self.bytes_saved}"
+            + (" mode=replay" if self.replay_only else "")
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def add_cache_args(parser):
+    parser.add_argument(
+        "--cache-dir",
+        default="",
+        help=f"Cache fetched pages and job details here (e.g. {DEFAULT_CACHE_DIR}; empty = no cache).",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        default="",
+        help="Per-source freshness in seconds, e.g. google=3600,google-card=86400,reed=600.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help="Evict least recently used entries above this size.",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve everything from the cache and never touch the network (needs --cache-dir).",
+    )
+
+
+def cache_from_args(args):
+    if args.replay and not args.cache_dir:
+        raise SystemExit("--replay needs --cache-dir")
+    if not args.cache_dir:
+        return None
+    return ResponseCache(
+        args.cache_dir,
+        ttls=parse_ttls(args.cache_ttl),
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        replay_only=args.replay,
+    )
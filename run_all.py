@@ -1,6 +1,17 @@
 import argparse
+import csv
+import os
+import queue
 import subprocess
 import sys
+import threading
+import time
+
+from browser_daemon import new_tab, open_page
+import google_s
+import job_boards
+import merge_jobs
+import profiling
 
 SCRIPTS = [
     "google_s.py",
@@ -15,6 +26,135 @@ def run_script(name, extra_args):
         raise SystemExit(f"Failed running {name} (exit {result.returncode})")
 
 
+class QueueWriter:
+    # csv.writer stand-in for a pipeline stage: still writes the stage's own
+    # CSV, and hands each row, normalised, to the merge consumer.
+    def __init__(self, writer, records, to_row):
+        self.writer = writer
+        self.records = records
+        self.to_row = to_row
+        self.rows = 0
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        self.records.put(self.to_row(row))
+        self.rows += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def run_pipeline(google_argv, boards_argv):
+    # Google and the boards scrape concurrently in one process, on tabs of a
+    # single shared browser. Their rows stream through a queue into the merge,
+    # which dedups and writes jobs_all.csv as they arrive; older data_*.csv
+    # snapshots are merged in after the live rows, as merge_jobs.py does.
+    google_args = google_s.parse_args(google_argv)
+    boards_args = job_boards.parse_args(boards_argv)
+    merge_args = merge_jobs.parse_args([])
+    profile = google_args.profile or boards_args.profile
+    if profile:
+        profiling.enable("profile_pipeline")
+    browser_lock = threading.RLock()
+    browser = {}
+
+    def get_browser():
+        # Started (or attached to the daemon) on first use; HTTP-only boards
+        # and replay runs never need it.
+        with browser_lock:
+            if "page" not in browser:
+                browser["page"] = open_page(google_args.browser_address, google_args.lean)
+            return browser["page"]
+
+    def boards_page():
+        # The boards' serial loop gets its own tab; Google keeps the first one.
+        with browser_lock:
+            if "boards" not in browser:
+                browser["boards"] = new_tab(get_browser())
+            return browser["boards"]
+
+    records = queue.Queue()
+    done = object()
+    timings = {}
+
+    def stage(name, path, headers, to_row, body):
+        started = time.perf_counter()
+        writer = None
+        try:
+            with open(path, mode="w", newline="", encoding="utf-8") as f:
+                writer = QueueWriter(csv.writer(f), records, to_row)
+                writer.writer.writerow(headers)
+                body(writer)
+        except Exception as e:
+            print(f"[pipeline] {name} failed: {e}", flush=True)
+        finally:
+            timings[name] = (time.perf_counter() - started, writer.rows if writer else 0)
+            records.put(done)
+
+    stages = [
+        (
+            "google",
+            "google_jobs.csv",
+            google_s.GOOGLE_HEADERS,
+            merge_jobs.google_row,
+            lambda writer: google_s.run_google(
+                google_args, None if google_args.replay else get_browser(), writer
+            ),
+        ),
+        (
+            "boards",
+            "jobs_indeed_reed.csv",
+            job_boards.BOARD_HEADERS,
+            merge_jobs.board_row,
+            lambda writer: job_boards.run_boards(boards_args, writer, boards_page, lambda: new_tab(get_browser())),
+        ),
+    ]
+    started = time.perf_counter()
+    threads = [threading.Thread(target=stage, args=spec, name=spec[0]) for spec in stages]
+    for thread in threads:
+        thread.start()
+
+    merge_clock = {"waited": 0.0, "first_row": None}
+
+    def pipeline_rows():
+        pending = len(threads)
+        while pending:
+            wait_started = time.perf_counter()
+            item = records.get()
+            merge_clock["waited"] += time.perf_counter() - wait_started
+            if item is done:
+                pending -= 1
+                continue
+            if merge_clock["first_row"] is None:
+                merge_clock["first_row"] = time.perf_counter() - started
+            yield item
+        history = [path for path in merge_jobs.INPUT_FILES if os.path.basename(path).lower().startswith("data_")]
+        yield from merge_jobs.iter_input_rows(history)
+
+    merge_started = time.perf_counter()
+    stats = merge_jobs.merge_rows(pipeline_rows(), merge_args)
+    merge_wall = time.perf_counter() - merge_started
+    for thread in threads:
+        thread.join()
+    for name in ("boards", "page"):
+        if name in browser:
+            browser[name].close()
+
+    for name, (wall, rows) in timings.items():
+        print(f"[pipeline] stage={name} rows={rows} wall={wall:.1f}s", flush=True)
+    first_row = merge_clock["first_row"]
+    print(
+        f"[pipeline] stage=merge rows_in={stats['read']} unique={stats['unique']} "
+        f"busy={merge_wall - merge_clock['waited']:.1f}s wall={merge_wall:.1f}s "
+        f"first_row={'-' if first_row is None else f'{first_row:.1f}s'}",
+        flush=True,
+    )
+    print(f"[pipeline] total wall={time.perf_counter() - started:.1f}s", flush=True)
+    if profile:
+        profiling.finish("profile_pipeline")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run all job scrapers and merge.")
     parser.add_argument("--query", default="php developer", help="Job title or keywords.")
@@ -29,18 +169,61 @@ def main():
         default=1,
         help="Pages per board to scan (Indeed/Reed).",
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run both scrapers at once in this process on one browser, merging rows as they arrive.",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Run the browser lean: headless, with heavy resources and trackers blocked.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each scraper step (profile_google/profile_boards, or profile_pipeline with --pipeline).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Checkpoint both scrapers so a later --resume can continue them (not with --pipeline).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue both scrapers from their checkpoints instead of starting over (not with --pipeline).",
+    )
     args = parser.parse_args()
 
     common_args = ["--query", args.query, "--location", args.location]
+    if args.lean:
+        common_args.append("--lean")
+    if args.profile:
+        common_args.append("--profile")
     boards_args = [*common_args, "--max-pages", str(args.max_pages)]
 
+    if args.pipeline:
+        run_pipeline(common_args, boards_args)
+        return
+    if args.checkpoint:
+        common_args.append("--checkpoint")
+        boards_args.append("--checkpoint")
+    if args.resume:
+        common_args.append("--resume")
+        boards_args.append("--resume")
+
+    started = time.perf_counter()
     for script in SCRIPTS:
+        script_started = time.perf_counter()
         if script == "job_boards.py":
             run_script(script, boards_args)
         elif script in {"google_s.py"}:
             run_script(script, common_args)
         else:
             run_script(script, [])
+        print(f"[run_all] stage={script} wall={time.perf_counter() - script_started:.1f}s", flush=True)
+    print(f"[run_all] total wall={time.perf_counter() - started:.1f}s", flush=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import re
+
+# Currency spellings recognised by the description salary patterns, mapped to
+# ISO codes.
+CURRENCIES = {
+    "$": "USD",
+    "usd": "USD",
+    "£": "GBP",
+    "gbp": "GBP",
+    "€": "EUR",
+    "eur": "EUR",
+}
+
+# Codes may run straight into the amount ("GBP50000"), but not into a word.
+CURRENCY = r"(?:\$|£|€|\b(?:USD|GBP|EUR)(?![A-Za-z]))"
+# Whole numbers only: never start or stop inside a longer run of digits.
+AMOUNT = r"(?<!\d)(?<!\d[,.])(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(?!\d|[,.]\d)(?:\s?([kK])\b)?"
+RANGE_RE = re.compile(
+    rf"({CURRENCY})?\s*{AMOUNT}(?!\s*%)(?:\s*(?:-|–|—|\bto\b)\s*({CURRENCY})?\s*{AMOUNT}(?!\s*%))?",
+    re.IGNORECASE,
+)
+
+PERIOD_PATTERNS = [
+    ("hourly", re.compile(r"\b(?:per|an|a|each)\s+hour\b|\bhourly\b|/\s*(?:hr|hour)\b|\bp/?h\b|\bph\b", re.IGNORECASE)),
+    ("daily", re.compile(r"\b(?:per|a|each)\s+day\b|\bdaily\b|/\s*day\b|\bp/?d\b|\bday rate\b", re.IGNORECASE)),
+    ("weekly", re.compile(r"\b(?:per|a|each)\s+week\b|\bweekly\b|/\s*(?:wk|week)\b|\bp/?w\b", re.IGNORECASE)),
+    ("monthly", re.compile(
+        r"\b(?:per|a|each)\s+(?:calendar\s+)?month\b|\bmonthly\b|/\s*(?:mo|month)\b|\bpcm\b|\bp/m\b", re.IGNORECASE
+    )),
+    ("annual", re.compile(
+        r"\b(?:per|a|each)\s+(?:year|annum)\b|\bannual(?:ly)?\b|\bp\.?\s?a\.?(?!\w)|/\s*(?:yr|year|annum)\b|\bpa\b",
+        re.IGNORECASE,
+    )),
+]
+# The period must follow the amount within this many characters, so "£40,000
+# ... paid holiday per day worked" isn't read as a day rate.
+PERIOD_WINDOW = 30
+
+# A number without a currency or "k" is only taken as pay from this amount
+# up, so "25 days holiday" or "3-5 years" aren't read as salaries. Amounts
+# this size with no stated period are annual; smaller ones keep no period.
+ANNUAL_MIN = 10000
+
+EMPTY = {"min": None, "max": None, "currency": "", "period": ""}
+
+
+def _to_number(whole, fraction, k_suffix):
+    value = float(whole.replace(",", "") + (fraction or ""))
+    if k_suffix:
+        value *= 1000
+    return value
+
+
+def _currency(symbol):
+    return CURRENCIES.get(symbol.lower(), "") if symbol else ""
+
+
+def parse_salary(text):
+    # Turn "£50k - £60k", "70,000 to 85,000" or "$25/hr" into
+    # {"min", "max", "currency", "period"}; unknown parts are None or "".
+    if not text:
+        return dict(EMPTY)
+    for match in RANGE_RE.finditer(text):
+        cur_lo, whole_lo, frac_lo, k_lo, cur_hi, whole_hi, frac_hi, k_hi = match.groups()
+        low = _to_number(whole_lo, frac_lo, k_lo)
+        high = low
+        if whole_hi:
+            # "50-60k": the suffix on the upper bound applies to both ends.
+            if k_hi and not k_lo and low < 1000:
+                low *= 1000
+            high = _to_number(whole_hi, frac_hi, k_hi)
+        if high < low:
+            low, high = high, low
+        if cur_lo or cur_hi or k_lo or k_hi or high >= ANNUAL_MIN:
+            break
+    else:
+        return dict(EMPTY)
+
+    currency = _currency(cur_lo) or _currency(cur_hi)
+    period = ""
+    for name, pattern in PERIOD_PATTERNS:
+        if pattern.search(text, match.end(), match.end() + PERIOD_WINDOW):
+            period = name
+            break
+    if not period and high >= ANNUAL_MIN:
+        period = "annual"
+    return {"min": low, "max": high, "currency": currency, "period": period}
+
+
+def normalize_salaries(values):
+    # Column-oriented batch form: parses each distinct string once and returns
+    # {"min": [...], "max": [...], "currency": [...], "period": [...]}
+    # aligned with `values`.
+    parsed = {}
+    columns = {"min": [], "max": [], "currency": [], "period": []}
+    for value in values:
+        key = (value or "").strip()
+        result = parsed.get(key)
+        if result is None:
+            result = parsed[key] = parse_salary(key)
+        for name, column in columns.items():
+            column.append(result[name])
+    return columns
+
+
+def format_amount(value):
+    if value is None:
+        return ""
+    return str(int(value)) if value == int(value) else f"{value:.2f}"
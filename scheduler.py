@@ -0,0 +1,139 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PER_DOMAIN = 2
+DEFAULT_MIN_INTERVAL = 1.0
+
+
+def board_domain(board):
+    return urlsplit(board["base_url"]).netloc
+
+
+def expand_units(boards, query, locations, max_pages):
+    # The full board x location x page matrix, pages in order within each pair.
+    return [
+        {"board": board, "query": query, "location": location, "page_index": page_index}
+        for board in boards
+        for location in locations
+        for page_index in range(max_pages)
+    ]
+
+
+class DomainLimiter:
+    # At most `max_concurrency` units in flight per domain, and consecutive
+    # requests to the domain started at least `min_interval` seconds apart.
+    def __init__(self, max_concurrency, min_interval):
+        self.semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+class PagePool:
+    # Page objects (browser tabs or HttpPages) for one domain, created lazily
+    # up to `size` and handed to one unit at a time.
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = max(size, 1)
+        self.pages = []
+        self._idle = asyncio.Queue()
+
+    async def acquire(self):
+        if self._idle.empty() and len(self.pages) < self.size:
+            page = await asyncio.to_thread(self.factory)
+            self.pages.append(page)
+            return page
+        return await self._idle.get()
+
+    def release(self, page):
+        self._idle.put_nowait(page)
+
+
+async def run_schedule(units, scrape_unit, page_factory, emit, per_domain=DEFAULT_PER_DOMAIN,
+                       min_interval=DEFAULT_MIN_INTERVAL, unit_done=None):
+    # scrape_unit(page, unit) is blocking and returns the unit's rows; it runs
+    # in a worker thread. emit(row) is always called from the event loop, so
+    # a plain csv.writer is safe, and so is unit_done(unit, rows), called once
+    # a unit's rows are all emitted. Returns the page pools so callers can
+    # close the pages they own.
+    chains = {}
+    for unit in units:
+        key = (unit["board"]["name"], unit["query"], unit["location"])
+        chains.setdefault(key, []).append(unit)
+
+    # Rate limits are per domain; pages are per board since boards may need
+    # different page types (HTTP vs browser tab).
+    limiters = {}
+    pools = {}
+    for unit in units:
+        board = unit["board"]
+        domain = board_domain(board)
+        if domain not in limiters:
+            limiters[domain] = DomainLimiter(per_domain, min_interval)
+        if board["name"] not in pools:
+            pools[board["name"]] = PagePool(lambda board=board: page_factory(board), per_domain)
+
+    totals = {}
+
+    async def run_chain(chain):
+        for unit in chain:
+            board = unit["board"]
+            domain = board_domain(board)
+            started = time.perf_counter()
+            async with limiters[domain]:
+                pool = pools[board["name"]]
+                page = await pool.acquire()
+                try:
+                    rows = await asyncio.to_thread(scrape_unit, page, unit)
+                except Exception as e:
+                    print(
+                        f"[scheduler] {board['name']} location={unit['location']} "
+                        f"page={unit['page_index'] + 1} failed: {e}",
+                        flush=True,
+                    )
+                    return
+                finally:
+                    pool.release(page)
+            for row in rows:
+                emit(row)
+            if unit_done is not None:
+                unit_done(unit, rows)
+            stats = totals.setdefault(domain, {"units": 0, "rows": 0})
+            stats["units"] += 1
+            stats["rows"] += len(rows)
+            print(
+                f"[scheduler] {board['name']} location={unit['location']} page={unit['page_index'] + 1} "
+                f"cards={len(rows)} wall={time.perf_counter() - started:.1f}s",
+                flush=True,
+            )
+            if not rows:
+                # Zero cards: later pages of this board/location are empty too.
+                break
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_chain(chain) for chain in chains.values()))
+    elapsed = time.perf_counter() - started
+    for domain, stats in sorted(totals.items()):
+        print(f"[scheduler] domain={domain} units={stats['units']} rows={stats['rows']}", flush=True)
+    total_rows = sum(stats["rows"] for stats in totals.values())
+    print(f"[scheduler] total rows={total_rows} wall={elapsed:.1f}s", flush=True)
+    return pools
+
+
+def run(units, scrape_unit, page_factory, emit, per_domain=DEFAULT_PER_DOMAIN, min_interval=DEFAULT_MIN_INTERVAL,
+        unit_done=None):
+    return asyncio.run(run_schedule(units, scrape_unit, page_factory, emit, per_domain, min_interval, unit_done))
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+DEFAULT_SEEN_INDEX = "seen_jobs.db"
+# Stored descriptions older than this are expanded again, so an edited
+# posting is picked up.
+DEFAULT_MAX_AGE_DAYS = 7.0
+
+
+def fingerprint(title, company, location):
+    # Same identity as merge_jobs.row_key: title + company + location.
+    return "|".join(v.strip().lower() for v in (title, company, location))
+
+
+def link_key(link):
+    # The whole link: Google card hrefs can carry the job's identity in the
+    # fragment, so cutting it off would merge different jobs.
+    return (link or "").strip()
+
+
+class SeenJobs:
+    # Persistent index of Google cards already scraped, with their full
+    # descriptions. A card is known if its title/company/location fingerprint
+    # has been stored before; known cards can reuse the stored
+    # description instead of being clicked and expanded again, until it is
+    # max_age_days old (0 = never). With refresh set every lookup misses, so
+    # all cards are expanded and re-stored.
+
+    def __init__(self, path=DEFAULT_SEEN_INDEX, refresh=False, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.refresh = refresh
+        self.max_age = max_age_days * 86400
+        self.known = 0
+        self.new = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " fingerprint TEXT PRIMARY KEY, link TEXT, snippet TEXT, description TEXT,"
+            " first_seen REAL, last_seen REAL, described REAL)"
+        )
+        # Indexes written before descriptions expired: no described column
+        # (their descriptions count as expired) and an unused link index.
+        if "described" not in {column[1] for column in self._db.execute("PRAGMA table_info(jobs)")}:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN described REAL")
+        self._db.execute("DROP INDEX IF EXISTS jobs_link")
+        self._db.commit()
+
+    def lookup(self, card):
+        # Returns {"snippet", "full"} for a known card, else None.
+        if self.refresh:
+            self.new += 1
+            return None
+        key = fingerprint(card["title"], card["company"], card["location"])
+        with self._lock:
+            # Matched on the fingerprint only: a link can be shared by
+            # different jobs, and a hit on it alone would hand over another
+            # job's description. The full link is kept for reference.
+            row = self._db.execute(
+                "SELECT fingerprint, snippet, description, described FROM jobs WHERE fingerprint = ?", (key,)
+            ).fetchone()
+            if row is None or not row[2]:
+                self.new += 1
+                return None
+            now = time.time()
+            if self.max_age and (row[3] is None or now - row[3] > self.max_age):
+                self.expired += 1
+                return None
+            self._db.execute("UPDATE jobs SET last_seen = ? WHERE fingerprint = ?", (now, row[0]))
+            self._db.commit()
+            self.known += 1
+            return {"snippet": row[1], "full": row[2]}
+
+    def remember(self, card, desc_snippet, desc_full):
+        if not desc_full:
+            # Nothing worth reusing; try the full path again next run.
+            return
+        key = fingerprint(card["title"], card["company"], card["location"])
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (fingerprint, link, snippet, description, first_seen, last_seen, described)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (fingerprint) DO UPDATE SET"
+                " link = excluded.link, snippet = excluded.snippet, description = excluded.description,"
+                " last_seen = excluded.last_seen, described = excluded.described",
+                (key, link_key(card["link"]), desc_snippet, desc_full, now, now, now),
+            )
+            self._db.commit()
+
+    def summary_line(self, prefix="[seen]"):
+        return f"{prefix} known={self.known} new={self.new} expired={self.expired} index={self.path}"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,199 @@
+import sqlite3
+import threading
+import time
+
+import profiling
+
+DEFAULT_SELECTOR_STATS = "selector_stats.db"
+# Timeout for every selector after the most likely one: by then the element
+# either exists or the first lookup has already waited for the page.
+PROBE_TIMEOUT = 0.1
+# Weight of the latest lookup in a selector's hit score, so a selector that
+# stops matching after a markup change drops behind within a few cards.
+DECAY = 0.2
+PRIOR_SCORE = 0.5
+# Selectors of a field nothing has matched yet are reported once tried this often.
+MIN_TRIES_REPORTED = 5
+
+_STATS = None
+_STATS_LOCK = threading.Lock()
+
+
+class SelectorStats:
+    # Learned hit scores and latencies per (source, field, selector), kept in
+    # memory while scraping and written back by flush(). order() puts the
+    # selector most likely to match first; ties keep the configured order, so
+    # a fresh database tries the lists as written.
+
+    def __init__(self, path=DEFAULT_SELECTOR_STATS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._dirty = set()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS selectors ("
+            " source TEXT, field TEXT, selector TEXT, tries INTEGER, hits INTEGER, score REAL, latency REAL,"
+            " last_hit REAL, PRIMARY KEY (source, field, selector)) WITHOUT ROWID"
+        )
+        self._db.commit()
+        for source, field, selector, tries, hits, score, latency, last_hit in self._db.execute(
+            "SELECT source, field, selector, tries, hits, score, latency, last_hit FROM selectors"
+        ):
+            self._stats[(source, field, selector)] = {
+                "tries": tries, "hits": hits, "score": score, "latency": latency, "last_hit": last_hit,
+            }
+
+    def order(self, source, field, selectors):
+        with self._lock:
+            def rank(item):
+                index, selector = item
+                stat = self._stats.get((source, field, selector))
+                if stat is None:
+                    return -PRIOR_SCORE, 0.0, index
+                return -round(stat["score"], 2), stat["latency"], index
+
+            return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+
+    def record(self, source, field, selector, hit, seconds=0.0):
+        key = (source, field, selector)
+        with self._lock:
+            stat = self._stats.setdefault(
+                key, {"tries": 0, "hits": 0, "score": PRIOR_SCORE, "latency": 0.0, "last_hit": None}
+            )
+            stat["tries"] += 1
+            stat["score"] += DECAY * ((1.0 if hit else 0.0) - stat["score"])
+            if hit:
+                stat["hits"] += 1
+                if stat["hits"] == 1:
+                    stat["latency"] = seconds
+                else:
+                    stat["latency"] += DECAY * (seconds - stat["latency"])
+                stat["last_hit"] = time.time()
+            self._dirty.add(key)
+
+    def never_hit(self, source=None, min_tries=MIN_TRIES_REPORTED):
+        # Selectors without a single hit, once tried min_tries times or as
+        # soon as another selector for the same field has matched (a dead
+        # primary is demoted after one miss and rarely tried again).
+        with self._lock:
+            live_fields = {key[:2] for key, stat in self._stats.items() if stat["hits"]}
+            return sorted(
+                (key, stat["tries"])
+                for key, stat in self._stats.items()
+                if stat["hits"] == 0
+                and (stat["tries"] >= min_tries or key[:2] in live_fields)
+                and (source is None or key[0] == source)
+            )
+
+    def reordered(self, source, fields):
+        # Fields whose learned order differs from the configured one.
+        changed = []
+        for field, selectors in fields.items():
+            learned = self.order(source, field, selectors)
+            if learned != list(selectors):
+                changed.append((field, learned))
+        return changed
+
+    def flush(self):
+        with self._lock:
+            rows = [(*key, *(self._stats[key][name] for name in ("tries", "hits", "score", "latency", "last_hit")))
+                    for key in self._dirty]
+            self._dirty.clear()
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO selectors"
+                    " (source, field, selector, tries, hits, score, latency, last_hit)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def summary_lines(self, source, fields=None, prefix="[selectors]"):
+        lines = []
+        for field, learned in self.reordered(source, fields or {}):
+            lines.append(f"{prefix} source={source} field={field} learned order: {' > '.join(learned)}")
+        for (_, field, selector), tries in self.never_hit(source):
+            if fields is not None and field not in fields:
+                continue
+            lines.append(f"{prefix} never hit source={source} field={field} selector={selector} tries={tries}")
+        return lines
+
+
+def enable(path):
+    # One shared store per process; scrapers running side by side (the
+    # pipeline) share it too.
+    global _STATS
+    with _STATS_LOCK:
+        if _STATS is None or _STATS.path != path:
+            _STATS = SelectorStats(path)
+        return _STATS
+
+
+def finish(source, fields=None):
+    # Persists what this run learned and reports it for source.
+    if _STATS is None:
+        return
+    _STATS.flush()
+    for line in _STATS.summary_lines(source, fields):
+        print(line, flush=True)
+
+
+def first_ele(parent, selectors, source, field, timeout=None, learn=True):
+    # The first element any selector finds. With learned stats the likeliest
+    # selector goes first with the full timeout and the rest are probed
+    # briefly; without, the selectors are tried in order with timeout each.
+    # learn=False keeps the order as written, for lists in priority order
+    # rather than interchangeable alternatives for one element.
+    stats = _STATS if learn else None
+    ordered = stats.order(source, field, selectors) if stats is not None else selectors
+    probe = PROBE_TIMEOUT if timeout is None else min(timeout, PROBE_TIMEOUT)
+    tried = []
+    for position, sel in enumerate(ordered):
+        started = time.perf_counter()
+        try:
+            ele = parent.ele(sel, timeout=timeout if stats is None or position == 0 else probe)
+        except Exception:
+            ele = None
+        if ele:
+            if stats is not None:
+                for missed in tried:
+                    stats.record(source, field, missed, False)
+                stats.record(source, field, sel, True, time.perf_counter() - started)
+            result = "fallback" if selectors.index(sel) else "primary"
+            profiling.count("selector", source=source, result=result, selector=sel)
+            return ele
+        tried.append(sel)
+    if stats is not None:
+        for missed in tried:
+            stats.record(source, field, missed, False)
+    if selectors:
+        profiling.count("selector", source=source, result="miss", selector=selectors[0])
+    return None
+
+
+def order(source, field, selectors):
+    return _STATS.order(source, field, selectors) if _STATS is not None else list(selectors)
+
+
+def note_match(page, source, field, selectors):
+    # For lists resolved elsewhere (e.g. by a wait): records which selector
+    # matches now, in the order the caller used.
+    if _STATS is None:
+        return
+    for sel in selectors:
+        try:
+            hit = bool(page.ele(sel, timeout=0))
+        except Exception:
+            hit = False
+        _STATS.record(source, field, sel, hit)
+        if hit:
+            return
+
+
+def add_selector_args(parser):
+    parser.add_argument(
+        "--selector-stats",
+        default="",
+        help=f"Learn which selectors match here and try the likeliest first, e.g. {DEFAULT_SELECTOR_STATS} "
+        "(default: fixed order).",
+    )
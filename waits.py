@@ -0,0 +1,148 @@
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.05
+
+
+class LatencyBudget:
+    # Caps the total time a single job may spend waiting across all its steps.
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = time.perf_counter() + seconds if seconds else None
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    def clamp(self, timeout):
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return min(timeout, remaining)
+
+    @property
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+class WaitStats:
+    # Thread-safe record of how long each named wait actually took.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps = {}
+
+    def record(self, name, elapsed, ok, baseline=0.0):
+        with self._lock:
+            step = self._steps.setdefault(name, {
+                "count": 0,
+                "misses": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "saved": 0.0,
+            })
+            step["count"] += 1
+            step["total"] += elapsed
+            step["max"] = max(step["max"], elapsed)
+            if not ok:
+                step["misses"] += 1
+            if baseline:
+                step["saved"] += baseline - elapsed
+
+    def summary_lines(self, prefix="[waits]"):
+        with self._lock:
+            steps = sorted(self._steps.items())
+        lines = []
+        for name, step in steps:
+            avg = step["total"] / step["count"] if step["count"] else 0.0
+            lines.append(
+                f"{prefix} {name} count={step['count']} misses={step['misses']} "
+                f"avg={avg:.3f}s max={step['max']:.3f}s total={step['total']:.1f}s "
+                f"saved_vs_fixed={step['saved']:.1f}s"
+            )
+        return lines
+
+    def print_summary(self, prefix="[waits]"):
+        for line in self.summary_lines(prefix):
+            print(line, flush=True)
+
+
+def wait_until(condition, timeout, name="wait", stats=None, budget=None, baseline=0.0, interval=DEFAULT_INTERVAL):
+    # Poll condition() until it returns something truthy or the step timeout
+    # (clamped to the job budget) runs out. Returns the last result either way.
+    if budget is not None:
+        timeout = budget.clamp(timeout)
+    started = time.perf_counter()
+    end = started + timeout
+    while True:
+        try:
+            result = condition()
+        except Exception:
+            result = None
+        if result or time.perf_counter() >= end:
+            break
+        time.sleep(interval)
+    if stats is not None:
+        stats.record(name, time.perf_counter() - started, bool(result), baseline)
+    return result
+
+
+def _find_eles(page, selectors):
+    for sel in selectors:
+        try:
+            eles = page.eles(sel, timeout=0)
+        except Exception:
+            eles = []
+        if eles:
+            return eles
+    return []
+
+
+def _first_text(page, selectors):
+    for sel in selectors:
+        try:
+            ele = page.ele(sel, timeout=0)
+        except Exception:
+            ele = None
+        if ele:
+            text = " ".join((ele.text or "").split())
+            if text:
+                return text
+    return ""
+
+
+def wait_for_eles(page, selectors, timeout, **kwargs):
+    return wait_until(lambda: _find_eles(page, selectors), timeout, **kwargs) or []
+
+
+def wait_for_stable_count(page, selectors, timeout, settle=0.3, **kwargs):
+    # Resolve once the card list is non-empty and has stopped growing for
+    # `settle` seconds, so lazily rendered cards are not cut off.
+    state = {"count": -1, "since": 0.0, "eles": []}
+
+    def condition():
+        eles = _find_eles(page, selectors)
+        now = time.perf_counter()
+        if len(eles) != state["count"]:
+            state["count"] = len(eles)
+            state["since"] = now
+        state["eles"] = eles
+        return eles if eles and now - state["since"] >= settle else None
+
+    found = wait_until(condition, timeout, **kwargs)
+    return found or state["eles"]
+
+
+def panel_text(page, selectors):
+    return _first_text(page, selectors)
+
+
+def wait_for_text_change(page, selectors, previous, timeout, **kwargs):
+    # Resolve when the first matching element shows non-empty text different
+    # from `previous` (e.g. the detail panel after clicking another card).
+    def condition():
+        text = _first_text(page, selectors)
+        return text if text and text != previous else None
+
+    return wait_until(condition, timeout, **kwargs) or ""
@@ -0,0 +1,146 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+
+def unit_key(source, query, location, page=0):
+    return "|".join([source, query.strip().lower(), location.strip().lower(), str(page)])
+
+
+class WorkQueue:
+    # Durable progress of one scraper's output file: which (source, query,
+    # location, page) units are finished and, inside an unfinished unit,
+    # which cards are already written. Every checkpoint flushes and fsyncs the
+    # CSV first, then commits the new file size together with the unit or
+    # card in one transaction. A resumed run cuts the CSV back to the last
+    # committed size and appends, so rows written after the last checkpoint
+    # are scraped once more instead of appearing twice.
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.resume = resume
+        self.skipped_units = 0
+        self.skipped_cards = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS units (key TEXT PRIMARY KEY, rows INTEGER, finished REAL) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cards (unit TEXT, card TEXT, PRIMARY KEY (unit, card)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+    def _meta(self, name):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def open_output(self, out_path, headers):
+        # The CSV to write to: appended to when resuming this output, else
+        # truncated with a fresh header and an empty queue.
+        offset = None
+        if self.resume and self._meta("output") == os.path.abspath(out_path) and os.path.exists(out_path):
+            offset = int(self._meta("offset") or 0)
+            if offset > os.path.getsize(out_path):
+                offset = None
+        if offset:
+            os.truncate(out_path, offset)
+            self._file = open(out_path, mode="a", newline="", encoding="utf-8")
+            done = self._db.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+            cards = self._db.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+            print(f"[checkpoint] resuming {out_path} at {offset} bytes: {done} units, {cards} cards done", flush=True)
+        else:
+            if self.resume:
+                print(f"[checkpoint] nothing to resume for {out_path}; starting fresh", flush=True)
+            with self._db:
+                self._db.execute("DELETE FROM units")
+                self._db.execute("DELETE FROM cards")
+                self._db.execute("DELETE FROM meta")
+                self._set_meta("output", os.path.abspath(out_path))
+            self._file = open(out_path, mode="w", newline="", encoding="utf-8")
+            csv.writer(self._file).writerow(headers)
+            self._commit()
+        return self._file
+
+    def _commit(self, unit=None, rows=0, card=None):
+        # Callers write the rows first; this makes them and the progress durable.
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            size = os.fstat(self._file.fileno()).st_size
+            with self._db:
+                if card is not None:
+                    self._db.execute("INSERT OR IGNORE INTO cards (unit, card) VALUES (?, ?)", (unit, card))
+                elif unit is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO units (key, rows, finished) VALUES (?, ?, ?)", (unit, rows, time.time())
+                    )
+                    self._db.execute("DELETE FROM cards WHERE unit = ?", (unit,))
+                self._set_meta("offset", size)
+
+    def unit_done(self, key):
+        # Rows the finished unit wrote, or None if it still has to run.
+        with self._lock:
+            row = self._db.execute("SELECT rows FROM units WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.skipped_units += 1
+            return row[0]
+        return None
+
+    def done_cards(self, key):
+        with self._lock:
+            cards = {card for (card,) in self._db.execute("SELECT card FROM cards WHERE unit = ?", (key,))}
+        self.skipped_cards += len(cards)
+        return cards
+
+    def card_written(self, unit, card):
+        self._commit(unit, card=card)
+
+    def unit_written(self, unit, rows):
+        self._commit(unit, rows=rows)
+
+    def summary_line(self):
+        return (
+            f"[checkpoint] {self.path}: skipped units={self.skipped_units} cards={self.skipped_cards} "
+            f"(already written before resume)"
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._db.close()
+
+
+def queue_from_args(args, default_path):
+    # --resume without --checkpoint continues from the default checkpoint.
+    path = args.checkpoint or (default_path if args.resume else "")
+    if not path:
+        return None
+    if args.resume and args.sink:
+        # Sinks are rewritten from scratch and can't be cut back to the
+        # checkpointed rows like the CSV.
+        raise SystemExit("--resume can't be combined with --sink")
+    return WorkQueue(path, args.resume)
+
+
+def add_checkpoint_args(parser, default_path):
+    parser.add_argument(
+        "--checkpoint",
+        nargs="?",
+        const=default_path,
+        default="",
+        help=f"Record finished units and cards as the CSV is written, in PATH (default {default_path}) so a "
+        "later --resume can continue the run. Off unless given.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a checkpointed run: append to its CSV, skipping units and cards already written.",
+    )